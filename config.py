@@ -1,7 +1,5 @@
 import os
 
-from sqlalchemy.pool import NullPool
-
 from dotenv import dotenv_values
 
 config = dotenv_values(".env")
@@ -16,9 +14,84 @@ class BaseConfig:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database connection pooling: "queue" keeps DB_POOL_SIZE connections open per process (plus up to
+    # DB_MAX_OVERFLOW under load, waiting DB_POOL_TIMEOUT seconds for one when all are busy), "pgbouncer"
+    # leaves pooling to a PgBouncer in transaction mode and "null" opens a connection per request.
+    # Empty uses SQLAlchemy's default for the database.
+    DB_POOL = get_env_value("DB_POOL")
+    DB_POOL_SIZE = int(get_env_value("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(get_env_value("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(get_env_value("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(get_env_value("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = get_env_value("DB_POOL_PRE_PING", "true").lower() == "true"
+
     EBAY_CLIENT_ID = get_env_value("EBAY_CLIENT_ID")
     EBAY_CLIENT_SECRET = get_env_value("EBAY_CLIENT_SECRET")
 
+    # Pooled HTTP connections to the eBay API, shared by all refresh workers
+    EBAY_POOL_SIZE = int(get_env_value("EBAY_POOL_SIZE", "10"))
+    EBAY_CONNECT_TIMEOUT = float(get_env_value("EBAY_CONNECT_TIMEOUT", "3.05"))
+    EBAY_READ_TIMEOUT = float(get_env_value("EBAY_READ_TIMEOUT", "10"))
+    EBAY_KEEP_ALIVE = get_env_value("EBAY_KEEP_ALIVE", "true").lower() == "true"
+
+    # Concurrent price refresh: worker threads per vendor, with optional per-vendor overrides
+    REFRESH_CONCURRENCY = int(get_env_value("REFRESH_CONCURRENCY", "8"))
+    REFRESH_VENDOR_CONCURRENCY = {"ebay": int(get_env_value("REFRESH_EBAY_CONCURRENCY", "4"))}
+
+    # Per-vendor request scheduling. Vendors listed here have every request paced to
+    # `qps` (bursting up to `burst`) and capped at `daily_quota` requests per UTC day
+    DATASOURCE_RATE_LIMITS = {
+        "ebay": {
+            "qps": float(get_env_value("EBAY_QPS", "5")),
+            "burst": int(get_env_value("EBAY_BURST", "10")),
+            "daily_quota": int(get_env_value("EBAY_DAILY_QUOTA", "5000")),
+        }
+    }
+    DATASOURCE_MAX_RETRIES = int(get_env_value("DATASOURCE_MAX_RETRIES", "3"))
+
+    # Background jobs (`flask run-worker`). A refresh is split into REFRESH_SHARDS jobs so
+    # several workers can share it; a worker that stops reporting loses its lease after JOB_LEASE_SECONDS
+    JOB_LEASE_SECONDS = int(get_env_value("JOB_LEASE_SECONDS", "300"))
+    JOB_RETRY_DELAY = int(get_env_value("JOB_RETRY_DELAY", "30"))
+    REFRESH_SHARDS = int(get_env_value("REFRESH_SHARDS", "1"))
+    WORKER_POLL_INTERVAL = float(get_env_value("WORKER_POLL_INTERVAL", "5"))
+
+    # Notification outbox (`flask dispatch-notifications`). Failed sends are retried after
+    # OUTBOX_RETRY_DELAY seconds, doubling each time, and dead-lettered after OUTBOX_MAX_ATTEMPTS
+    OUTBOX_CONCURRENCY = int(get_env_value("OUTBOX_CONCURRENCY", "4"))
+    OUTBOX_BATCH_SIZE = int(get_env_value("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_MAX_ATTEMPTS = int(get_env_value("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_DELAY = int(get_env_value("OUTBOX_RETRY_DELAY", "60"))
+    OUTBOX_LEASE_SECONDS = int(get_env_value("OUTBOX_LEASE_SECONDS", "120"))
+    OUTBOX_POLL_INTERVAL = float(get_env_value("OUTBOX_POLL_INTERVAL", "2"))
+    # Hour of the day (UTC) daily digests go out
+    DIGEST_HOUR = int(get_env_value("DIGEST_HOUR", "8"))
+
+    # Change-only price history: a fetch that finds the same price extends the latest
+    # PriceHistory row (last_confirmed_at) instead of adding one. Reads rebuild the daily series.
+    HISTORY_CHANGE_ONLY = get_env_value("HISTORY_CHANGE_ONLY", "false").lower() == "true"
+    # Where `flask archive-history` keeps old price history, one file per item.
+    # Empty means the app's instance folder (instance/history-archive).
+    HISTORY_ARCHIVE_DIR = get_env_value("HISTORY_ARCHIVE_DIR")
+
+    # Cached item and dashboard views. Writes through the price service invalidate them; CACHE_TTL
+    # (seconds, 0 disables caching) bounds how stale they get after writes made elsewhere, which only
+    # a shared cache (CACHE_URL, e.g. redis://localhost:6379/0) sees. Without one, an in-process LRU is used.
+    CACHE_URL = get_env_value("CACHE_URL")
+    CACHE_TTL = int(get_env_value("CACHE_TTL", "300"))
+    CACHE_MAX_ENTRIES = int(get_env_value("CACHE_MAX_ENTRIES", "10000"))
+
+    # Users loaded for Flask-Login are kept for USER_CACHE_TTL seconds (0 disables it). A user's own
+    # account changes take effect at once; their other sessions see them within the TTL.
+    USER_CACHE_TTL = int(get_env_value("USER_CACHE_TTL", "30"))
+    USER_CACHE_MAX_ENTRIES = int(get_env_value("USER_CACHE_MAX_ENTRIES", "1024"))
+
+    # Create missing tables when the app boots. Off by default so booting never touches the
+    # database; create the schema with `flask init-db` or `flask db upgrade` instead.
+    AUTO_CREATE_TABLES = get_env_value("AUTO_CREATE_TABLES", "false").lower() == "true"
+    # Print the time and imports of each phase of create_app to stderr
+    STARTUP_PROFILE = get_env_value("STARTUP_PROFILE", "false").lower() == "true"
+
     API_TITLE = "Price Tracker API"
     API_VERSION = "v1"
     OPENAPI_VERSION = "3.0.3"
@@ -30,18 +103,21 @@ class BaseConfig:
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///site.db"
+    AUTO_CREATE_TABLES = True
 
 
 class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    AUTO_CREATE_TABLES = True
     SECRET_KEY = "test-secret-key"
     WTF_CSRF_ENABLED = False
     LOGIN_DISABLED = False
+    CACHE_TTL = 0
     SERVER_NAME = "localhost"
 
 
 class ProductionConfig(BaseConfig):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = get_env_value("DB_URI")
-    SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": NullPool}
+    DB_POOL = get_env_value("DB_POOL", "queue")
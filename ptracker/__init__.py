@@ -1,77 +1,125 @@
-import os
-
-from flask import Flask
-from config import DevelopmentConfig, TestingConfig, ProductionConfig
-from flask_smorest import Api
-from sqlalchemy import inspect
-
-
-def create_app(override_config=None):
-    env = os.getenv("FLASK_ENV", "development")
-    print(env)
-    if env == "production":
-        config_class = ProductionConfig
-    elif env == "testing":
-        config_class = TestingConfig
-    else:
-        config_class = DevelopmentConfig
-
-    app = Flask(__name__)
-    app.config.from_object(override_config or config_class)
-    api = Api(app)
-
-    # Initialize extensions
-    from ptracker.extensions import db, migrate, login_manager
-
-    db.init_app(app)
-    migrate.init_app(app, db)
-    login_manager.init_app(app)
-
-    @login_manager.user_loader
-    def load_user(user_id: str):
-        from ptracker.models import User
-
-        return db.session.get(User, int(user_id))
-
-    # Initialize data sources
-    from ptracker.datasources import init_datasources
-
-    init_datasources(app)
-
-    # Dependency injection
-    from ptracker.dependencies import init_services
-
-    init_services(app)
-
-    # Register blueprints
-    from ptracker.auth.routes import auth_bp
-    from ptracker.price_tracking.routes import price_bp
-    from ptracker.main.routes import main_bp
-    from ptracker.api import api_bp
-
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(price_bp)
-    app.register_blueprint(main_bp)
-    api.register_blueprint(api_bp)
-
-    # Register error handlers
-    from ptracker.errors import register_error_handlers
-
-    register_error_handlers(app)
-
-    # Register CLI commands
-    from ptracker.commands import seed_db, reset_db, update_items
-
-    app.cli.add_command(seed_db)
-    app.cli.add_command(reset_db)
-    app.cli.add_command(update_items)
-
-    with app.app_context():
-        if app.config.get("TESTING"):
-            db.create_all()
-        else:
-            inspector = inspect(db.engine)
-            if "user" not in inspector.get_table_names():
-                db.create_all()
-
-    return app
+import os
+import sys
+
+from flask import Flask
+from config import DevelopmentConfig, TestingConfig, ProductionConfig
+from ptracker.startup import StartupProfile
+
+
+def create_app(override_config=None, web=True):
+    """Build the app. `web=False` leaves out the blueprints and the OpenAPI spec (see `create_worker_app`)."""
+    env = os.getenv("FLASK_ENV", "development")
+    print(env)
+    if env == "production":
+        config_class = ProductionConfig
+    elif env == "testing":
+        config_class = TestingConfig
+    else:
+        config_class = DevelopmentConfig
+
+    profile = StartupProfile()
+
+    with profile.phase("config"):
+        app = Flask(__name__)
+        app.config.from_object(override_config or config_class)
+        app.extensions["startup_profile"] = profile
+
+    # Initialize extensions
+    with profile.phase("extensions"):
+        from ptracker.extensions import db, migrate, login_manager
+        from ptracker.pooling import init_pool
+
+        init_pool(app)
+        db.init_app(app)
+        migrate.init_app(app, db)
+        login_manager.init_app(app)
+
+        from ptracker.auth.user_cache import init_user_cache, load_user
+
+        init_user_cache(app)
+        login_manager.user_loader(load_user)
+
+    # Initialize data sources
+    with profile.phase("datasources"):
+        from ptracker.datasources import init_datasources
+
+        init_datasources(app)
+
+    # Response cache
+    with profile.phase("cache"):
+        from ptracker.cache import init_cache
+
+        init_cache(app)
+
+    # Dependency injection
+    with profile.phase("services"):
+        from ptracker.dependencies import init_services
+
+        init_services(app)
+
+    # Register blueprints
+    if web:
+        with profile.phase("web"):
+            from flask_smorest import Api
+            from ptracker.auth.routes import auth_bp
+            from ptracker.price_tracking.routes import price_bp
+            from ptracker.main.routes import main_bp
+            from ptracker.api import api_bp
+
+            api = Api(app)
+            app.register_blueprint(auth_bp)
+            app.register_blueprint(price_bp)
+            app.register_blueprint(main_bp)
+            api.register_blueprint(api_bp)
+
+    # Register error handlers
+    with profile.phase("errors"):
+        from ptracker.errors import register_error_handlers
+
+        register_error_handlers(app)
+
+    # Register CLI commands
+    with profile.phase("cli"):
+        from ptracker.commands import (
+            init_db,
+            seed_db,
+            reset_db,
+            update_items,
+            backfill_price_changes,
+            compact_price_history,
+            archive_history,
+            backfill_archived_extremes,
+            rebuild_daily_stats,
+            run_worker,
+            dispatch_notifications,
+        )
+
+        app.cli.add_command(init_db)
+        app.cli.add_command(seed_db)
+        app.cli.add_command(reset_db)
+        app.cli.add_command(update_items)
+        app.cli.add_command(backfill_price_changes)
+        app.cli.add_command(compact_price_history)
+        app.cli.add_command(archive_history)
+        app.cli.add_command(backfill_archived_extremes)
+        app.cli.add_command(rebuild_daily_stats)
+        app.cli.add_command(run_worker)
+        app.cli.add_command(dispatch_notifications)
+
+    # Booting doesn't touch the database unless asked to; otherwise use `flask init-db` or `flask db upgrade`
+    if app.config.get("AUTO_CREATE_TABLES"):
+        with profile.phase("create_tables"), app.app_context():
+            db.create_all()
+
+    if app.config.get("STARTUP_PROFILE"):
+        print(profile.report(), file=sys.stderr)
+
+    return app
+
+
+def create_worker_app(override_config=None):
+    """The app for CLI commands and worker processes: everything but the web blueprints and the OpenAPI spec.
+
+    Used as `flask --app "ptracker:create_worker_app()" run-worker`.
+    """
+    return create_app(override_config, web=False)
@@ -0,0 +1,10 @@
+from .history import HistoryArrays, load_histories
+from .stats import PriceStats, compute_stats, item_stats
+
+__all__ = [
+    "HistoryArrays",
+    "PriceStats",
+    "compute_stats",
+    "item_stats",
+    "load_histories",
+]
@@ -0,0 +1,74 @@
+"""Price history loaded as NumPy arrays"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ptracker.datasources.base import chunked
+from ptracker.extensions import db
+from ptracker.models import PriceHistory
+
+DAY = 86400.0
+
+
+def _seconds(values) -> np.ndarray:
+    """Naive UTC datetimes (None allowed) as float seconds since the epoch, NaN for None"""
+    values = np.array(values, dtype="datetime64[us]")
+    return np.where(np.isnat(values), np.nan, values.astype(np.int64) / 1e6)
+
+
+@dataclass
+class HistoryArrays:
+    """Price observations of many items, sorted by item then time. Timestamps are epoch seconds."""
+
+    item_ids: np.ndarray
+    timestamps: np.ndarray
+    prices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+def load_histories(item_ids: list[int], since: datetime, chunk_size: int = 500) -> HistoryArrays:
+    """Load the price history of `item_ids` from `since` on, one query per `chunk_size` items.
+
+    Change-only rows (see PriceHistory.last_confirmed_at) are expanded into
+    one observation a day across their range, as the history API does, so
+    averages and volatility weigh a long-held price by how long it held.
+    """
+    last_seen = func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.timestamp)
+    rows = []
+    for ids in chunked(sorted(set(item_ids)), chunk_size):
+        rows += db.session.execute(
+            select(PriceHistory.item_id, PriceHistory.timestamp, PriceHistory.price, PriceHistory.last_confirmed_at)
+            .where(PriceHistory.item_id.in_(ids), last_seen >= since)
+            .order_by(PriceHistory.item_id, PriceHistory.timestamp)
+        ).all()
+
+    if not rows:
+        empty = np.empty(0)
+        return HistoryArrays(np.empty(0, dtype=np.int64), empty, empty)
+
+    ids, timestamps, prices, confirmed = zip(*rows)
+    arrays = expand_ranges(
+        np.array(ids, dtype=np.int64),
+        _seconds(timestamps),
+        np.array(prices, dtype=np.float64),
+        _seconds(confirmed),
+    )
+    keep = arrays.timestamps >= _seconds([since])[0]
+    return HistoryArrays(arrays.item_ids[keep], arrays.timestamps[keep], arrays.prices[keep])
+
+
+def expand_ranges(item_ids: np.ndarray, starts: np.ndarray, prices: np.ndarray, confirmed: np.ndarray) -> HistoryArrays:
+    """Repeat each row once per day it covers, evenly spaced up to its confirmation (NaN: just the row)"""
+    spans = np.where(confirmed > starts, confirmed - starts, 0.0)
+    steps = np.where(spans > 0, np.maximum(1, np.rint(spans / DAY)), 0).astype(np.int64)
+    counts = steps + 1
+
+    rows = np.repeat(np.arange(len(prices)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    timestamps = starts[rows] + spans[rows] * offsets / np.maximum(steps[rows], 1)
+    return HistoryArrays(item_ids[rows], timestamps, prices[rows])
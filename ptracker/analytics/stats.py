@@ -0,0 +1,153 @@
+"""Vectorized price statistics, computed for many items at once"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ptracker.analytics.history import DAY, HistoryArrays, load_histories
+from ptracker.datasources.base import chunked
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory
+
+# Longest window any statistic looks at, which bounds how much history is loaded
+HISTORY_WINDOW = timedelta(days=90)
+
+
+@dataclass
+class PriceStats:
+    item_id: int
+    current_price: float | None = None
+    avg_7d: float | None = None
+    avg_30d: float | None = None
+    min_30d: float | None = None
+    max_30d: float | None = None
+    min_90d: float | None = None
+    max_90d: float | None = None
+    # Standard deviation of the day-to-day price changes, in percent
+    volatility_30d: float | None = None
+    all_time_low: float | None = None
+    all_time_high: float | None = None
+    is_all_time_low: bool = False
+    pct_off_high: float | None = None
+
+
+def _round(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def window_stats(history: HistoryArrays, since: float) -> tuple[np.ndarray, ...]:
+    """Per-item min, max and mean of the observations at or after `since` (epoch seconds).
+
+    Returns:
+        tuple: (item_ids, minimums, maximums, means), one entry per item with observations
+    """
+    mask = history.timestamps >= since
+    item_ids, prices = history.item_ids[mask], history.prices[mask]
+    if not len(prices):
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty
+
+    # Observations are sorted by item, so each item is one contiguous segment
+    items, starts = np.unique(item_ids, return_index=True)
+    counts = np.diff(np.append(starts, len(prices)))
+    return (
+        items,
+        np.minimum.reduceat(prices, starts),
+        np.maximum.reduceat(prices, starts),
+        np.add.reduceat(prices, starts) / counts,
+    )
+
+
+def volatility(history: HistoryArrays, since: float) -> tuple[np.ndarray, np.ndarray]:
+    """Per-item sample standard deviation of consecutive price changes (percent) from `since` on.
+
+    Returns:
+        tuple: (item_ids, volatilities), NaN for items with fewer than two changes to compare
+    """
+    mask = history.timestamps >= since
+    item_ids, prices = history.item_ids[mask], history.prices[mask]
+
+    consecutive = (item_ids[1:] == item_ids[:-1]) & (prices[:-1] > 0)
+    returns = (prices[1:] - prices[:-1])[consecutive] / prices[:-1][consecutive]
+    items, groups = np.unique(item_ids[1:][consecutive], return_inverse=True)
+
+    count = np.bincount(groups, minlength=len(items))
+    total = np.bincount(groups, weights=returns, minlength=len(items))
+    squares = np.bincount(groups, weights=returns**2, minlength=len(items))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (squares - total**2 / count) / (count - 1)
+    return items, np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)) * 100, np.nan)
+
+
+def _extremes(item_ids: list[int]) -> dict[int, tuple[float | None, float | None, float | None]]:
+    """(current price, all-time low, all-time high) per item, from the table and the archived extremes"""
+    extremes = {}
+    for ids in chunked(sorted(set(item_ids)), 500):
+        rows = db.session.execute(
+            select(
+                Item.id,
+                Item.current_price,
+                Item.archived_low,
+                Item.archived_high,
+                func.min(PriceHistory.price),
+                func.max(PriceHistory.price),
+            )
+            .outerjoin(PriceHistory, PriceHistory.item_id == Item.id)
+            .where(Item.id.in_(ids))
+            .group_by(Item.id, Item.current_price, Item.archived_low, Item.archived_high)
+        ).all()
+        for item_id, current, *prices in rows:
+            prices = [price for price in (current, *prices) if price is not None]
+            extremes[item_id] = (current, min(prices, default=None), max(prices, default=None))
+    return extremes
+
+
+def compute_stats(
+    history: HistoryArrays,
+    now: datetime,
+    extremes: dict[int, tuple[float | None, float | None, float | None]],
+) -> dict[int, PriceStats]:
+    """Build PriceStats for every item in `extremes` from already loaded history"""
+    now_seconds = now.replace(tzinfo=timezone.utc).timestamp() if now.tzinfo is None else now.timestamp()
+    stats = {}
+    for item_id, (current, low, high) in extremes.items():
+        stats[item_id] = PriceStats(
+            item_id=item_id,
+            current_price=current,
+            all_time_low=low,
+            all_time_high=high,
+            is_all_time_low=current is not None and low is not None and current <= low,
+            pct_off_high=round((high - current) / high * 100, 2) if current is not None and high else None,
+        )
+
+    def assign(items, **columns):
+        for name, values in columns.items():
+            for item_id, value in zip(items.tolist(), values.tolist()):
+                if item_id in stats:
+                    setattr(stats[item_id], name, _round(value))
+
+    items, _, _, means = window_stats(history, now_seconds - 7 * DAY)
+    assign(items, avg_7d=means)
+    items, lows, highs, means = window_stats(history, now_seconds - 30 * DAY)
+    assign(items, min_30d=lows, max_30d=highs, avg_30d=means)
+    items, lows, highs, _ = window_stats(history, now_seconds - 90 * DAY)
+    assign(items, min_90d=lows, max_90d=highs)
+    items, values = volatility(history, now_seconds - 30 * DAY)
+    assign(items, volatility_30d=values)
+    return stats
+
+
+def item_stats(item_ids: list[int], now: datetime | None = None) -> dict[int, PriceStats]:
+    """PriceStats for many items at once: two queries per 500 items, then array math.
+
+    Args:
+        item_ids (list[int]): Items to analyse, unknown ids are left out of the result
+        now (datetime | None, optional): End of the rolling windows. Defaults to the current time.
+    """
+    if not item_ids:
+        return {}
+    now = now or datetime.now(timezone.utc)
+    since = now.astimezone(timezone.utc).replace(tzinfo=None) - HISTORY_WINDOW
+    return compute_stats(load_histories(item_ids, since), now, _extremes(item_ids))
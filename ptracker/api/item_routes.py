@@ -1,5 +1,11 @@
-from flask import request, g, current_app
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import request, g, current_app, jsonify, Response
 from flask_login import current_user, login_required
+from werkzeug.exceptions import Forbidden
+from werkzeug.http import is_resource_modified
 
 from .schemas import (
     GetItemResponseSchema,
@@ -7,28 +13,103 @@ from .schemas import (
     TrackItemRequest,
     TrackItemResponse,
     GetUserItemsResponseSchema,
+    PriceHistoryQueryArgs,
+    UserItemsQueryArgs,
+    MetricsResponseSchema,
+    EnqueuedJobResponse,
+    JobStatusSchema,
 )
+from ptracker.cache import get_response_cache
+from ptracker.metrics import metrics
 
 from . import api_bp
 
+# WSGI environ key of the (url, ProductSnapshot or error) the ASGI app fetched before handing over /items/add
+PREFETCHED_SNAPSHOT = "ptracker.prefetched_snapshot"
+
+
+def _variant(view: str, args: dict) -> str:
+    """Cache key part identifying one view with its query arguments"""
+    return f"{view}:{json.dumps(args, sort_keys=True, default=str)}"
+
+
+def _etag(*version) -> str:
+    return hashlib.sha1(json.dumps(version, default=str).encode()).hexdigest()
+
+
+def _with_validators(response: Response, etag: str, last_modified: datetime | None = None) -> Response:
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def _not_modified(etag: str, last_modified: datetime | None = None) -> Response | None:
+    """A bodiless 304 if the client's If-None-Match / If-Modified-Since still holds, else None.
+
+    Views check it before anything is loaded or serialized.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return _with_validators(Response(status=304), etag, last_modified)
+
 
 @api_bp.route("/items/<int:item_id>")
+@api_bp.arguments(PriceHistoryQueryArgs, location="query")
 @api_bp.response(200, GetItemResponseSchema)
+@api_bp.alt_response(304, description="Not modified since the ETag / Last-Modified the client sent")
 @login_required
-def get_item(item_id):
-    result = g.price_service.get_item(item_id)
-
-    item = result["item"]
-    item.price_history = result["price_history"]
-    return {"data": item}
+def get_item(args, item_id):
+    version = g.price_service.get_item_version(item_id, **args)
+    last_fetched, _, history_rewritten_at, window = version
+    # Stored as naive UTC
+    changed = max(filter(None, (last_fetched, history_rewritten_at)), default=None)
+    last_modified = changed and changed.replace(tzinfo=timezone.utc)
+    etag = _etag(item_id, version)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    def build():
+        result = g.price_service.get_item(item_id, **args)
+
+        item = result["item"]
+        data = {column.key: getattr(item, column.key) for column in item.__table__.columns}
+        data["price_history"] = result["price_history"]
+        return GetItemResponseSchema().dump({"data": data})
+
+    # A limit without since reads a window that moves over time
+    variant = _variant("api-item", {**args, "window": window})
+    response = jsonify(get_response_cache().cached(f"item:{item_id}", variant, build))
+    return _with_validators(response, etag, last_modified)
 
 
 @api_bp.route("/items")
+@api_bp.arguments(UserItemsQueryArgs, location="query")
 @api_bp.response(200, GetUserItemsResponseSchema)
+@api_bp.alt_response(304, description="Not modified since the ETag the client sent")
 @login_required
-def get_items():
-    result = g.price_service.get_user_tracked_items(current_user.id)
-    return {"data": result}
+def get_items(args):
+    # Tracking edits carry no timestamp, so only the ETag validates the dashboard. The date
+    # is part of it because the price statistics' rolling windows move every day.
+    etag = _etag(datetime.now(timezone.utc).date(), g.price_service.get_dashboard_version(current_user.id))
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    def build():
+        result = g.price_service.get_user_dashboard(
+            current_user.id,
+            limit=args.get("limit"),
+            cursor=args.get("cursor"),
+            sort=args["sort"],
+            descending=args["order"] == "desc",
+            with_stats=True,
+        )
+        return GetUserItemsResponseSchema().dump({"data": result["items"], "next_cursor": result["next_cursor"]})
+
+    response = jsonify(get_response_cache().cached(f"user:{current_user.id}", _variant("api-items", args), build))
+    return _with_validators(response, etag)
 
 
 @api_bp.route("/items/add", methods=["POST"])
@@ -36,7 +117,14 @@ def get_items():
 @api_bp.response(201, TrackItemResponse)
 @login_required
 def track_item(data):
-    item = g.price_service.track_item(data["url"], current_user.id, data["target_price"])
+    snapshot = None
+    prefetched = request.environ.get(PREFETCHED_SNAPSHOT)
+    if prefetched and prefetched[0] == data["url"]:
+        snapshot = prefetched[1]
+        if isinstance(snapshot, Exception):
+            raise snapshot
+
+    item = g.price_service.track_item(data["url"], current_user.id, data["target_price"], snapshot=snapshot)
     return {"data": item}
 
 
@@ -49,15 +137,38 @@ def untrack_item(item_id):
 
 
 @api_bp.route("/update-items")
-@api_bp.response(200, SuccessResponse)
+@api_bp.response(202, EnqueuedJobResponse)
+@login_required
 def update_all_items():
     """Endpoint to trigger manual update of all tracked items.
-    In production, this would be handled by a scheduled background job.
+    Only queues a `refresh_items` job for `flask run-worker`; poll /api/jobs/<job_id> for progress.
     """
-    current_app.logger.info("Updating all items...")
-    g.price_service.check_price_change_and_notify_all()
-    current_app.logger.info("All items updated!")
-    return {"success": True, "message": "All items updated"}
+    job = g.job_queue.enqueue(
+        "refresh_items",
+        shards=current_app.config.get("REFRESH_SHARDS", 1),
+        dedupe=True,
+        requested_by=current_user.id,
+    )
+    current_app.logger.info("Queued item refresh job %s", job.id)
+    return {"success": True, "message": "Item update queued", "job_id": job.id}
+
+
+@api_bp.route("/jobs/<int:job_id>")
+@api_bp.response(200, JobStatusSchema)
+@login_required
+def get_job(job_id):
+    """Status of a job the caller queued; admins can see every job"""
+    return g.job_queue.get_status(job_id, requested_by=None if current_user.role == "admin" else current_user.id)
+
+
+@api_bp.route("/metrics")
+@api_bp.response(200, MetricsResponseSchema)
+@login_required
+def get_metrics():
+    """In-process counters, gauges and timings, e.g. vendor quota usage and scheduler waits. Admins only."""
+    if current_user.role != "admin":
+        raise Forbidden("Metrics are only available to admins")
+    return metrics.snapshot()
 
 
 @api_bp.route("/user/notifications", methods=["PATCH"])
@@ -65,7 +176,9 @@ def update_all_items():
 @login_required
 def update_user_notifications():
     data = request.get_json()
-    g.price_service.update_user_notifications(current_user.id, data.get("enabled", True))
+    # A request that only changes the mode leaves notifications on or off as they were
+    enabled = data.get("enabled", None if "mode" in data else True)
+    g.price_service.update_user_notifications(current_user.id, enabled, data.get("mode"))
     return {"success": True, "message": "user notifications updated"}
 
 
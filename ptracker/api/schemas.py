@@ -1,4 +1,6 @@
-from marshmallow import Schema, fields
+from datetime import timezone
+
+from marshmallow import Schema, fields, validate
 
 
 class UserSchema(Schema):
@@ -13,8 +15,27 @@ class PriceHistory(Schema):
     price = fields.Float()
     timestamp = fields.DateTime()
 
+    # Only present on downsampled (daily/weekly) points, where price is the close
+    open = fields.Float()
+    high = fields.Float()
+    low = fields.Float()
+    close = fields.Float()
+    count = fields.Int()
+
+
+class PriceHistoryQueryArgs(Schema):
+    since = fields.AwareDateTime(default_timezone=timezone.utc)
+    until = fields.AwareDateTime(default_timezone=timezone.utc)
+    limit = fields.Int(load_default=365, validate=validate.Range(min=1, max=5000))
+    resolution = fields.Str(
+        load_default="raw",
+        validate=validate.OneOf(["raw", "daily", "weekly"]),
+        metadata={"description": "raw rows, or daily/weekly OHLC buckets"},
+    )
 
-class ItemSchema(Schema):
+
+# An item without its price history, as the dashboard lists it
+class ItemSummarySchema(Schema):
     id = fields.Int()
     vendor = fields.Str()
     external_id = fields.Str()
@@ -26,6 +47,8 @@ class ItemSchema(Schema):
     in_stock = fields.Bool()
     last_fetched = fields.DateTime()
 
+
+class ItemSchema(ItemSummarySchema):
     price_history = fields.List(fields.Nested("PriceHistory"))
 
 
@@ -41,6 +64,7 @@ class UserItemSchema(Schema):
 class UserProfileSchema(UserSchema):
     role = fields.Str()
     notifications_enabled = fields.Bool()
+    notification_mode = fields.Str()
     tracked_items = fields.List(fields.Nested("UserItemSchema"))
 
 
@@ -83,14 +107,66 @@ class TrackItemResponse(Schema):
     data = fields.Nested("ItemSchema")
 
 
+class PriceStatsSchema(Schema):
+    avg_7d = fields.Float(allow_none=True)
+    avg_30d = fields.Float(allow_none=True)
+    min_30d = fields.Float(allow_none=True)
+    max_30d = fields.Float(allow_none=True)
+    min_90d = fields.Float(allow_none=True)
+    max_90d = fields.Float(allow_none=True)
+    volatility_30d = fields.Float(
+        allow_none=True, metadata={"description": "Standard deviation of day-to-day price changes, in percent"}
+    )
+    all_time_low = fields.Float(allow_none=True)
+    all_time_high = fields.Float(allow_none=True)
+    is_all_time_low = fields.Bool()
+    pct_off_high = fields.Float(allow_none=True, metadata={"description": "Percent below the all-time high"})
+
+
 class UserTrackedItemsSchema(Schema):
-    item = fields.Nested("ItemSchema")
+    item = fields.Nested("ItemSummarySchema")
     target_price = fields.Float()
     current_price = fields.Float()
     price_change = fields.Float()
     notifications_enabled = fields.Bool()
+    stats = fields.Nested("PriceStatsSchema", allow_none=True)
+
+
+class UserItemsQueryArgs(Schema):
+    limit = fields.Int(
+        validate=validate.Range(min=1, max=500), metadata={"description": "Page size, all items if omitted"}
+    )
+    cursor = fields.Str(metadata={"description": "next_cursor from the previous page"})
+    sort = fields.Str(load_default="added", validate=validate.OneOf(["added", "name", "price", "change"]))
+    order = fields.Str(load_default="asc", validate=validate.OneOf(["asc", "desc"]))
 
 
 class GetUserItemsResponseSchema(Schema):
     success = fields.Constant(True)
     data = fields.Nested("UserTrackedItemsSchema", many=True)
+    next_cursor = fields.Str(allow_none=True)
+
+
+class MetricsResponseSchema(Schema):
+    counters = fields.Dict(keys=fields.Str(), values=fields.Float())
+    gauges = fields.Dict(keys=fields.Str(), values=fields.Float())
+    timings = fields.Dict(keys=fields.Str(), values=fields.Dict())
+
+
+class EnqueuedJobResponse(SuccessResponse):
+    job_id = fields.Int()
+
+
+class JobStatusSchema(Schema):
+    id = fields.Int()
+    kind = fields.Str()
+    status = fields.Str(metadata={"description": "queued, running, done or failed"})
+    progress = fields.Int(metadata={"description": "Units of work done so far"})
+    total = fields.Int(allow_none=True)
+    attempts = fields.Int()
+    error = fields.Str(allow_none=True)
+    result = fields.Dict(allow_none=True)
+    created_at = fields.DateTime()
+    started_at = fields.DateTime(allow_none=True)
+    finished_at = fields.DateTime(allow_none=True)
+    shards = fields.List(fields.Nested(lambda: JobStatusSchema()))
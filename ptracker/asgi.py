@@ -0,0 +1,123 @@
+"""ASGI serving mode: the Flask app behind asgiref, with item tracking fetched on the event loop.
+
+Run with `uvicorn asgi:app --workers 4`. Every request is served by the Flask app
+on a thread of its own; `POST /api/items/add` first awaits its product fetch, the
+slow outbound call, so no worker waits on the vendor (nor a thread, for sources
+with an async client such as eBay's).
+"""
+
+import contextvars
+import io
+import json
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask_login import current_user
+
+from ptracker import create_app
+from ptracker.api.item_routes import PREFETCHED_SNAPSHOT
+from ptracker.datasources import DataSourceFactory
+from ptracker.extensions import db
+
+TRACK_ITEM_PATH = "/api/items/add"
+
+_prefetched = contextvars.ContextVar("prefetched_snapshot", default=None)
+
+
+def _environ(scope, body: bytes) -> dict:
+    """The WSGI environ asgiref builds for the request"""
+    instance = WsgiToAsgiInstance(None)
+    instance.scope = scope
+    return instance.build_environ(scope, io.BytesIO(body))
+
+
+def _replay(body: bytes):
+    """An ASGI `receive` handing over a body that was already read"""
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+
+class AsyncApp:
+    """ASGI app serving the Flask app, prefetching the product of item tracking requests.
+
+    For `POST /api/items/add` the caller is authenticated on a thread, then the
+    product is fetched with the source's `fetch_from_url_async` and the request
+    goes through the Flask view, which uses the snapshot instead of fetching.
+    Validation, errors (the fetch's too) and the response are the Flask app's.
+    Requests that can't be prefetched (no url, not logged in) are passed on as is.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(self._wsgi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == TRACK_ITEM_PATH:
+            receive = await self._prefetch(scope, receive)
+
+        # The request's sync work gets a thread of its own instead of the one asgiref shares by default
+        async with ThreadSensitiveContext():
+            await self.wsgi(scope, receive, send)
+
+    def _wsgi_app(self, environ, start_response):
+        prefetched = _prefetched.get()
+        if prefetched is not None:
+            environ[PREFETCHED_SNAPSHOT] = prefetched
+        return self.flask_app(environ, start_response)
+
+    async def _prefetch(self, scope, receive):
+        """Fetch the product the request names and return a `receive` replaying its body"""
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        try:
+            url = json.loads(body).get("url")
+        except (ValueError, AttributeError):
+            url = None
+        if not isinstance(url, str):
+            return _replay(body)
+
+        # Only fetch for logged in users, a vendor request can cost API quota
+        if not await sync_to_async(self._is_authenticated, thread_sensitive=False)(_environ(scope, body)):
+            return _replay(body)
+
+        try:
+            source = DataSourceFactory.get(DataSourceFactory.detect_vendor(url))
+            snapshot = await source.fetch_from_url_async(url)
+        except Exception as e:
+            # Raised by the view, so the error handlers answer it as under WSGI
+            snapshot = e
+        _prefetched.set((url, snapshot))
+        return _replay(body)
+
+    def _is_authenticated(self, environ) -> bool:
+        with self.flask_app.request_context(environ):
+            return current_user.is_authenticated
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await sync_to_async(self._dispose, thread_sensitive=False)()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _dispose(self):
+        with self.flask_app.app_context():
+            db.engine.dispose()
+
+
+def create_asgi_app(override_config=None) -> AsyncApp:
+    return AsyncApp(create_app(override_config))
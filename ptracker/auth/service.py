@@ -1,3 +1,4 @@
+from ptracker.auth.user_cache import user_changed
 from ptracker.models import User
 from ptracker.extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -38,6 +39,7 @@ class AuthService:
             raise NotFound("User not found")
         user.password_hash = generate_password_hash(new_password)
         db.session.commit()
+        user_changed(user_id)
 
     def delete_user(self, user_id: int):
         user = db.session.get(User, user_id)
@@ -45,6 +47,7 @@ class AuthService:
             raise NotFound("User not found")
         db.session.delete(user)
         db.session.commit()
+        user_changed(user_id)
 
     def get_demo_user(self) -> User:
         demo_user = User.query.filter_by(email="demo@gmail.com").first()
@@ -0,0 +1,75 @@
+"""Short-lived cache of the users Flask-Login loads on every authenticated request"""
+
+import uuid
+
+from flask import current_app, has_request_context, session
+from sqlalchemy.orm import make_transient_to_detached
+
+from ptracker.cache import LRUBackend
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import User
+
+# Session key of the version stamp, rotated whenever the logged in user changes their account
+STAMP_KEY = "_user_stamp"
+
+
+class UserCache:
+    """Column values of recently loaded users, valid for the session version stamp they were loaded under.
+
+    A hit rebuilds the User inside the current session without a query, so later
+    lookups of the same user in the request (`db.session.get`) don't query either.
+    A user changing their own account rotates the stamp in their session, so their
+    next request misses in every process; their other sessions catch up within `ttl`.
+    A `ttl` of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: int = 30, max_entries: int = 1024):
+        self.ttl = ttl
+        self._entries = LRUBackend(max_entries=max_entries)
+
+    def load(self, user_id: int, stamp: str = "") -> User | None:
+        entry = self._entries.get(user_id) if self.ttl else None
+        if entry is not None and entry[0] == stamp:
+            metrics.incr("user_cache.hits")
+            user = User(**entry[1])
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        metrics.incr("user_cache.misses")
+        user = db.session.get(User, user_id)
+        if user is not None and self.ttl:
+            values = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+            self._entries.set(user_id, (stamp, values), ex=self.ttl)
+        return user
+
+    def invalidate(self, user_id: int):
+        self._entries.delete(user_id)
+
+
+def init_user_cache(app):
+    app.extensions["user_cache"] = UserCache(
+        ttl=app.config.get("USER_CACHE_TTL", 30),
+        max_entries=app.config.get("USER_CACHE_MAX_ENTRIES", 1024),
+    )
+
+
+def get_user_cache(app=None) -> UserCache:
+    return (app or current_app).extensions["user_cache"]
+
+
+def load_user(user_id: str) -> User | None:
+    """Flask-Login user_loader"""
+    return get_user_cache().load(int(user_id), session.get(STAMP_KEY, ""))
+
+
+def user_changed(user_id: int):
+    """Forget a user's cached identity after a committed change to their account.
+
+    The entry is dropped in this process, and if the change is made by the user's own
+    request their session stamp is rotated, which misses the cache in every process.
+    """
+    if "user_cache" in current_app.extensions:
+        get_user_cache().invalidate(user_id)
+    if has_request_context() and session.get("_user_id") == str(user_id):
+        session[STAMP_KEY] = uuid.uuid4().hex[:12]
@@ -0,0 +1,189 @@
+"""Read-through cache for the item and dashboard views, invalidated explicitly on writes"""
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Protocol
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ptracker.datasources.base import chunked
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import UserItem
+
+
+class CacheBackend(Protocol):
+    """The subset of the redis-py client the cache needs, so a `redis.Redis` can be used as is"""
+
+    def get(self, name: str) -> bytes | None: ...
+
+    def set(self, name: str, value: bytes, ex: int | None = None) -> bool: ...
+
+    def delete(self, *names: str) -> int: ...
+
+
+class LRUBackend:
+    """In-process CacheBackend: entries expire after `ex` seconds and the least recently used go first.
+
+    Values are stored as they are, so it can hold objects as well as bytes.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return value
+
+    def set(self, name: str, value: Any, ex: int | None = None) -> bool:
+        with self._lock:
+            self._entries[name] = (value, self._clock() + ex if ex else None)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """JSON-serializable view data cached per scope, such as `user:1` or `item:5`.
+
+    Every scope has a generation token, stored next to the entries and part of
+    their keys. Invalidating a scope drops its token, so all of its entries
+    (every page, sort and query variant) stop being found at once and simply
+    expire. A `ttl` of 0 disables caching.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int = 300, prefix: str = "ptracker"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _generation(self, scope: str) -> str:
+        key = f"{self.prefix}:gen:{scope}"
+        generation = self.backend.get(key)
+        if generation is None:
+            # A fresh token rather than a counter, so a lost token can never revive old entries
+            generation = uuid.uuid4().hex.encode()
+            self.backend.set(key, generation, ex=self.ttl)
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def cached(self, scope: str, variant: str, build: Callable[[], Any]) -> Any:
+        """Return the cached value of `variant` in `scope`, or build, store and return it.
+
+        Backend errors are counted as `cache.errors` and the value is built uncached.
+        """
+        if not self.ttl:
+            return build()
+
+        namespace = scope.split(":", 1)[0]
+        try:
+            key = f"{self.prefix}:{scope}:{self._generation(scope)}:{variant}"
+            hit = self.backend.get(key)
+        except Exception as e:
+            current_app.logger.warning("Cache read failed for %s: %s", scope, e)
+            metrics.incr("cache.errors")
+            return build()
+
+        if hit is not None:
+            metrics.incr(f"cache.{namespace}.hits")
+            return json.loads(hit)
+
+        metrics.incr(f"cache.{namespace}.misses")
+        value = build()
+        try:
+            self.backend.set(key, json.dumps(value).encode(), ex=self.ttl)
+        except Exception as e:
+            current_app.logger.warning("Cache write failed for %s: %s", scope, e)
+            metrics.incr("cache.errors")
+        return value
+
+    def invalidate(self, users=(), items=()):
+        """Drop every entry of the given users' and items' scopes"""
+        keys = [f"{self.prefix}:gen:user:{user_id}" for user_id in users]
+        keys += [f"{self.prefix}:gen:item:{item_id}" for item_id in items]
+        if not keys or not self.ttl:
+            return
+        try:
+            self.backend.delete(*keys)
+            metrics.incr("cache.invalidations", len(keys))
+        except Exception as e:
+            current_app.logger.error("Cache invalidation failed for %d scopes: %s", len(keys), e)
+            metrics.incr("cache.errors")
+
+
+def init_cache(app):
+    """Attach the app's ResponseCache: Redis when CACHE_URL is set, otherwise an in-process LRU"""
+    url = app.config.get("CACHE_URL")
+    if url:
+        import redis
+
+        backend = redis.Redis.from_url(url)
+    else:
+        backend = LRUBackend(max_entries=app.config.get("CACHE_MAX_ENTRIES", 10000))
+    app.extensions["response_cache"] = ResponseCache(backend, ttl=app.config.get("CACHE_TTL", 300))
+
+
+def get_response_cache(app=None) -> ResponseCache:
+    return (app or current_app).extensions["response_cache"]
+
+
+def mark_stale(users=(), items=()):
+    """Invalidate the users' and items' cache scopes once the current transaction commits.
+
+    An item's scope also covers the dashboards of every user tracking it. Nothing is
+    dropped if the transaction rolls back, and a read racing the commit can only cache
+    data under the token that is about to be dropped.
+    """
+    cache = current_app.extensions.get("response_cache")
+    if cache is None or not cache.ttl:
+        return
+
+    pending = db.session.info.setdefault("cache_stale", {"users": set(), "items": set()})
+    pending["users"].update(users)
+    pending["items"].update(items)
+
+
+@event.listens_for(Session, "before_commit")
+def _resolve_stale_items(session):
+    """Add the users tracking the stale items while the transaction can still query"""
+    pending = session.info.get("cache_stale")
+    if not pending or not pending["items"]:
+        return
+
+    for item_ids in chunked(sorted(pending["items"]), 500):
+        pending["users"].update(session.scalars(select(UserItem.user_id).where(UserItem.item_id.in_(item_ids))))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale(session):
+    pending = session.info.pop("cache_stale", None)
+    if pending and has_app_context() and "response_cache" in current_app.extensions:
+        get_response_cache().invalidate(users=pending["users"], items=pending["items"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session):
+    session.info.pop("cache_stale", None)
@@ -1,4 +1,5 @@
 import click
+from datetime import timedelta
 from flask.cli import with_appcontext
 from ptracker.extensions import db
 from ptracker.models import User
@@ -7,6 +8,29 @@ from werkzeug.security import generate_password_hash
 test_password = "abc123"
 
 
+class Duration(click.ParamType):
+    """A number of hours, days or weeks, written 12h, 180d or 26w"""
+
+    name = "duration"
+    UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, timedelta):
+            return value
+        number, unit = value[:-1], value[-1:].lower()
+        if unit not in self.UNITS or not number.isdigit():
+            self.fail(f"{value!r} is not a duration like 180d, 26w or 12h", param, ctx)
+        return timedelta(**{self.UNITS[unit]: int(number)})
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db():
+    """Create any missing tables"""
+    db.create_all()
+    click.echo("Database initialized!")
+
+
 @click.command("seed-db")
 @with_appcontext
 def seed_db():
@@ -43,6 +67,118 @@ def update_items():
     """Update items in the database"""
     from ptracker.price_tracking.service import PriceTrackerService
 
+    from ptracker.metrics import metrics
+
     price_service = PriceTrackerService()
     price_service.check_price_change_and_notify_all()
-    click.echo("Items updated + notifications processed!")
+    click.echo("Items updated + notifications queued!")
+
+    usage = metrics.snapshot("datasource.")
+    for name, value in sorted({**usage["counters"], **usage["gauges"]}.items()):
+        click.echo(f"  {name}: {value:g}")
+
+
+@click.command("backfill-price-changes")
+@with_appcontext
+def backfill_price_changes():
+    """Populate items' previous price and price change from their price history"""
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    count = PriceTrackerService().backfill_price_changes()
+    click.echo(f"Backfilled price changes for {count} items!")
+
+
+@click.command("rebuild-daily-stats")
+@with_appcontext
+def rebuild_daily_stats():
+    """Regenerate the per-item daily price rollup from the price history"""
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    rows, items = PriceTrackerService().rebuild_daily_stats()
+    click.echo(f"Rebuilt {rows} daily stats rows for {items} items")
+
+
+@click.command("compact-price-history")
+@with_appcontext
+def compact_price_history():
+    """Collapse repeated prices in the history into change-only rows (HISTORY_CHANGE_ONLY)"""
+    from flask import current_app
+
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    if not current_app.config.get("HISTORY_CHANGE_ONLY"):
+        raise click.ClickException("Set HISTORY_CHANGE_ONLY=true first, compacting is for change-only storage")
+    rows, items = PriceTrackerService().compact_history()
+    click.echo(f"Removed {rows} repeated price history rows for {items} items")
+
+
+@click.command("archive-history")
+@click.option("--older-than", type=Duration(), default="180d", show_default=True, help="Age of the rows to move")
+@with_appcontext
+def archive_history(older_than):
+    """Move old price history into the columnar archive (HISTORY_ARCHIVE_DIR)"""
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    rows, items = PriceTrackerService().archive_history(older_than)
+    click.echo(f"Archived {rows} price history rows for {items} items")
+
+
+@click.command("backfill-archived-extremes")
+@with_appcontext
+def backfill_archived_extremes():
+    """Populate items' archived low / high price from the history archive"""
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    count = PriceTrackerService().backfill_archived_extremes()
+    click.echo(f"Backfilled archived extremes for {count} items")
+
+
+@click.command("dispatch-notifications")
+@click.option("--burst", is_flag=True, help="Exit once nothing is due instead of polling")
+@click.option("--retry-dead", is_flag=True, help="Requeue dead-lettered notifications first")
+@with_appcontext
+def dispatch_notifications(burst, retry_dead):
+    """Deliver queued notifications from the outbox"""
+    from flask import current_app
+    from ptracker.outbox import OutboxDispatcher
+
+    config = current_app.config
+    dispatcher = OutboxDispatcher(
+        concurrency=config.get("OUTBOX_CONCURRENCY", 4),
+        batch_size=config.get("OUTBOX_BATCH_SIZE", 100),
+        max_attempts=config.get("OUTBOX_MAX_ATTEMPTS", 5),
+        retry_delay=config.get("OUTBOX_RETRY_DELAY", 60),
+        lease_seconds=config.get("OUTBOX_LEASE_SECONDS", 120),
+    )
+    if retry_dead:
+        click.echo(f"Requeued {dispatcher.retry_dead()} dead-lettered notifications")
+
+    try:
+        handled = dispatcher.run(poll_interval=config.get("OUTBOX_POLL_INTERVAL", 2.0), burst=burst)
+    except KeyboardInterrupt:
+        return
+    click.echo(f"Dispatched {handled} notifications")
+
+
+@click.command("run-worker")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty instead of polling")
+@click.option("--worker-id", default=None, help="Name recorded on leased jobs (default host:pid)")
+@click.option("--max-jobs", type=int, default=None, help="Exit after this many jobs")
+@with_appcontext
+def run_worker(burst, worker_id, max_jobs):
+    """Process background jobs. Start several to share sharded refreshes."""
+    from flask import current_app
+    from ptracker.jobs import HANDLERS, Worker, get_job_queue
+
+    worker = Worker(
+        get_job_queue(current_app),
+        HANDLERS,
+        worker_id=worker_id,
+        poll_interval=current_app.config.get("WORKER_POLL_INTERVAL", 5.0),
+    )
+    click.echo(f"Worker {worker.worker_id} started")
+    try:
+        processed = worker.run(burst=burst, max_jobs=max_jobs)
+    except KeyboardInterrupt:
+        processed = None
+    click.echo(f"Worker {worker.worker_id} stopped" + (f" after {processed} jobs" if processed is not None else ""))
@@ -7,6 +7,7 @@ from .base import (
 )
 from .mock import MockDataSource
 from .ebay import EbayDataSource
+from .scheduler import QuotaExceededError, RequestScheduler, ScheduledDataSource, TokenBucket
 
 
 class DataSourceFactory:
@@ -33,17 +34,46 @@ class DataSourceFactory:
         raise ValueError(f"Could not detect vendor from URL: {url}")
 
 
+def _scheduled(app, source: DataSource) -> DataSource:
+    """Route the source's requests through a scheduler if its vendor has rate limits configured"""
+    limits = app.config.get("DATASOURCE_RATE_LIMITS", {}).get(source.vendor_name)
+    if not limits:
+        return source
+
+    scheduler = RequestScheduler(
+        source.vendor_name,
+        qps=limits["qps"],
+        burst=limits.get("burst"),
+        daily_quota=limits.get("daily_quota"),
+        max_retries=app.config.get("DATASOURCE_MAX_RETRIES", 3),
+    )
+    return ScheduledDataSource(source, scheduler)
+
+
 # Initialize available sources
 def init_datasources(app):
     """Initialize data sources with config"""
     # Always available for testing
-    DataSourceFactory.register("mock", MockDataSource())
+    DataSourceFactory.register("mock", _scheduled(app, MockDataSource()))
 
     ebay_key = app.config.get("EBAY_CLIENT_ID")
     ebay_secret = app.config.get("EBAY_CLIENT_SECRET")
 
     if ebay_key and ebay_secret:
-        DataSourceFactory.register("ebay", EbayDataSource(api_key=ebay_key, api_secret=ebay_secret))
+        DataSourceFactory.register(
+            "ebay",
+            _scheduled(
+                app,
+                EbayDataSource(
+                    api_key=ebay_key,
+                    api_secret=ebay_secret,
+                    pool_size=app.config.get("EBAY_POOL_SIZE", 10),
+                    connect_timeout=app.config.get("EBAY_CONNECT_TIMEOUT", 3.05),
+                    read_timeout=app.config.get("EBAY_READ_TIMEOUT", 10.0),
+                    keep_alive=app.config.get("EBAY_KEEP_ALIVE", True),
+                ),
+            ),
+        )
     else:
         missing = []
         if not ebay_key:
@@ -62,7 +92,11 @@ __all__ = [
     "DataSourceError",
     "ProductNotFoundError",
     "RateLimitError",
+    "QuotaExceededError",
     "DataSourceFactory",
+    "RequestScheduler",
+    "ScheduledDataSource",
+    "TokenBucket",
     "MockDataSource",
     "EbayDataSource",
     "init_datasources",
@@ -1,8 +1,16 @@
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
 
+def chunked(items: list, size: int):
+    """Yield consecutive slices of `items` holding at most `size` elements"""
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
 @dataclass
 class ProductSnapshot:
     """Standardized product data format - all sources must return this format"""
@@ -25,6 +33,9 @@ class ProductSnapshot:
 class DataSource(ABC):
     """Interface for all product data sources"""
 
+    # Largest number of identifiers the vendor accepts in one batch request
+    max_batch_size: int = 1
+
     @property
     @abstractmethod
     def vendor_name(self) -> str:
@@ -49,6 +60,40 @@ class DataSource(ABC):
 
         pass
 
+    async def fetch_product_async(self, identifier: str) -> ProductSnapshot:
+        """
+        Async variant of `fetch_product`, raising the same errors
+
+        The default implementation runs `fetch_product` on a thread, so the
+        event loop isn't blocked. Sources with a non-blocking client should
+        override it.
+        """
+
+        return await asyncio.to_thread(self.fetch_product, identifier)
+
+    def fetch_products(self, identifiers: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        """
+        Fetch several products at once
+
+        The default implementation falls back to one `fetch_product` call per
+        identifier. Sources with a bulk endpoint should override it.
+
+        Args:
+            identifiers: Vendor's external product IDs
+
+        Returns:
+            Mapping of identifier to its ProductSnapshot, or to the DataSourceError
+            raised for that identifier. Every requested identifier is present.
+        """
+
+        results = {}
+        for identifier in identifiers:
+            try:
+                results[identifier] = self.fetch_product(identifier)
+            except DataSourceError as e:
+                results[identifier] = e
+        return results
+
     @abstractmethod
     def validate_url(self, url: str) -> bool:
         pass
@@ -78,6 +123,14 @@ class DataSource(ABC):
         product_id = self.extract_product_id(url)
         return self.fetch_product(product_id)
 
+    async def fetch_from_url_async(self, url: str) -> ProductSnapshot:
+
+        if not self.validate_url(url):
+            raise ValueError(f"Invalid URL for vendor {self.vendor_name}: {url}")
+
+        product_id = self.extract_product_id(url)
+        return await self.fetch_product_async(product_id)
+
 
 class DataSourceError(Exception):
     """Base exception for data source errors"""
@@ -94,4 +147,7 @@ class ProductNotFoundError(DataSourceError):
 class RateLimitError(DataSourceError):
     """API rate limit exceeded"""
 
-    pass
+    def __init__(self, message: str = "", retry_after: float | None = None):
+        super().__init__(message)
+        # Seconds the vendor asked us to wait (Retry-After), if it said
+        self.retry_after = retry_after
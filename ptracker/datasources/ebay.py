@@ -1,32 +1,119 @@
+import asyncio
+import httpx
 import requests
+import threading
 import time
 import re
-from .base import DataSource, ProductSnapshot, DataSourceError, ProductNotFoundError, RateLimitError
+import weakref
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from .base import DataSource, ProductSnapshot, DataSourceError, ProductNotFoundError, RateLimitError, chunked
 
 
 class EbayDataSource(DataSource):
     """eBay API data source"""
 
-    _TOKEN_URL = "https://api.ebay.com/identity/v1/oauth2/token"
-    _ITEM_URL = "https://api.ebay.com/buy/browse/v1/item/{}"
+    _BASE_URL = "https://api.ebay.com"
+    _TOKEN_PATH = "/identity/v1/oauth2/token"
+    _ITEM_PATH = "/buy/browse/v1/item/{}"
+    _ITEMS_PATH = "/buy/browse/v1/item/"
 
-    def __init__(self, api_key: str, api_secret: str):
+    # Browse API getItems accepts up to 20 item IDs per call
+    max_batch_size = 20
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        keep_alive: bool = True,
+        base_url: str = _BASE_URL,
+    ):
+        """
+        Args:
+            api_key (str): eBay application client ID
+            api_secret (str): eBay application client secret
+            pool_size (int, optional): Connections kept open to the API, should cover the refresh concurrency.
+                Defaults to 10.
+            connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 3.05.
+            read_timeout (float, optional): Seconds to wait for a response. Defaults to 10.0.
+            keep_alive (bool, optional): Reuse connections between requests. Defaults to True.
+            base_url (str, optional): API root, overridable for local stub servers. Defaults to the production API.
+        """
         self.api_key = api_key
         self.api_secret = api_secret
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        # A single session is shared by all refresh worker threads. The adapter's
+        # urllib3 pool is thread-safe, and nothing mutates the session after this.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        if not keep_alive:
+            self._session.headers["Connection"] = "close"
+
+        # Async clients can't be shared between event loops: each loop gets its own on first use
+        self._async_limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size if keep_alive else 0
+        )
+        self._async_clients = weakref.WeakKeyDictionary()
 
         self._access_token = None
         self._token_expires_at = 0
+        self._token_lock = threading.Lock()
 
     @property
     def vendor_name(self) -> str:
         return "ebay"
 
-    def _get_token(self) -> str:
-        if self._access_token and time.time() < self._token_expires_at:
-            return self._access_token
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        try:
+            return self._session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise DataSourceError(f"eBay request failed: {e}") from e
+
+    async def _client(self) -> tuple[httpx.AsyncClient, asyncio.Lock]:
+        """The running event loop's async client and token lock, created on first use.
+
+        The client is closed when its loop shuts down: asyncio.run (and servers like
+        uvicorn) finalize the async generators started on the loop before closing it,
+        `_closed_on_shutdown` among them.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]), limits=self._async_limits
+            )
+            lifetime = self._closed_on_shutdown(client)
+            entry = self._async_clients[loop] = (client, asyncio.Lock(), lifetime)
+            await anext(lifetime)
+        return entry[:2]
+
+    @staticmethod
+    async def _closed_on_shutdown(client: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    async def _request_async(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client, _ = await self._client()
+        try:
+            return await client.request(method, self.base_url + path, **kwargs)
+        except httpx.HTTPError as e:
+            raise DataSourceError(f"eBay request failed: {e}") from e
 
-        response = requests.post(
-            self._TOKEN_URL,
+    def _token_valid(self) -> bool:
+        return bool(self._access_token) and time.time() < self._token_expires_at
+
+    def _token_request(self) -> dict:
+        return dict(
             auth=(self.api_key, self.api_secret),
             data={
                 "grant_type": "client_credentials",
@@ -35,6 +122,7 @@ class EbayDataSource(DataSource):
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
 
+    def _store_token(self, response) -> str:
         if response.status_code != 200:
             raise DataSourceError(f"ebay auth failed!: {response.text}")
 
@@ -43,9 +131,55 @@ class EbayDataSource(DataSource):
         self._token_expires_at = time.time() + data["expires_in"] - 60
         return self._access_token
 
+    def _get_token(self) -> str:
+        if self._token_valid():
+            return self._access_token
+
+        # Only one thread refreshes an expired token, the others wait and reuse it
+        with self._token_lock:
+            if self._token_valid():
+                return self._access_token
+            return self._store_token(self._request("POST", self._TOKEN_PATH, **self._token_request()))
+
+    async def _get_token_async(self) -> str:
+        if self._token_valid():
+            return self._access_token
+
+        # Same as `_get_token`, for the coroutines of one event loop (the lock is the loop's too)
+        _, token_lock = await self._client()
+        async with token_lock:
+            if self._token_valid():
+                return self._access_token
+            return self._store_token(await self._request_async("POST", self._TOKEN_PATH, **self._token_request()))
+
+    def close(self):
+        """Close pooled connections"""
+        self._session.close()
+
     def _to_rest_id(self, legacy_id: str) -> str:
         return f"v1|{legacy_id}|0"
 
+    def _headers(self, token: str | None = None) -> dict:
+        return {
+            "Authorization": f"Bearer {token or self._get_token()}",
+            "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
+        }
+
+    @staticmethod
+    def _retry_after(response) -> float | None:
+        """Parse a Retry-After header given either in seconds or as an HTTP date"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
     def validate_url(self, url: str) -> bool:
         """Check if URL is a valid eBay product page"""
         ebay_patterns = [
@@ -71,22 +205,61 @@ class EbayDataSource(DataSource):
 
         rest_id = self._to_rest_id(identifier)
 
-        headers = {
-            "Authorization": f"Bearer {self._get_token()}",
-            "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
-        }
+        response = self._request("GET", self._ITEM_PATH.format(rest_id), headers=self._headers())
+        return self._item_snapshot(response)
+
+    async def fetch_product_async(self, identifier: str) -> ProductSnapshot:
+        """Fetch product from eBay API with the async client, without blocking the event loop"""
 
-        url = self._ITEM_URL.format(rest_id)
-        response = requests.get(url, headers=headers)
+        rest_id = self._to_rest_id(identifier)
 
+        headers = self._headers(await self._get_token_async())
+        response = await self._request_async("GET", self._ITEM_PATH.format(rest_id), headers=headers)
+        return self._item_snapshot(response)
+
+    def _item_snapshot(self, response) -> ProductSnapshot:
+        """Snapshot from a getItem response, either requests' or httpx'"""
         if response.status_code == 404:
             raise ProductNotFoundError("Item not found on ebay")
         if response.status_code == 429:
-            raise RateLimitError("eBay API rate limit exceeded")
+            raise RateLimitError("eBay API rate limit exceeded", self._retry_after(response))
         if response.status_code != 200:
             raise DataSourceError(f"eBay API error: {response.text}")
 
-        data = response.json()
+        return self._to_snapshot(response.json())
+
+    def fetch_products(self, identifiers: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        """Fetch products in chunks of 20 using the Browse API getItems endpoint"""
+        results = {}
+        for chunk in chunked(identifiers, self.max_batch_size):
+            try:
+                results.update(self._fetch_chunk(chunk))
+            except DataSourceError as e:
+                results.update({identifier: e for identifier in chunk})
+        return results
+
+    def _fetch_chunk(self, identifiers: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        params = {"item_ids": ",".join(self._to_rest_id(identifier) for identifier in identifiers)}
+        response = self._request("GET", self._ITEMS_PATH, headers=self._headers(), params=params)
+
+        if response.status_code == 429:
+            raise RateLimitError("eBay API rate limit exceeded", self._retry_after(response))
+        # getItems answers 404 when none of the requested items exist
+        if response.status_code not in (200, 404):
+            raise DataSourceError(f"eBay API error: {response.text}")
+
+        data = response.json() if response.status_code == 200 else {}
+        found = {}
+        for item in data.get("items", []):
+            snapshot = self._to_snapshot(item)
+            found[snapshot.external_id] = snapshot
+
+        return {
+            identifier: found.get(identifier) or ProductNotFoundError("Item not found on ebay")
+            for identifier in identifiers
+        }
+
+    def _to_snapshot(self, data: dict) -> ProductSnapshot:
         avail = data.get("estimatedAvailabilities", [{}])[0]
         in_stock = (
             avail.get("estimatedAvailabilityStatus") == "IN_STOCK" and avail.get("estimatedRemainingQuantity", 0) > 0
@@ -1,9 +1,20 @@
+import asyncio
 import re
+import time
 from .base import DataSource, ProductSnapshot
 
 
 class MockDataSource(DataSource):
 
+    max_batch_size = 20
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency (float, optional): Seconds to sleep per request, simulating a remote API. Defaults to 0.0.
+        """
+        self.latency = latency
+
     @property
     def vendor_name(self) -> str:
         return "mock"
@@ -25,6 +36,25 @@ class MockDataSource(DataSource):
         raise ValueError(f"Invalid mock URL format: {url}")
 
     def fetch_product(self, identifier: str) -> ProductSnapshot:
+        if self.latency:
+            time.sleep(self.latency)
+
+        return self._build_snapshot(identifier)
+
+    async def fetch_product_async(self, identifier: str) -> ProductSnapshot:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return self._build_snapshot(identifier)
+
+    def fetch_products(self, identifiers: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        """Batch path: one simulated round-trip per call, like a real bulk endpoint"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        return {identifier: self._build_snapshot(identifier) for identifier in identifiers}
+
+    def _build_snapshot(self, identifier: str) -> ProductSnapshot:
         base_price = 99.99
 
         return ProductSnapshot(
@@ -0,0 +1,215 @@
+"""Per-vendor request scheduling: token bucket pacing, daily quota and 429 backoff"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from ptracker.metrics import metrics
+from .base import DataSource, ProductSnapshot, RateLimitError, chunked
+
+
+class QuotaExceededError(RateLimitError):
+    """The vendor's daily request quota is used up"""
+
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket, refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds the caller must wait before using it.
+
+        Tokens may go negative, so concurrent callers queue up behind each other
+        instead of all waking at the same instant.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RequestScheduler:
+    """Paces every request to one vendor.
+
+    - QPS and burst are enforced with a token bucket shared by all threads
+    - A daily (UTC) quota stops requests before the vendor starts refusing them
+    - A RateLimitError pauses the whole vendor for its Retry-After, or for an
+      exponential backoff with jitter, and the request is requeued
+    """
+
+    def __init__(
+        self,
+        vendor: str,
+        qps: float,
+        burst: int | None = None,
+        daily_quota: int | None = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        async_sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.vendor = vendor
+        self.daily_quota = daily_quota
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._bucket = TokenBucket(qps, burst, clock=clock)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._quota_day = None
+        self._quota_used = 0
+
+    def _metric(self, name: str) -> str:
+        return f"datasource.{self.vendor}.{name}"
+
+    def _take_quota(self):
+        if self.daily_quota is None:
+            return
+
+        with self._lock:
+            today = datetime.now(timezone.utc).date()
+            if today != self._quota_day:
+                self._quota_day = today
+                self._quota_used = 0
+            if self._quota_used >= self.daily_quota:
+                metrics.incr(self._metric("quota_rejected"))
+                raise QuotaExceededError(f"{self.vendor} daily quota of {self.daily_quota} requests used up")
+            self._quota_used += 1
+            used = self._quota_used
+
+        metrics.gauge(self._metric("quota_used"), used)
+        metrics.gauge(self._metric("quota_remaining"), self.daily_quota - used)
+
+    def _reserve(self) -> float:
+        """Take a request slot and return how many seconds to wait before using it"""
+        self._take_quota()
+        wait = self._bucket.reserve()
+        with self._lock:
+            wait = max(wait, self._paused_until - self._clock())
+
+        metrics.observe(self._metric("wait_seconds"), max(wait, 0.0))
+        return wait
+
+    def _acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    async def _acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await self._async_sleep(wait)
+
+    def _pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with equal jitter for the given (0-based) retry attempt"""
+        cap = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run `fn` once a request slot is available, retrying on RateLimitError.
+
+        Raises:
+            QuotaExceededError: If the daily quota is used up
+            RateLimitError: If the vendor still throttles after `max_retries` retries
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            metrics.incr(self._metric("requests"))
+            try:
+                return fn(*args, **kwargs)
+            except QuotaExceededError:
+                raise
+            except RateLimitError as e:
+                self._throttled(e, attempt)
+
+    async def call_async(self, fn: Callable[..., Awaitable], *args, **kwargs):
+        """Like `call`, awaiting the coroutine function `fn` and the wait for its request slot"""
+        for attempt in range(self.max_retries + 1):
+            await self._acquire_async()
+            metrics.incr(self._metric("requests"))
+            try:
+                return await fn(*args, **kwargs)
+            except QuotaExceededError:
+                raise
+            except RateLimitError as e:
+                self._throttled(e, attempt)
+
+    def _throttled(self, error: RateLimitError, attempt: int):
+        """Pause the vendor before the retry of a throttled request, or raise `error` if out of retries"""
+        metrics.incr(self._metric("throttled"))
+        if attempt == self.max_retries:
+            raise error
+
+        delay = error.retry_after if error.retry_after is not None else self.backoff(attempt)
+        metrics.incr(self._metric("retries"))
+        self._pause(delay)
+
+
+class ScheduledDataSource(DataSource):
+    """Wraps a data source so every vendor request goes through its scheduler"""
+
+    def __init__(self, source: DataSource, scheduler: RequestScheduler):
+        self.source = source
+        self.scheduler = scheduler
+
+    @property
+    def vendor_name(self) -> str:
+        return self.source.vendor_name
+
+    @property
+    def max_batch_size(self) -> int:
+        return self.source.max_batch_size
+
+    def validate_url(self, url: str) -> bool:
+        return self.source.validate_url(url)
+
+    def extract_product_id(self, url: str) -> str:
+        return self.source.extract_product_id(url)
+
+    def fetch_product(self, identifier: str) -> ProductSnapshot:
+        return self.scheduler.call(self.source.fetch_product, identifier)
+
+    async def fetch_product_async(self, identifier: str) -> ProductSnapshot:
+        return await self.scheduler.call_async(self.source.fetch_product_async, identifier)
+
+    def fetch_products(self, identifiers: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        results = {}
+        for chunk in chunked(identifiers, self.max_batch_size):
+            try:
+                results.update(self.scheduler.call(self._fetch_chunk, chunk))
+            except RateLimitError as e:
+                results.update({identifier: e for identifier in chunk})
+        return results
+
+    def _fetch_chunk(self, chunk: list[str]) -> dict[str, ProductSnapshot | Exception]:
+        results = self.source.fetch_products(chunk)
+        # Batch sources report a throttled request per identifier, surface it so it is retried
+        for result in results.values():
+            if isinstance(result, RateLimitError):
+                raise result
+        return results
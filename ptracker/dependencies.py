@@ -1,16 +1,75 @@
 """Dependency injection setup for services"""
 
-from flask import g
+import threading
+from typing import Any, Callable
+
+from flask import current_app
+from flask.ctx import _AppCtxGlobals
+
+
+class ServiceRegistry:
+    """App-scoped services, each built on first use and then shared by every request of the process.
+
+    Services hold no per-request state: anything a request owns (the database
+    session, the logged in user, config) is reached through Flask's context
+    when a method runs, so one instance serves every request and thread.
+    """
+
+    def __init__(self):
+        self._factories: dict[str, Callable[[], Any]] = {}
+        self._instances: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._factories[name] = factory
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str) -> Any:
+        service = self._instances.get(name)
+        if service is None:
+            with self._lock:
+                service = self._instances.get(name)
+                if service is None:
+                    service = self._instances[name] = self._factories[name]()
+        return service
+
+
+class ServiceGlobals(_AppCtxGlobals):
+    """`g` that resolves registered service names (`g.price_service`, ...) from the app's registry.
+
+    A service is looked up on its first access in a context and then kept on `g`,
+    so requests that never use one pay nothing for it.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            pass
+        registry = current_app.extensions.get("services")
+        if registry is None or name not in registry:
+            raise AttributeError(name)
+        service = self.__dict__[name] = registry.get(name)
+        return service
+
+
+def _job_queue():
+    from ptracker.jobs import get_job_queue
+
+    return get_job_queue(current_app)
 
 
 def init_services(app):
-    """Initialize service dependency injection via Flask g"""
+    """Register the services and expose them lazily on `g`"""
+    from ptracker.auth.service import AuthService
+    from ptracker.price_tracking.service import PriceTrackerService
 
-    @app.before_request
-    def setup_services():
-        """Create service instances for each request"""
-        from ptracker.auth.service import AuthService
-        from ptracker.price_tracking.service import PriceTrackerService
+    registry = ServiceRegistry()
+    registry.register("auth_service", AuthService)
+    registry.register("price_service", PriceTrackerService)
+    registry.register("job_queue", _job_queue)
 
-        g.auth_service = AuthService()
-        g.price_service = PriceTrackerService()
+    app.extensions["services"] = registry
+    app.app_ctx_globals_class = ServiceGlobals
@@ -1,8 +1,12 @@
 """Flask extensions initialization"""
 
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -10,3 +14,12 @@ login_manager = LoginManager()
 
 # Configure login manager
 login_manager.login_view = "auth.login_page"
+
+
+# pysqlite only starts a transaction before a write, so a SAVEPOINT issued first
+# would open its own and releasing it would commit. Start the transaction then.
+@event.listens_for(Engine, "savepoint")
+def _sqlite_savepoint(conn, name):
+    dbapi_connection = conn.connection.dbapi_connection
+    if isinstance(dbapi_connection, sqlite3.Connection) and not dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
@@ -0,0 +1,18 @@
+from .queue import JobQueue
+from .worker import Worker
+from .handlers import HANDLERS
+
+
+def get_job_queue(app) -> JobQueue:
+    return JobQueue(
+        lease_seconds=app.config.get("JOB_LEASE_SECONDS", 300),
+        retry_delay=app.config.get("JOB_RETRY_DELAY", 30),
+    )
+
+
+__all__ = [
+    "JobQueue",
+    "Worker",
+    "HANDLERS",
+    "get_job_queue",
+]
@@ -0,0 +1,17 @@
+from ptracker.models import Job
+
+
+def refresh_items(job: Job, progress) -> dict:
+    """Refresh stale tracked items and send price alerts, for one shard if the job has one"""
+    from ptracker.price_tracking.service import PriceTrackerService
+
+    shard = (job.payload["shard"], job.payload["shard_count"]) if "shard" in job.payload else None
+    stats = PriceTrackerService().check_price_change_and_notify_all(
+        shard=shard, on_progress=lambda stats: progress(stats.updated + stats.failed, stats.total)
+    )
+    return {"total": stats.total, "updated": stats.updated, "failed": stats.failed}
+
+
+HANDLERS = {
+    "refresh_items": refresh_items,
+}
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from werkzeug.exceptions import NotFound
+
+from ptracker.extensions import db
+from ptracker.models import Job, JobRequester
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _utcnow() -> datetime:
+    # Job timestamps are stored as naive UTC so they compare the same on SQLite and Postgres
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """Durable job queue backed by the `job` table.
+
+    Workers lease a job for `lease_seconds` and extend the lease whenever they
+    report progress. A job whose lease runs out (its worker died) becomes
+    visible to other workers again until it runs out of attempts. On Postgres,
+    concurrent workers skip rows another worker has locked (SKIP LOCKED); on
+    every database the lease is taken with a conditional UPDATE, so two workers
+    can never run the same attempt.
+    """
+
+    def __init__(self, lease_seconds: int = 300, retry_delay: int = 30):
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict | None = None,
+        shards: int = 1,
+        max_attempts: int = 3,
+        dedupe: bool = False,
+        requested_by: int | None = None,
+    ) -> Job:
+        """Add a job, split into `shards` child jobs when shards > 1.
+
+        Each child's payload gets `shard` (its index) and `shard_count`.
+        With `dedupe`, an unfinished top-level job of the same kind is returned
+        instead of queueing another one. `requested_by` (a user id) is recorded
+        as a requester of the job, the new or the returned one.
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+
+        if dedupe:
+            existing = (
+                db.session.query(Job)
+                .filter(Job.kind == kind, Job.parent_id.is_(None), Job.status.in_(ACTIVE_STATUSES))
+                .order_by(Job.id)
+                .first()
+            )
+            if existing:
+                if requested_by is not None:
+                    db.session.merge(JobRequester(job_id=existing.id, user_id=requested_by))
+                    db.session.commit()
+                return existing
+
+        payload = payload or {}
+        job = Job(kind=kind, payload=payload, shards=shards, max_attempts=max_attempts, run_after=_utcnow())
+        db.session.add(job)
+        if requested_by is not None:
+            job.requesters = [JobRequester(user_id=requested_by)]
+        if shards > 1:
+            job.children = [
+                Job(
+                    kind=kind,
+                    payload={**payload, "shard": index, "shard_count": shards},
+                    max_attempts=max_attempts,
+                    run_after=_utcnow(),
+                )
+                for index in range(shards)
+            ]
+        db.session.commit()
+        return job
+
+    def lease(self, worker_id: str, kinds: list[str] | None = None) -> Job | None:
+        """Lease the oldest runnable job, or return None when there is nothing to do"""
+        while True:
+            now = _utcnow()
+            query = (
+                select(Job.id, Job.status, Job.attempts, Job.max_attempts, Job.lease_expires_at)
+                .where(
+                    Job.shards == 1,
+                    or_(
+                        and_(Job.status == "queued", Job.run_after <= now),
+                        and_(Job.status == "running", Job.lease_expires_at < now),
+                    ),
+                )
+                .order_by(Job.run_after, Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if kinds is not None:
+                query = query.where(Job.kind.in_(kinds))
+
+            candidate = db.session.execute(query).first()
+            if candidate is None:
+                db.session.commit()
+                return None
+
+            if candidate.status == "running" and candidate.attempts >= candidate.max_attempts:
+                # Its worker died on the last attempt
+                self._finish(db.session.get(Job, candidate.id), "failed", error="Lease expired")
+                continue
+
+            claimed = db.session.execute(
+                update(Job)
+                .where(
+                    Job.id == candidate.id,
+                    Job.status == candidate.status,
+                    Job.attempts == candidate.attempts,
+                )
+                .values(
+                    status="running",
+                    attempts=Job.attempts + 1,
+                    leased_by=worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    started_at=now,
+                )
+            )
+            db.session.commit()
+            if claimed.rowcount == 1:
+                return db.session.get(Job, candidate.id)
+            # Another worker won the race, try the next job
+
+    def report_progress(self, job: Job, done: int, total: int | None = None):
+        """Record progress and extend the lease, leaving the job's own work uncommitted.
+
+        A handler's writes commit together when it's done (a refresh commits its
+        price updates with the alerts they trigger), so progress is written on a
+        connection of its own. SQLite allows one writer at a time, and an in-memory
+        database only has one connection, so there it stays in the session and is
+        committed with the job.
+        """
+        values = {"progress": done, "lease_expires_at": _utcnow() + timedelta(seconds=self.lease_seconds)}
+        if total is not None:
+            values["total"] = total
+
+        if db.engine.dialect.name == "sqlite":
+            for key, value in values.items():
+                setattr(job, key, value)
+            return
+
+        with db.engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == job.id).values(**values))
+        # Already in the database, so the job's own commit doesn't write (and lock) the row again
+        for key, value in values.items():
+            set_committed_value(job, key, value)
+
+    def complete(self, job: Job, result: dict | None = None):
+        self._finish(job, "done", result=result)
+
+    def fail(self, job: Job, error: Exception | str):
+        """Requeue the job with a growing delay, or mark it failed after its last attempt"""
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.error = str(error)
+            job.leased_by = None
+            job.lease_expires_at = None
+            job.run_after = _utcnow() + timedelta(seconds=self.retry_delay * 2 ** (job.attempts - 1))
+            db.session.commit()
+        else:
+            self._finish(job, "failed", error=str(error))
+
+    def _finish(self, job: Job, status: str, result: dict | None = None, error: str | None = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.leased_by = None
+        job.lease_expires_at = None
+        job.finished_at = _utcnow()
+        if job.parent:
+            self._sync_group(job.parent)
+        db.session.commit()
+
+    @staticmethod
+    def _group_status(group: Job) -> str:
+        statuses = {child.status for child in group.children}
+        if statuses <= {"done", "failed"}:
+            return "failed" if "failed" in statuses else "done"
+        return "queued" if statuses == {"queued"} else "running"
+
+    def _sync_group(self, group: Job):
+        group.status = self._group_status(group)
+        group.progress = sum(child.progress for child in group.children)
+        if group.status in ("done", "failed"):
+            group.finished_at = _utcnow()
+
+    def get_status(self, job_id: int, requested_by: int | None = None) -> dict:
+        """Job status and progress; a group reports the combined progress of its shards.
+
+        With `requested_by` (a user id), only a job that user queued is found.
+
+        Raises:
+            NotFound: If there is no such job
+        """
+        job = db.session.get(Job, job_id)
+        if not job or (requested_by is not None and not db.session.get(JobRequester, (job_id, requested_by))):
+            raise NotFound(f"No job with id: {job_id}")
+
+        status = {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "total": job.total,
+            "attempts": job.attempts,
+            "error": job.error,
+            "result": job.result,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "shards": [],
+        }
+        if job.children:
+            totals = [child.total for child in job.children]
+            status.update(
+                status=self._group_status(job),
+                progress=sum(child.progress for child in job.children),
+                total=sum(totals) if None not in totals else None,
+                shards=[self.get_status(child.id) for child in job.children],
+            )
+        return status
@@ -0,0 +1,81 @@
+import os
+import socket
+import time
+from typing import Callable
+
+from flask import current_app
+
+from ptracker.extensions import db
+from ptracker.models import Job
+from .queue import JobQueue
+
+# A handler runs one job. It receives the job and a `progress(done, total)`
+# callback, and may return a JSON-serialisable result.
+Handler = Callable[[Job, Callable[[int, int | None], None]], dict | None]
+
+
+class Worker:
+    """Leases jobs from the queue and runs their handlers, one job at a time"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: dict[str, Handler],
+        worker_id: str | None = None,
+        poll_interval: float = 5.0,
+        progress_interval: float = 2.0,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+
+    def run_once(self) -> bool:
+        """Run the next job if there is one. Returns False when the queue is empty."""
+        job = self.queue.lease(self.worker_id, kinds=list(self.handlers))
+        if job is None:
+            return False
+
+        current_app.logger.info("Worker %s running job %s (%s)", self.worker_id, job.id, job.kind)
+        try:
+            result = self.handlers[job.kind](job, self._progress_reporter(job))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception("Job %s failed", job.id)
+            self.queue.fail(job, e)
+        else:
+            self.queue.complete(job, result)
+        return True
+
+    def run(self, burst: bool = False, max_jobs: int | None = None) -> int:
+        """Process jobs until stopped.
+
+        Args:
+            burst (bool, optional): Exit once the queue is empty instead of polling. Defaults to False.
+            max_jobs (int | None, optional): Exit after this many jobs. Defaults to None.
+
+        Returns:
+            int: Number of jobs run
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            if self.run_once():
+                processed += 1
+            elif burst:
+                break
+            else:
+                time.sleep(self.poll_interval)
+        return processed
+
+    def _progress_reporter(self, job: Job) -> Callable[[int, int | None], None]:
+        last_report = 0.0
+
+        def report(done: int, total: int | None = None):
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report >= self.progress_interval or (total is not None and done >= total):
+                last_report = now
+                self.queue.report_progress(job, done, total)
+
+        return report
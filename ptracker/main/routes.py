@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, g, render_template, request
 from flask_login import current_user, login_required
-from ptracker.price_tracking.service import PriceTrackerService
+from ptracker.api.schemas import UserTrackedItemsSchema
+from ptracker.cache import get_response_cache
 
 main_bp = Blueprint("main", __name__)
 
@@ -9,6 +10,10 @@ main_bp = Blueprint("main", __name__)
 @main_bp.route("/home")
 @login_required
 def home_page():
-    service = PriceTrackerService()
-    products = service.get_user_tracked_items(current_user.id)
+    # Cached as plain data, which the template reads like the items themselves
+    products = get_response_cache().cached(
+        f"user:{current_user.id}",
+        "home",
+        lambda: UserTrackedItemsSchema(many=True).dump(g.price_service.get_user_tracked_items(current_user.id)),
+    )
     return render_template("main/home.html", title="Home", products=products, current_path=request.path)
@@ -0,0 +1,56 @@
+"""In-process metrics registry"""
+
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Thread-safe counters, gauges and timing summaries.
+
+    Names are dotted strings such as ``datasource.ebay.requests``. Values live
+    in the current process only; the API exposes them at ``/api/metrics`` and
+    CLI jobs print them when they finish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._timings = {}
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        """Record one duration, summarised as count/total/max"""
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def snapshot(self, prefix: str = "") -> dict:
+        with self._lock:
+            return {
+                "counters": {k: v for k, v in self._counters.items() if k.startswith(prefix)},
+                "gauges": {k: v for k, v in self._gauges.items() if k.startswith(prefix)},
+                "timings": {
+                    k: {**v, "avg": v["total"] / v["count"] if v["count"] else 0.0}
+                    for k, v in self._timings.items()
+                    if k.startswith(prefix)
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -11,6 +11,13 @@ class User(db.Model, UserMixin):
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(Enum("user", "demo", "admin", name="user_role"), nullable=False, default="user")
     notifications_enabled = db.Column(db.Boolean, default=True)
+    # Send each pass's alerts right away, or collect them into an hourly/daily digest
+    notification_mode = db.Column(
+        Enum("immediate", "hourly", "daily", name="notification_mode"),
+        nullable=False,
+        default="immediate",
+        server_default="immediate",
+    )
 
     tracked_items = db.relationship("UserItem", backref="user", lazy=True)
 
@@ -31,6 +38,17 @@ class Item(db.Model):
     in_stock = db.Column(db.Boolean, nullable=True)
     last_fetched = db.Column(db.DateTime, nullable=True)
 
+    # Denormalized from the two latest PriceHistory rows, kept in step by the price service
+    previous_price = db.Column(db.Float, nullable=True)
+    price_change_pct = db.Column(db.Float, nullable=True)
+    price_changed_at = db.Column(db.DateTime, nullable=True)
+
+    # Lowest and highest price moved to the history archive, kept in step by `flask archive-history`
+    archived_low = db.Column(db.Float, nullable=True)
+    archived_high = db.Column(db.Float, nullable=True)
+    # When history already served was rewritten outside a fetch: archived, or its rollup rebuilt
+    history_rewritten_at = db.Column(db.DateTime, nullable=True)
+
     price_history = db.relationship("PriceHistory", backref="item", lazy=True)
 
     __table_args__ = (UniqueConstraint("vendor", "external_id", name="unique_vendor_external_id"),)
@@ -88,11 +106,125 @@ class PriceHistory(db.Model):
     item_id = db.Column(db.Integer, db.ForeignKey("item.id"), nullable=False)
     price = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-
-    # Possible optimization for historical queires
-    # __table_args__ = (
-    #     db.Index("idx_price_history_item_time", "item_id", "timestamp"),
-    # )
+    # Change-only storage (HISTORY_CHANGE_ONLY): the last fetch that saw this price again.
+    # The row then stands for the price from `timestamp` through `last_confirmed_at`.
+    last_confirmed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Serves every "latest/previous price of an item" and per-item history lookup
+        db.Index("idx_price_history_item_time", "item_id", "timestamp"),
+        # Rows are appended in time order, so on Postgres a tiny BRIN index covers
+        # time-range scans (archiving, rollups). Other databases get a regular index.
+        db.Index("brin_price_history_timestamp", "timestamp", postgresql_using="brin"),
+    )
 
     def __repr__(self):
         return f"<PriceHistory id={self.id} item_id={self.item_id} price={self.price} timestamp={self.timestamp}>"
+
+
+class ItemDailyStats(db.Model):
+    """Per-item, per-day OHLC rollup of PriceHistory, kept in step by the price service.
+
+    Every observed price (a new PriceHistory row, or a change-only row being
+    confirmed) is folded into its UTC day. `flask rebuild-daily-stats`
+    regenerates the table from the history.
+    """
+
+    __tablename__ = "item_daily_stats"
+
+    item_id = db.Column(db.Integer, db.ForeignKey("item.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<ItemDailyStats item_id={self.item_id} day={self.day} low={self.low} high={self.high}>"
+
+
+class Job(db.Model):
+    """A unit of background work, leased by `flask run-worker` processes.
+
+    A job split into shards is a group: its children do the work and its
+    status and progress follow theirs.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(Enum("queued", "running", "done", "failed", name="job_status"), nullable=False, default="queued")
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    parent_id = db.Column(db.Integer, db.ForeignKey("job.id"), nullable=True)
+    shards = db.Column(db.Integer, nullable=False, default=1)
+
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    leased_by = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    children = db.relationship("Job", backref=db.backref("parent", remote_side=[id]), lazy=True)
+    requesters = db.relationship("JobRequester", lazy=True, cascade="all, delete-orphan")
+
+    __table_args__ = (db.Index("idx_job_status_run_after", "status", "run_after"),)
+
+    def __repr__(self):
+        return f"<Job id={self.id} kind={self.kind} status={self.status}>"
+
+
+class JobRequester(db.Model):
+    """A user who queued a job, and so may follow its progress.
+
+    A deduplicated job is shared by everyone who asked for it while it was unfinished.
+    """
+
+    __tablename__ = "job_requester"
+
+    job_id = db.Column(db.Integer, db.ForeignKey("job.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+
+
+class NotificationOutbox(db.Model):
+    """Notifications waiting to be delivered by `flask dispatch-notifications`.
+
+    Rows are written in the same transaction as the price update that caused
+    them; `idempotency_key` makes queueing the same alert twice a no-op.
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey("item.id"), nullable=True)
+    kind = db.Column(db.String(50), nullable=False, default="price_alert")
+    recipient = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    idempotency_key = db.Column(db.String(200), nullable=False, unique=True)
+
+    status = db.Column(
+        Enum("pending", "sending", "sent", "dead", name="notification_status"), nullable=False, default="pending"
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    claim_token = db.Column(db.String(36), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("idx_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    def __repr__(self):
+        return f"<NotificationOutbox id={self.id} user_id={self.user_id} kind={self.kind} status={self.status}>"
@@ -1,67 +1,235 @@
+import queue
 import smtplib
 import ssl
+import threading
+import time
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-from dotenv import load_dotenv
-import os
+from config import get_env_value
+from ptracker.metrics import metrics
 
-load_dotenv()
+
+@dataclass
+class _PooledConnection:
+    server: smtplib.SMTP
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP sessions open and sends many messages on each.
+
+    At most `size` sessions are open at once. A session is recycled after
+    `max_messages_per_connection` messages (providers cap messages per
+    session) or `max_idle` seconds unused, and a message whose session the
+    server dropped is retried once on a fresh one.
+    """
+
+    # After a failed login, fail fast for this long instead of hammering the server
+    AUTH_FAILURE_COOLDOWN = 60.0
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        size: int = 2,
+        use_ssl: bool = True,
+        timeout: float = 10.0,
+        max_messages_per_connection: int = 100,
+        max_idle: float = 60.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._auth_error = None
+        self._auth_failed_at = 0.0
+
+    def _open(self) -> _PooledConnection:
+        with self._lock:
+            if self._auth_error and time.monotonic() - self._auth_failed_at < self.AUTH_FAILURE_COOLDOWN:
+                raise self._auth_error
+
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        if self.username:
+            try:
+                server.login(self.username, self.password)
+            except smtplib.SMTPAuthenticationError as e:
+                with self._lock:
+                    self._auth_error, self._auth_failed_at = e, time.monotonic()
+                self._close(_PooledConnection(server))
+                raise
+
+        metrics.incr("notifications.smtp.connections_opened")
+        return _PooledConnection(server)
+
+    @staticmethod
+    def _close(connection: _PooledConnection):
+        try:
+            connection.server.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.server.close()
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - connection.last_used < self.max_idle:
+                return connection
+            self._close(connection)
+
+    def _checkin(self, connection: _PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.sent >= self.max_messages_per_connection:
+            self._close(connection)
+        else:
+            self._idle.put(connection)
+
+    def send(self, sender: str, recipients: list[str], message: str):
+        """Send one message on a pooled session.
+
+        Raises:
+            smtplib.SMTPException: If the server rejects the message or the login
+            OSError: If the server can't be reached
+        """
+        with self._slots:
+            for attempt in range(2):
+                connection = self._checkout()
+                try:
+                    connection.server.sendmail(sender, recipients, message)
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped the session while it sat in the pool
+                    connection.server.close()
+                    if attempt:
+                        raise
+                    continue
+                except smtplib.SMTPException:
+                    # Rejected message, the session itself is still usable
+                    self._checkin(connection)
+                    raise
+                except OSError:
+                    connection.server.close()
+                    if attempt:
+                        raise
+                    continue
+
+                connection.sent += 1
+                self._checkin(connection)
+                return
+
+    def close(self):
+        """Close every idle session"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
 
 
 class EmailService:
+    # One SMTP pool per account, shared by every EmailService instance
+    _pools = {}
+    _pools_lock = threading.Lock()
+
     def __init__(self):
-        self.app_email = os.getenv("APP_EMAIL", "")
-        self.app_password = os.getenv("APP_PASSWORD", "")
-        self.smtp_server = "smtp.gmail.com"
-        self.port = 465
+        self.app_email = get_env_value("APP_EMAIL", "")
+        self.app_password = get_env_value("APP_PASSWORD", "")
+        self.smtp_server = get_env_value("SMTP_SERVER", "smtp.gmail.com")
+        self.port = int(get_env_value("SMTP_PORT", "465"))
+        self.use_ssl = get_env_value("SMTP_SSL", "true").lower() == "true"
+        self.pool_size = int(get_env_value("SMTP_POOL_SIZE", "2"))
+        self.max_messages_per_connection = int(get_env_value("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+    @property
+    def _key(self) -> tuple:
+        return (self.smtp_server, self.port, self.use_ssl, self.app_email)
+
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        with self._pools_lock:
+            if self._key not in self._pools:
+                self._pools[self._key] = SMTPConnectionPool(
+                    self.smtp_server,
+                    self.port,
+                    self.app_email,
+                    self.app_password,
+                    size=self.pool_size,
+                    use_ssl=self.use_ssl,
+                    max_messages_per_connection=self.max_messages_per_connection,
+                )
+            return self._pools[self._key]
 
-    def send_email(
+    def build_message(
         self,
         receiver: str,
         subject: str = "Price Alert",
         text_body: str = None,
         html_body: str = None,
-    ) -> bool:
-        try:
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"Price Tracker <{self.app_email}>"
-            message["To"] = receiver
-
-            text = text_body or """\
-            Hi there,
-            One of your tracked items has dropped below your target price. Log in to your account to check it out!
-            """
-
-            html = html_body or """\
-            <html>
-                <body>
-                    <p style="font-family: Arial, sans-serif;">
-                    Hi there,<br><br>
-                    <strong>
-                        One of your tracked items has dropped below your target price.
-                    </strong><br>
-                    Log in to your account to check it out!
-                    </p>
-                </body>
-            </html>
-            """
-
-            part1 = MIMEText(text, "plain")
-            part2 = MIMEText(html, "html")
-
-            message.attach(part1)
-            message.attach(part2)
-
-            ctx = ssl.create_default_context()
-            with smtplib.SMTP_SSL(self.smtp_server, self.port, context=ctx) as server:
-                server.login(self.app_email, self.app_password)
-                server.sendmail(self.app_email, receiver, message.as_string())
-                return True
-        except smtplib.SMTPAuthenticationError:
-            print("Authentication failed - check app credentials")
-            return False
-        except Exception as e:
-            print(f"Email failed: {e}")
-            return False
+        message_id: str = None,
+    ) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = f"Price Tracker <{self.app_email}>"
+        message["To"] = receiver
+        if message_id:
+            message["Message-ID"] = f"<{message_id}@price-tracker>"
+
+        text = text_body or """\
+        Hi there,
+        One of your tracked items has dropped below your target price. Log in to your account to check it out!
+        """
+
+        html = html_body or """\
+        <html>
+            <body>
+                <p style="font-family: Arial, sans-serif;">
+                Hi there,<br><br>
+                <strong>
+                    One of your tracked items has dropped below your target price.
+                </strong><br>
+                Log in to your account to check it out!
+                </p>
+            </body>
+        </html>
+        """
+
+        part1 = MIMEText(text, "plain")
+        part2 = MIMEText(html, "html")
+
+        message.attach(part1)
+        message.attach(part2)
+        return message
+
+    def deliver(
+        self,
+        receiver: str,
+        subject: str = "Price Alert",
+        text_body: str = None,
+        html_body: str = None,
+        message_id: str = None,
+    ):
+        """Send an email synchronously on a pooled session, raising on failure.
+
+        Raises:
+            smtplib.SMTPException: If the server rejects the login or the message
+            OSError: If the server can't be reached
+        """
+        message = self.build_message(receiver, subject, text_body, html_body, message_id)
+        self.pool.send(self.app_email, [receiver], message.as_string())
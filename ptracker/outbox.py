@@ -0,0 +1,235 @@
+"""Transactional notification outbox and the dispatcher that drains it"""
+
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from flask import render_template
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import NotificationOutbox
+from ptracker.notifications import EmailService
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def next_delivery(mode: str, now: datetime, digest_hour: int = 8) -> datetime:
+    """When an alert raised at `now` is due for a user with the given notification mode"""
+    now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    if mode == "hourly":
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if mode == "daily":
+        due = now.replace(hour=digest_hour, minute=0, second=0, microsecond=0)
+        return due if due > now else due + timedelta(days=1)
+    return now
+
+
+def render_price_alerts(alerts: list[dict]) -> tuple[str, str, str]:
+    """Render one email (subject, text, html) listing every crossed item in `alerts` payloads"""
+    if len(alerts) == 1:
+        subject = f"Price Alert: {alerts[0].get('name') or 'a tracked item'} dropped below your target"
+    else:
+        subject = f"Price Alert: {len(alerts)} of your tracked items dropped below your target"
+    return (
+        subject,
+        render_template("email/price_alert.txt", alerts=alerts),
+        render_template("email/price_alert.html", alerts=alerts),
+    )
+
+
+def queue_notifications(rows: list[dict]) -> None:
+    """Add outbox rows in the caller's transaction, skipping idempotency keys that already exist.
+
+    Each row needs user_id, recipient, idempotency_key and payload, and may set
+    item_id and kind. Nothing is committed here.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(NotificationOutbox).on_conflict_do_nothing(index_elements=["idempotency_key"])
+        db.session.execute(statement, rows)
+        return
+
+    keys = [row["idempotency_key"] for row in rows]
+    existing = set(
+        db.session.scalars(
+            select(NotificationOutbox.idempotency_key).where(NotificationOutbox.idempotency_key.in_(keys))
+        )
+    )
+    fresh = [row for row in rows if row["idempotency_key"] not in existing]
+    if fresh:
+        db.session.execute(insert(NotificationOutbox), fresh)
+
+
+class OutboxDispatcher:
+    """Delivers outbox rows, several at a time, with retries and dead-lettering.
+
+    Every due row of a user is claimed together and sent as a single email
+    listing all of their crossed items. A batch is claimed with a conditional
+    UPDATE stamping a fresh claim token (FOR UPDATE SKIP LOCKED narrows the
+    candidates on Postgres), so several dispatcher processes can run side by
+    side. Sends happen on worker threads over pooled SMTP sessions; all
+    database writes stay on the calling thread. A claimed row whose lease runs
+    out (dispatcher crashed mid-send) is claimed again, so delivery is at-least-once; the idempotency key is used
+    as the Message-ID so mail systems can drop the rare duplicate.
+    """
+
+    def __init__(
+        self,
+        email_service: EmailService | None = None,
+        concurrency: int = 4,
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        retry_delay: int = 60,
+        lease_seconds: int = 120,
+    ):
+        self.email_service = email_service or EmailService()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+
+    def claim_batch(self) -> list[NotificationOutbox]:
+        now = _utcnow()
+        claimable = or_(
+            and_(NotificationOutbox.status == "pending", NotificationOutbox.next_attempt_at <= now),
+            and_(NotificationOutbox.status == "sending", NotificationOutbox.lease_expires_at < now),
+        )
+        candidates = (
+            select(NotificationOutbox.user_id)
+            .where(claimable)
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        user_ids = set(db.session.scalars(candidates))
+        if not user_ids:
+            db.session.commit()
+            return []
+
+        token = str(uuid.uuid4())
+        db.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.user_id.in_(user_ids), claimable)
+            .values(
+                status="sending",
+                claim_token=token,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                attempts=NotificationOutbox.attempts + 1,
+            )
+        )
+        db.session.commit()
+        return list(
+            db.session.scalars(
+                select(NotificationOutbox)
+                .where(NotificationOutbox.claim_token == token)
+                .order_by(NotificationOutbox.id)
+                .execution_options(populate_existing=True)
+            )
+        )
+
+    def _send(self, email: dict) -> tuple[float, Exception | None]:
+        started = time.perf_counter()
+        try:
+            self.email_service.deliver(**email)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, e
+
+    def dispatch_batch(self) -> int:
+        """Claim and deliver one batch. Returns the number of rows handled."""
+        rows = self.claim_batch()
+        if not rows:
+            return 0
+
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(row.user_id, []).append(row)
+
+        # Render everything up front, the threads must not touch the session or the app
+        emails = []
+        for user_rows in by_user.values():
+            subject, text, html = render_price_alerts([row.payload for row in user_rows])
+            emails.append(
+                {
+                    "receiver": user_rows[-1].recipient,
+                    "subject": subject,
+                    "text_body": text,
+                    "html_body": html,
+                    "message_id": user_rows[0].idempotency_key,
+                }
+            )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(self._send, emails))
+
+        now = _utcnow()
+        for user_rows, (elapsed, error) in zip(by_user.values(), outcomes):
+            metrics.observe("notifications.outbox.send_seconds", elapsed)
+            if error is None:
+                metrics.incr("notifications.outbox.emails")
+            for row in user_rows:
+                self._record_outcome(row, error, now)
+        db.session.commit()
+        return len(rows)
+
+    def _record_outcome(self, row: NotificationOutbox, error: Exception | None, now: datetime):
+        row.claim_token = None
+        row.lease_expires_at = None
+        if error is None:
+            row.status = "sent"
+            row.sent_at = now
+            row.last_error = None
+            metrics.incr("notifications.outbox.sent")
+            metrics.observe("notifications.outbox.latency_seconds", (now - row.created_at).total_seconds())
+        elif row.attempts >= self.max_attempts:
+            row.status = "dead"
+            row.last_error = str(error)
+            metrics.incr("notifications.outbox.dead")
+            logger.error("Notification %s dead-lettered after %s attempts: %s", row.id, row.attempts, error)
+        else:
+            row.status = "pending"
+            row.last_error = str(error)
+            row.next_attempt_at = now + timedelta(seconds=self.retry_delay * 2 ** (row.attempts - 1))
+            metrics.incr("notifications.outbox.failed")
+
+    def drain(self) -> int:
+        """Deliver everything that is due now. Returns the number of rows handled."""
+        handled = 0
+        while batch := self.dispatch_batch():
+            handled += batch
+        return handled
+
+    def run(self, poll_interval: float = 2.0, burst: bool = False) -> int:
+        """Keep draining the outbox; with `burst`, stop once nothing is due"""
+        handled = 0
+        while True:
+            batch = self.dispatch_batch()
+            handled += batch
+            if not batch:
+                if burst:
+                    return handled
+                time.sleep(poll_interval)
+
+    @staticmethod
+    def retry_dead() -> int:
+        """Move dead-lettered notifications back to pending. Returns how many."""
+        result = db.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.status == "dead")
+            .values(status="pending", attempts=0, next_attempt_at=_utcnow())
+        )
+        db.session.commit()
+        return result.rowcount
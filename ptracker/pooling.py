@@ -0,0 +1,99 @@
+"""Database connection pooling modes and their metrics"""
+
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+from ptracker.metrics import metrics
+
+POOL_MODES = ("queue", "pgbouncer", "null")
+
+# PgBouncer in transaction mode hands each transaction to any server connection,
+# so drivers must not keep prepared statements on them. psycopg2 never does.
+PGBOUNCER_CONNECT_ARGS = {
+    "psycopg": {"prepare_threshold": None},
+    "asyncpg": {"statement_cache_size": 0, "prepared_statement_cache_size": 0},
+}
+
+
+class _MeteredPool:
+    """Times every checkout as `db.pool.checkout_wait`, including opening a connection when one is needed"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr("db.pool.timeouts")
+            raise
+        finally:
+            metrics.observe("db.pool.checkout_wait", time.perf_counter() - started)
+            self._report()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+    def _create_connection(self):
+        metrics.incr("db.pool.connects")
+        return super()._create_connection()
+
+    def _report(self):
+        pass
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    """QueuePool that also reports the connections in use, as a count and as a share of pool_size + max_overflow"""
+
+    def _report(self):
+        checked_out = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        metrics.gauge("db.pool.checked_out", checked_out)
+        metrics.gauge("db.pool.utilization", checked_out / capacity if capacity else 0.0)
+
+
+class MeteredNullPool(_MeteredPool, NullPool):
+    pass
+
+
+def engine_options(config) -> dict:
+    """SQLAlchemy engine options of the DB_POOL mode, none when it's unset.
+
+    - queue: keep up to DB_POOL_SIZE connections open (plus DB_MAX_OVERFLOW more under
+      load), ping them before use and replace them after DB_POOL_RECYCLE seconds.
+    - pgbouncer: open a connection per checkout to a PgBouncer in transaction mode,
+      which does the pooling, with driver-side prepared statements turned off.
+    - null: open and close a connection per checkout.
+    """
+    mode = config.get("DB_POOL")
+    if not mode:
+        return {}
+
+    if mode == "queue":
+        return {
+            "poolclass": MeteredQueuePool,
+            "pool_size": config.get("DB_POOL_SIZE", 5),
+            "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+            "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+            "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+            "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+        }
+    if mode == "pgbouncer":
+        uri = config.get("SQLALCHEMY_DATABASE_URI")
+        driver = make_url(uri).drivername.partition("+")[2] if uri else ""
+        options = {"poolclass": MeteredNullPool}
+        if driver in PGBOUNCER_CONNECT_ARGS:
+            options["connect_args"] = dict(PGBOUNCER_CONNECT_ARGS[driver])
+        return options
+    if mode == "null":
+        return {"poolclass": MeteredNullPool}
+
+    raise ValueError(f"Unknown DB_POOL {mode!r}, expected one of: {', '.join(POOL_MODES)}")
+
+
+def init_pool(app):
+    """Apply the DB_POOL mode's engine options; SQLALCHEMY_ENGINE_OPTIONS set in the config take precedence"""
+    options = engine_options(app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
@@ -0,0 +1,115 @@
+"""Columnar archive tier for cold price history (`flask archive-history`)"""
+
+import os
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+# One record per archived PriceHistory row, NaT where the row was never confirmed again
+ARCHIVE_DTYPE = np.dtype(
+    [
+        ("timestamp", "datetime64[us]"),
+        ("price", "float64"),
+        ("last_confirmed_at", "datetime64[us]"),
+    ]
+)
+
+
+class ArchivedPrice(NamedTuple):
+    """A price history point read back from the archive, shaped like a PriceHistory row"""
+
+    item_id: int
+    price: float
+    timestamp: datetime
+    last_confirmed_at: datetime | None = None
+
+
+def _datetime64(value: datetime) -> np.datetime64:
+    return np.datetime64(value, "us")
+
+
+class HistoryArchive:
+    """Archived PriceHistory rows of each item, in one `.npy` file per item sorted by timestamp.
+
+    Reads memory-map the file and binary-search the requested time range, so
+    a long-range chart only touches the slice it shows. A file is rewritten
+    through a temporary file and an atomic rename, so readers never see a
+    partial write. Timestamps are naive UTC, like the PriceHistory table.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, item_id: int) -> str:
+        return os.path.join(self.directory, f"{item_id}.npy")
+
+    def load(self, item_id: int) -> np.ndarray:
+        """The item's archived records (memory-mapped), empty if nothing was archived"""
+        path = self.path(item_id)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=ARCHIVE_DTYPE)
+        return np.load(path, mmap_mode="r")
+
+    def append(self, item_id: int, rows: list[tuple[datetime, float, datetime | None]]) -> int:
+        """Merge `(timestamp, price, last_confirmed_at)` rows into the item's file.
+
+        A row whose timestamp is already archived replaces it, so archiving the
+        same rows twice (e.g. after an interrupted run) leaves one copy.
+
+        Returns:
+            int: Number of records in the item's file
+        """
+        records = np.array(rows, dtype=ARCHIVE_DTYPE)
+        path = self.path(item_id)
+        if os.path.exists(path):
+            records = np.concatenate([np.load(path), records])
+
+        # Stable sort keeps the new copy of a repeated timestamp last, then keep the last of each
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        keep = np.append(records["timestamp"][1:] != records["timestamp"][:-1], True)
+        records = records[keep]
+
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.save(file, records)
+        os.replace(temporary, path)
+        return len(records)
+
+    def read(
+        self,
+        item_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[ArchivedPrice]:
+        """Archived points of an item, newest first, with the same range semantics as the history API.
+
+        A record recorded before `since` but confirmed again after it is included,
+        as it still covers part of the range.
+        """
+        records = self.load(item_id)
+        if not len(records):
+            return []
+
+        timestamps = records["timestamp"]
+        start = 0
+        if since:
+            start = int(np.searchsorted(timestamps, _datetime64(since), side="left"))
+            if start and records["last_confirmed_at"][start - 1] >= _datetime64(since):
+                start -= 1
+        end = len(records) if until is None else int(np.searchsorted(timestamps, _datetime64(until), side="right"))
+
+        window = records[start:end]
+        if limit:
+            window = window[-limit:]
+        return [
+            ArchivedPrice(item_id, price, timestamp, last_confirmed_at)
+            for timestamp, price, last_confirmed_at in window[::-1].tolist()
+        ]
+
+
+def get_history_archive(app) -> HistoryArchive:
+    """The archive configured for `app` (HISTORY_ARCHIVE_DIR, default `<instance>/history-archive`)"""
+    return HistoryArchive(app.config.get("HISTORY_ARCHIVE_DIR") or os.path.join(app.instance_path, "history-archive"))
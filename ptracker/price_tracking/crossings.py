@@ -0,0 +1,53 @@
+"""Target price crossing detection driven by price-change events"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from ptracker.models import PriceHistory, UserItem
+
+
+@dataclass(frozen=True)
+class PriceChange:
+    """Emitted when a refresh moves an item's price.
+
+    `history` is the PriceHistory row recording the new price. Its id is only
+    assigned once the session flushes, which is why the row itself is kept.
+    """
+
+    item_id: int
+    previous_price: float
+    price: float
+    history: PriceHistory | None = None
+
+
+class TargetIndex:
+    """Subscriptions of a set of items, sorted by target price per item.
+
+    A price drop from `previous_price` to `price` crosses exactly the targets
+    in [price, previous_price), so one bisect per change finds every
+    subscriber to alert without looking at the others.
+    """
+
+    def __init__(self, subscriptions: Iterable[UserItem]):
+        by_item = defaultdict(list)
+        for user_item in subscriptions:
+            by_item[user_item.item_id].append(user_item)
+
+        self._subscriptions = {}
+        self._targets = {}
+        for item_id, user_items in by_item.items():
+            user_items.sort(key=lambda user_item: user_item.target_price)
+            self._subscriptions[item_id] = user_items
+            self._targets[item_id] = [user_item.target_price for user_item in user_items]
+
+    def crossed(self, change: PriceChange) -> list[UserItem]:
+        """Subscriptions whose target the change dropped to or below, from above"""
+        targets = self._targets.get(change.item_id)
+        if not targets or change.price >= change.previous_price:
+            return []
+
+        low = bisect_left(targets, change.price)
+        high = bisect_left(targets, change.previous_price, low)
+        return self._subscriptions[change.item_id][low:high]
@@ -0,0 +1,134 @@
+"""Concurrent refresh engine for tracked items"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from ptracker.datasources import ProductNotFoundError, ProductSnapshot
+from ptracker.datasources.base import chunked
+
+
+@dataclass(frozen=True)
+class RefreshTask:
+    """Plain description of an item to refresh.
+
+    Worker threads only ever see these, never ORM instances, so no database
+    access can happen off the writer thread.
+    """
+
+    item_id: int
+    vendor: str
+    external_id: str
+    url: str
+
+
+@dataclass
+class RefreshStats:
+    total: int = 0
+    updated: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: dict[int, Exception] = field(default_factory=dict)
+    # Whatever `apply` returned for each item, e.g. the price changes to check for alerts
+    changes: list = field(default_factory=list)
+
+
+class RefreshEngine:
+    """Fetches snapshots in parallel and hands them to a single writer.
+
+    Tasks are grouped per vendor into batches no larger than the vendor's
+    batch size. Every vendor gets its own bounded thread pool, so a slow or
+    throttled vendor can never starve the others. Results are applied in the
+    calling thread as they complete, which keeps all session work
+    single-threaded.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        vendor_limits: dict[str, int] | None = None,
+        batch_sizes: dict[str, int] | None = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.vendor_limits = vendor_limits or {}
+        self.batch_sizes = batch_sizes or {}
+
+    def _limit_for(self, vendor: str) -> int:
+        return max(1, self.vendor_limits.get(vendor, self.concurrency))
+
+    def _batches(self, vendor: str, tasks: list[RefreshTask]) -> list[list[RefreshTask]]:
+        return list(chunked(tasks, max(1, self.batch_sizes.get(vendor, 1))))
+
+    def run(
+        self,
+        tasks: Iterable[RefreshTask],
+        fetch: Callable[[list[RefreshTask]], dict[int, ProductSnapshot | Exception]],
+        apply: Callable[[RefreshTask, ProductSnapshot], Any],
+        on_progress: Callable[[RefreshStats], None] | None = None,
+    ) -> RefreshStats:
+        """Fetch every task concurrently and apply each snapshot in this thread.
+
+        A failure (fetching or applying) only affects its own item, or its
+        batch if the whole batch request failed. It is recorded in the returned
+        stats and the run carries on.
+
+        Args:
+            tasks: Items to refresh
+            fetch: Called from worker threads with one vendor batch, must not touch
+                the database. Returns a snapshot or exception per task item_id.
+            apply: Called from the calling thread for every fetched snapshot. A return
+                value other than None is collected in `stats.changes`.
+            on_progress: Called from the calling thread after each batch is applied
+
+        Returns:
+            RefreshStats summarising the run
+        """
+        started = time.perf_counter()
+        stats = RefreshStats()
+
+        by_vendor = defaultdict(list)
+        for task in tasks:
+            by_vendor[task.vendor].append(task)
+            stats.total += 1
+
+        pools = {vendor: ThreadPoolExecutor(max_workers=self._limit_for(vendor)) for vendor in by_vendor}
+        try:
+            futures = {}
+            for vendor, vendor_tasks in by_vendor.items():
+                for batch in self._batches(vendor, vendor_tasks):
+                    futures[pools[vendor].submit(fetch, batch)] = batch
+
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = {task.item_id: e for task in batch}
+
+                for task in batch:
+                    try:
+                        result = results.get(task.item_id)
+                        if result is None:
+                            raise ProductNotFoundError(f"No result for item {task.item_id}")
+                        if isinstance(result, Exception):
+                            raise result
+                        change = apply(task, result)
+                        if change is not None:
+                            stats.changes.append(change)
+                        stats.updated += 1
+                    except Exception as e:
+                        stats.failed += 1
+                        stats.errors[task.item_id] = e
+
+                if on_progress:
+                    on_progress(stats)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
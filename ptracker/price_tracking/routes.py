@@ -2,7 +2,6 @@ from flask import Blueprint, request, jsonify, g, render_template, redirect, url
 from flask_login import current_user, login_required
 
 from ptracker.price_tracking.forms import TrackProductForm, ItemDetailsForm, DeleteItemForm
-from ptracker.price_tracking.service import PriceTrackerService
 
 price_bp = Blueprint("price", __name__, url_prefix="/items")
 
@@ -27,8 +26,7 @@ def notifications_page():
     if form.validate_on_submit():
         g.price_service.remove_item(current_user.id, form.item_id.data)
 
-    service = PriceTrackerService()
-    products = service.get_user_tracked_items(current_user.id)
+    products = g.price_service.get_user_tracked_items(current_user.id)
 
     return render_template(
         "product/alerts.html", title="Alerts", current_path=request.path, products=products, form=form
@@ -74,12 +72,13 @@ def get_item(item_id):
     target_price = data["target_price"]
     price_change = data["price_change"]
 
+    recent_history = g.price_service.get_price_history(item_id, limit=5)
     serialized_history = [
         {
             "price": h.price,
             "timestamp": h.timestamp.strftime("%b %d, %Y"),
         }
-        for h in item.price_history
+        for h in reversed(recent_history)
     ]
 
     return render_template(
@@ -89,7 +88,7 @@ def get_item(item_id):
         item=item,
         target_price=target_price,
         price_change=price_change,
-        price_history=serialized_history[::-1][:5][::-1],
+        price_history=serialized_history,
         form=form,
         delete_form=delete_form,
     )
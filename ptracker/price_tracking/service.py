@@ -1,19 +1,68 @@
+from ptracker.analytics import item_stats
+from ptracker.auth.user_cache import user_changed
+from ptracker.cache import mark_stale
 from ptracker.datasources import DataSourceFactory, ProductSnapshot
-from ptracker.models import User, Item, UserItem, PriceHistory
+from ptracker.datasources.base import chunked
+from ptracker.models import User, Item, ItemDailyStats, UserItem, PriceHistory
 from ptracker.extensions import db
 from werkzeug.exceptions import NotFound
-from ptracker.notifications import EmailService
-
-from datetime import datetime, timezone
+from ptracker.outbox import next_delivery, queue_notifications
+from ptracker.price_tracking.archive import HistoryArchive, get_history_archive
+from ptracker.price_tracking.crossings import PriceChange, TargetIndex
+from ptracker.price_tracking.refresh import RefreshEngine, RefreshStats, RefreshTask
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, select, true, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased, contains_eager
+
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+# Sortable dashboard columns. Nullable ones are coalesced so keyset cursors stay comparable.
+DASHBOARD_SORTS = {
+    "added": UserItem.id,
+    "name": func.coalesce(Item.name, ""),
+    "price": func.coalesce(Item.current_price, 0.0),
+    "change": func.coalesce(Item.price_change_pct, 0.0),
+}
+
+NOTIFICATION_MODES = User.notification_mode.type.enums
+
+# Downsampled price history resolutions and the time span of one bucket
+HISTORY_BUCKETS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+# Bucketed reads over a longer range come from the ItemDailyStats rollup instead of raw history
+ROLLUP_MIN_RANGE = timedelta(weeks=1)
+
+
+def _in_shard(shard: tuple[int, int] | None):
+    """Filter selecting the items of shard `(index, count)`, or every item when None"""
+    if shard is None:
+        return true()
+    index, count = shard
+    return Item.id % count == index
+
+
+def _as_naive_utc(value: datetime | None) -> datetime | None:
+    """PriceHistory timestamps are stored as naive UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 class PriceTrackerService:
 
-    def track_item(self, url: str, user_id: int, target_price: float) -> Item:
+    def track_item(self, url: str, user_id: int, target_price: float, snapshot: ProductSnapshot | None = None) -> Item:
+        """Track the product at `url` for the user, fetching it unless `snapshot` already holds it"""
         vendor = DataSourceFactory.detect_vendor(url)
         source = DataSourceFactory.get(vendor)
 
-        snapshot = source.fetch_from_url(url)
+        if snapshot is None:
+            snapshot = source.fetch_from_url(url)
 
         item = Item.query.filter_by(vendor=vendor, external_id=snapshot.external_id).first()
 
@@ -24,7 +73,6 @@ class PriceTrackerService:
                 external_id=snapshot.external_id,
                 name=snapshot.name,
                 currency=snapshot.currency,
-                current_price=snapshot.price,
                 image_url=snapshot.image_url,
                 in_stock=snapshot.in_stock,
                 last_fetched=snapshot.timestamp,
@@ -32,8 +80,7 @@ class PriceTrackerService:
             db.session.add(item)
             db.session.flush()
 
-            price_record = PriceHistory(item_id=item.id, price=item.current_price)
-            db.session.add(price_record)
+            self._record_price(item, snapshot.price)
 
         existing = UserItem.query.filter_by(user_id=user_id, item_id=item.id).first()
         if existing:
@@ -41,6 +88,7 @@ class PriceTrackerService:
 
         user_item = UserItem(user_id=user_id, item_id=item.id, target_price=target_price)
         db.session.add(user_item)
+        mark_stale(users=[user_id])
         db.session.commit()
 
         return item
@@ -51,6 +99,7 @@ class PriceTrackerService:
             raise NotFound(f"No item with tracked with id: {item_id}")
 
         user_item.target_price = target_price
+        mark_stale(users=[user_id])
         db.session.commit()
         return user_item
 
@@ -58,112 +107,797 @@ class PriceTrackerService:
         source = DataSourceFactory.get(item.vendor)
         return source.fetch_from_url(item.url)
 
-    def get_item(self, item_id: int):
+    def _batch_size(self, vendor: str) -> int:
+        try:
+            return DataSourceFactory.get(vendor).max_batch_size
+        except ValueError:
+            # Unknown vendor, every fetch for it will fail on its own
+            return 1
+
+    def _fetch_task_snapshots(self, tasks: list[RefreshTask]) -> dict[int, ProductSnapshot | Exception]:
+        """Thread-safe batch fetch used by the refresh engine, all tasks share one vendor"""
+        source = DataSourceFactory.get(tasks[0].vendor)
+        results = source.fetch_products([task.external_id for task in tasks])
+        return {task.item_id: results.get(task.external_id) for task in tasks}
+
+    def get_item(
+        self,
+        item_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+        resolution: str = "raw",
+    ):
         item = db.session.get(Item, item_id)
         if not item:
             raise NotFound(f"No item with id: {item_id}")
 
-        history = PriceHistory.query.filter_by(item_id=item_id).order_by(PriceHistory.timestamp.desc()).all()
-
         return {
             "item": item,
-            "price_history": history,
+            "price_history": self.get_price_history(item_id, since, until, limit, resolution),
         }
 
+    def get_item_version(
+        self,
+        item_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+        resolution: str = "raw",
+    ) -> tuple:
+        """What an item's detail view depends on, in one narrow query:
+        (last_fetched, price_changed_at, history_rewritten_at, history window).
+
+        The first two move whenever a fetch is applied, which is also the only way the
+        item's price history grows; history_rewritten_at whenever history is archived
+        or its rollup rebuilt. The window is the (since, until) range `get_price_history`
+        reads for the same arguments.
+        """
+        version = db.session.execute(
+            select(Item.last_fetched, Item.price_changed_at, Item.history_rewritten_at).where(Item.id == item_id)
+        ).first()
+        if not version:
+            raise NotFound(f"No item with id: {item_id}")
+        return (*version, self._history_window(since, until, limit, resolution))
+
+    def get_price_history(
+        self,
+        item_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+        resolution: str = "raw",
+    ) -> list:
+        """Get an item's price history, newest first.
+
+        Args:
+            item_id (int): Item to read
+            since (datetime | None, optional): Oldest timestamp to include. Defaults to None.
+            until (datetime | None, optional): Newest timestamp to include. Defaults to None.
+            limit (int | None, optional): Maximum number of points (or buckets) returned. Defaults to None.
+            resolution (str, optional): "raw" for PriceHistory rows, or "daily"/"weekly" for OHLC buckets.
+                Defaults to "raw".
+
+        Returns:
+            list: PriceHistory rows, or bucket dicts with timestamp/open/high/low/close/price/count.
+                Change-only rows are expanded back into daily points first (see `_expand_history`),
+                and ranges older than the table reach into the archive (ArchivedPrice points).
+                Buckets over more than ROLLUP_MIN_RANGE are read from the daily rollup, whole days at a time.
+        """
+        if resolution not in HISTORY_BUCKETS and resolution != "raw":
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        since, until = self._history_window(since, until, limit, resolution)
+        if resolution != "raw":
+            newest = until or datetime.now(timezone.utc).replace(tzinfo=None)
+            # Ranges the rollup doesn't fully cover fall back to raw rows
+            buckets = (not since or newest - since > ROLLUP_MIN_RANGE) and self._rollup_buckets(
+                item_id, since, until, resolution
+            )
+            if buckets:
+                return buckets[::-1][:limit] if limit else buckets[::-1]
+
+        query = PriceHistory.query.filter_by(item_id=item_id)
+        if since:
+            # A change-only row still covers its price up to its last confirmation
+            query = query.filter(func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.timestamp) >= since)
+        if until:
+            query = query.filter(PriceHistory.timestamp <= until)
+        query = query.order_by(PriceHistory.timestamp.desc())
+
+        # Archived rows are all older than the ones left in the table, so they simply follow them
+        archive = get_history_archive(current_app)
+        if resolution == "raw":
+            # Every row expands to at least one point, so `limit` rows are always enough
+            rows = query.limit(limit).all() if limit else query.all()
+            if not limit or len(rows) < limit:
+                rows += archive.read(item_id, since, until, limit and limit - len(rows))
+            points = self._expand_history(rows, since, until)
+            return points[:limit] if limit else points
+
+        rows = query.all() + archive.read(item_id, since, until)
+        buckets = self._bucket_history(reversed(self._expand_history(rows, since, until)), resolution)
+        return buckets[::-1][:limit] if limit else buckets[::-1]
+
+    @staticmethod
+    def _history_window(
+        since: datetime | None, until: datetime | None, limit: int | None, resolution: str
+    ) -> tuple[datetime | None, datetime | None]:
+        """The (since, until) range, as naive UTC, a history read with these arguments covers.
+
+        A bucketed read with a `limit` but no `since` only loads the rows that can end up in
+        the newest `limit` buckets. Its window starts on a bucket boundary, so it only moves
+        when the next bucket begins.
+        """
+        since, until = _as_naive_utc(since), _as_naive_utc(until)
+        if resolution != "raw" and limit and not since:
+            newest = until or datetime.now(timezone.utc).replace(tzinfo=None)
+            start = datetime.combine(newest.date(), datetime.min.time())
+            if resolution == "weekly":
+                start -= timedelta(days=start.weekday())
+            since = start - HISTORY_BUCKETS[resolution] * (limit - 1)
+        return since, until
+
+    @staticmethod
+    def _expand_history(rows: list, since: datetime | None = None, until: datetime | None = None) -> list:
+        """Rebuild the daily series from newest-first PriceHistory rows.
+
+        A change-only row seen again after it was recorded stands for one
+        observation a day over its range, spread evenly up to last_confirmed_at.
+        Those points are transient PriceHistory instances without an id; rows
+        without a confirmation pass through unchanged.
+        """
+        points = []
+        for row in rows:
+            if row.last_confirmed_at and row.last_confirmed_at > row.timestamp:
+                span = row.last_confirmed_at - row.timestamp
+                steps = max(1, round(span / HISTORY_BUCKETS["daily"]))
+                for step in range(steps, 0, -1):
+                    timestamp = row.timestamp + span * step / steps
+                    if (not since or timestamp >= since) and (not until or timestamp <= until):
+                        points.append(PriceHistory(item_id=row.item_id, price=row.price, timestamp=timestamp))
+            if not since or row.timestamp >= since:
+                points.append(row)
+        return points
+
+    @classmethod
+    def _bucket_history(cls, rows, resolution: str) -> list[dict]:
+        """Downsample chronologically ordered PriceHistory rows into OHLC buckets.
+
+        A bucket's count is the rows recorded in it: the points `_expand_history` fills
+        change-only ranges with (PriceHistory instances without an id) count for none.
+        """
+        return cls._merge_buckets(
+            (
+                (row.timestamp.date(), row.price, row.price, row.price, row.price, cls._recorded_count(row))
+                for row in rows
+            ),
+            resolution,
+        )
+
+    @staticmethod
+    def _recorded_count(row) -> int:
+        # Archived points (ArchivedPrice) were recorded rows too
+        return 0 if isinstance(row, PriceHistory) and row.id is None else 1
+
+    def _rollup_buckets(
+        self, item_id: int, since: datetime | None, until: datetime | None, resolution: str
+    ) -> list[dict]:
+        """OHLC buckets from the ItemDailyStats rollup, chronologically: one row per day of the range.
+
+        Empty if the rollup doesn't cover the range. Every price the service records is
+        rolled up, so the rollup is complete from its first day on; history older than that
+        (recorded before the rollup existed, or written outside the service) is only in it
+        after `flask rebuild-daily-stats`.
+        """
+        query = ItemDailyStats.query.filter_by(item_id=item_id)
+        if since:
+            query = query.filter(ItemDailyStats.day >= since.date())
+        if until:
+            query = query.filter(ItemDailyStats.day <= until.date())
+        rows = query.order_by(ItemDailyStats.day).all()
+        if not rows or self._has_history_before(item_id, since, datetime.combine(rows[0].day, datetime.min.time())):
+            return []
+        return self._merge_buckets(
+            ((row.day, row.open, row.high, row.low, row.close, row.count) for row in rows), resolution
+        )
+
+    def _has_history_before(self, item_id: int, since: datetime | None, before: datetime) -> bool:
+        """Whether the item has history in the range from `since` up to `before`, the table's or the archive's"""
+        query = select(PriceHistory.id).where(PriceHistory.item_id == item_id, PriceHistory.timestamp < before)
+        if since:
+            query = query.where(func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.timestamp) >= since)
+        if db.session.scalar(query.limit(1)) is not None:
+            return True
+        return bool(get_history_archive(current_app).read(item_id, since, before - timedelta(microseconds=1), 1))
+
+    @staticmethod
+    def _merge_buckets(entries, resolution: str) -> list[dict]:
+        """Merge chronological (day, open, high, low, close, count) entries into daily or weekly buckets"""
+        buckets = {}
+        for day, open_, high, low, close, count in entries:
+            start = datetime.combine(day, datetime.min.time())
+            if resolution == "weekly":
+                start -= timedelta(days=start.weekday())
+
+            bucket = buckets.get(start)
+            if bucket is None:
+                buckets[start] = {
+                    "timestamp": start,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "price": close,
+                    "count": count,
+                }
+            else:
+                bucket["high"] = max(bucket["high"], high)
+                bucket["low"] = min(bucket["low"], low)
+                bucket["close"] = bucket["price"] = close
+                bucket["count"] += count
+
+        return list(buckets.values())
+
     def remove_item(self, user_id: int, item_id: int):
         user_item = UserItem.query.filter_by(user_id=user_id, item_id=item_id).first()
         if not user_item:
             raise NotFound("Item not found in user's tracked list")
 
         db.session.delete(user_item)
+        mark_stale(users=[user_id])
         db.session.commit()
 
-    def _update_item_price(self, item: Item, commit: bool = True):
+    def _update_item_price(self, item: Item, commit: bool = True) -> PriceChange | None:
         """Core logic for fetching and updating item price once per day.
 
         Fetches if stale (24+ hours since last fetch) and records unrecorded price changes.
         Always adds a daily price history snapshot for tracking.
         Commits changes.
+
+        Returns:
+            PriceChange | None: The price change event, None if the price didn't move
         """
+        change = None
         if item.is_stale(max_age_hours=24):
             snapshot = self._fetch_live_snapshot(item)
-            item.name = snapshot.name
-            item.image_url = snapshot.image_url
-            item.currency = snapshot.currency
-            item.current_price = snapshot.price
-            item.in_stock = snapshot.in_stock
-            item.last_fetched = datetime.now(timezone.utc)
-
-            db.session.add(PriceHistory(item_id=item.id, price=snapshot.price))
+            change = self._apply_snapshot(item, snapshot)
 
             if commit:
                 db.session.commit()
+        return change
+
+    def _apply_snapshot(self, item: Item, snapshot: ProductSnapshot) -> PriceChange | None:
+        """Copy a fetched snapshot onto the item and record its price history.
+
+        The item's cached views, and the dashboards tracking it, are dropped when the transaction commits.
+        """
+        mark_stale(items=[item.id])
+        item.name = snapshot.name
+        item.image_url = snapshot.image_url
+        item.currency = snapshot.currency
+        item.in_stock = snapshot.in_stock
+        item.last_fetched = datetime.now(timezone.utc)
+
+        return self._record_price(item, snapshot.price)
+
+    def _apply_in_savepoint(self, item: Item, snapshot: ProductSnapshot) -> PriceChange | None:
+        """`_apply_snapshot` in a savepoint, so an item that fails to apply leaves none of its writes
+        in the refresh transaction; the error is re-raised for the refresh engine to record."""
+        with db.session.begin_nested():
+            return self._apply_snapshot(item, snapshot)
+
+    def _record_price(self, item: Item, price: float) -> PriceChange | None:
+        """Set the item's current price, append it to the price history and update the
+        denormalized previous_price / price_change_pct / price_changed_at columns.
+
+        `item.current_price` always mirrors the latest PriceHistory row, so it is the
+        previous price of the row being added (None for a brand new item). With
+        HISTORY_CHANGE_ONLY an unchanged price only moves the latest row's
+        last_confirmed_at forward. Either way the price is folded into the
+        item's ItemDailyStats rollup, though only recorded rows are counted.
+
+        Returns:
+            PriceChange | None: A change event when an existing price moved, else None
+        """
+        now = datetime.now(timezone.utc)
+        unchanged = item.current_price == price
+
+        item.previous_price = item.current_price
+        item.price_change_pct = self._percent_change(item.previous_price, price)
+        item.price_changed_at = now
+        item.current_price = price
+
+        if unchanged and current_app.config.get("HISTORY_CHANGE_ONLY") and self._confirm_latest_price(item, now):
+            self._roll_up(item.id, price, now, recorded=False)
+            return None
+        self._roll_up(item.id, price, now)
+
+        history = PriceHistory(item_id=item.id, price=price, timestamp=now)
+        db.session.add(history)
+
+        if item.previous_price is None or item.previous_price == price:
+            return None
+        return PriceChange(item_id=item.id, previous_price=item.previous_price, price=price, history=history)
+
+    @staticmethod
+    def _roll_up(item_id: int, price: float, observed_at: datetime, recorded: bool = True):
+        """Fold one observed price into the item's ItemDailyStats row for that UTC day, with one upsert.
+
+        `count` is the number of PriceHistory rows recorded that day, as `rebuild_daily_stats`
+        counts them, so a price only confirmed (`recorded` False) leaves it as is.
+        """
+        values = {
+            "item_id": item_id,
+            "day": observed_at.astimezone(timezone.utc).date(),
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "count": int(recorded),
+        }
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = dialect_insert(ItemDailyStats).values(**values)
+            excluded = statement.excluded
+            db.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["item_id", "day"],
+                    set_={
+                        "high": case((excluded.high > ItemDailyStats.high, excluded.high), else_=ItemDailyStats.high),
+                        "low": case((excluded.low < ItemDailyStats.low, excluded.low), else_=ItemDailyStats.low),
+                        "close": excluded.close,
+                        "count": ItemDailyStats.count + excluded.count,
+                    },
+                )
+            )
+            return
+
+        row = db.session.get(ItemDailyStats, (item_id, values["day"]))
+        if row is None:
+            db.session.add(ItemDailyStats(**values))
+        else:
+            row.high, row.low, row.close = max(row.high, price), min(row.low, price), price
+            row.count += values["count"]
+
+    @staticmethod
+    def _confirm_latest_price(item: Item, now: datetime) -> bool:
+        """Stamp the item's latest PriceHistory row as seen again at `now`. False if it has none."""
+        history = aliased(PriceHistory)
+        latest = (
+            select(history.id)
+            .where(history.item_id == item.id)
+            .order_by(history.timestamp.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(PriceHistory)
+            .where(PriceHistory.id == latest)
+            .values(last_confirmed_at=_as_naive_utc(now))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def _percent_change(previous: float | None, current: float | None) -> float:
+        if not previous or current is None:
+            return 0.0
+
+        return round(((current - previous) / previous) * 100, 2)
 
     def check_price_and_update(self, item_id: int):
-        """Public method to check and update price by item_id."""
+        """Public method to check and update price by item_id, queueing alerts for any target crossed."""
         item = db.session.get(Item, item_id)
         if not item:
             raise NotFound(f"No item with id: {item_id}")
 
-        self._update_item_price(item)
+        change = self._update_item_price(item, commit=False)
+        if change:
+            self._queue_price_alerts(self._find_target_price_crossings([change]))
+        db.session.commit()
 
     def calculate_price_change(self, item: Item) -> float:
-        prev_price = (
-            PriceHistory.query.filter_by(item_id=item.id).order_by(PriceHistory.timestamp.desc()).offset(1).first()
+        """Percent change between the item's previous and current price, read from its denormalized columns"""
+        return self._percent_change(item.previous_price, item.current_price)
+
+    def backfill_price_changes(self) -> int:
+        """Populate the denormalized price-change columns of every item from its price history.
+
+        A latest row that was confirmed again (change-only storage) means the
+        last fetch saw the same price, exactly as a repeated row would.
+
+        Returns:
+            int: Number of items updated
+        """
+        latest = (
+            db.session.query(PriceHistory.timestamp)
+            .filter(PriceHistory.item_id == Item.id)
+            .order_by(PriceHistory.timestamp.desc())
+            .limit(1)
+            .correlate(Item)
+            .scalar_subquery()
+        )
+        previous = (
+            db.session.query(PriceHistory.price)
+            .filter(PriceHistory.item_id == Item.id)
+            .order_by(PriceHistory.timestamp.desc())
+            .offset(1)
+            .limit(1)
+            .correlate(Item)
+            .scalar_subquery()
+        )
+        confirmed = (
+            db.session.query(PriceHistory.last_confirmed_at)
+            .filter(PriceHistory.item_id == Item.id)
+            .order_by(PriceHistory.timestamp.desc())
+            .limit(1)
+            .correlate(Item)
+            .scalar_subquery()
         )
-        if not prev_price or not prev_price.price:
-            return 0.0
 
-        return round(((item.current_price - prev_price.price) / prev_price.price) * 100, 2)
+        rows = db.session.query(Item.id, Item.current_price, previous, latest, confirmed).all()
+        updates = []
+        for item_id, current_price, previous_price, changed_at, confirmed_at in rows:
+            if confirmed_at:
+                previous_price, changed_at = current_price, confirmed_at
+            updates.append(
+                {
+                    "id": item_id,
+                    "previous_price": previous_price,
+                    "price_change_pct": self._percent_change(previous_price, current_price),
+                    "price_changed_at": changed_at,
+                }
+            )
+        if updates:
+            db.session.execute(update(Item), updates)
+        db.session.commit()
+        return len(updates)
 
-    def check_price_change_and_notify_all(self):
-        self.update_all_tracked_items()
-        # Can add performance improvement using joinedload
-        user_items = UserItem.query.join(Item).all()
-        email_service = EmailService()
+    def rebuild_daily_stats(self) -> tuple[int, int]:
+        """Regenerate the ItemDailyStats rollup from every item's price history, archive included.
 
-        for ui in user_items:
-            user = ui.user
-            item = ui.item
+        Runs in one transaction, so readers keep the old rollup until it commits.
 
-            # Skip if notifications are globally disabled or just for this item
-            if not (user.notifications_enabled and ui.notifications_enabled):
-                continue
+        Returns:
+            tuple[int, int]: Daily rows written and items processed
+        """
+        item_ids = db.session.scalars(select(Item.id).order_by(Item.id)).all()
+        db.session.execute(delete(ItemDailyStats))
 
-            prev_snapshot = (
-                PriceHistory.query.filter_by(item_id=item.id).order_by(PriceHistory.timestamp.desc()).offset(1).first()
-            )
+        written = 0
+        for ids in chunked(item_ids, 100):
+            rows = [
+                {
+                    "item_id": item_id,
+                    "day": bucket["timestamp"].date(),
+                    "open": bucket["open"],
+                    "high": bucket["high"],
+                    "low": bucket["low"],
+                    "close": bucket["close"],
+                    "count": bucket["count"],
+                }
+                for item_id in ids
+                for bucket in self._bucket_history(reversed(self.get_price_history(item_id)), "daily")
+            ]
+            if rows:
+                db.session.execute(insert(ItemDailyStats), rows)
+            written += len(rows)
+        db.session.execute(update(Item).values(history_rewritten_at=datetime.now(timezone.utc)))
+        mark_stale(items=item_ids)
+        db.session.commit()
+        return written, len(item_ids)
+
+    def compact_history(self) -> tuple[int, int]:
+        """Collapse every item's runs of equal consecutive prices into change-only rows (HISTORY_CHANGE_ONLY).
 
-            prev_price = prev_snapshot.price if prev_snapshot else None
+        The first row of a run stays, confirmed until the run was last seen, and the
+        others are deleted, one item per transaction. Reads rebuild a point a day over
+        the confirmed range, so the removed rows' own timestamps are lost.
 
-            # Current price must exist
-            if item.current_price is None:
+        Returns:
+            tuple[int, int]: Rows removed and items touched
+        """
+        item_ids = db.session.scalars(select(PriceHistory.item_id).distinct().order_by(PriceHistory.item_id)).all()
+        removed = items = 0
+        for item_id in item_ids:
+            rows = db.session.execute(
+                select(PriceHistory.id, PriceHistory.price, PriceHistory.timestamp, PriceHistory.last_confirmed_at)
+                .where(PriceHistory.item_id == item_id)
+                .order_by(PriceHistory.timestamp, PriceHistory.id)
+            ).all()
+            runs = []
+            for row in rows:
+                if runs and row.price == runs[-1][0].price:
+                    runs[-1].append(row)
+                else:
+                    runs.append([row])
+            runs = [run for run in runs if len(run) > 1]
+            if not runs:
                 continue
 
-            if prev_price is not None and prev_price > ui.target_price and item.current_price <= ui.target_price:
-                email_service.send_email(ui.user.email)
+            db.session.execute(
+                update(PriceHistory),
+                [
+                    {"id": run[0].id, "last_confirmed_at": max(row.last_confirmed_at or row.timestamp for row in run)}
+                    for run in runs
+                ],
+            )
+            duplicates = [row.id for run in runs for row in run[1:]]
+            for ids in chunked(duplicates, 500):
+                db.session.execute(delete(PriceHistory).where(PriceHistory.id.in_(ids)))
+            db.session.execute(
+                update(Item).where(Item.id == item_id).values(history_rewritten_at=datetime.now(timezone.utc))
+            )
+            mark_stale(items=[item_id])
+            db.session.commit()
+            removed += len(duplicates)
+            items += 1
+        return removed, items
+
+    def archive_history(self, older_than: timedelta, archive: HistoryArchive | None = None) -> tuple[int, int]:
+        """Move PriceHistory rows last seen more than `older_than` ago into the columnar archive.
+
+        Each item's latest row always stays in the table, as it backs the
+        denormalized price columns. Rows are written to the archive before they
+        are deleted, one item per transaction, so an interrupted run loses
+        nothing and running it again merges rather than duplicates. The item's
+        archived_low / archived_high are updated in the same transaction.
+
+        Returns:
+            tuple[int, int]: Rows archived and items touched
+        """
+        archive = archive or get_history_archive(current_app)
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - older_than
+        last_seen = func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.timestamp)
+
+        item_ids = db.session.scalars(select(PriceHistory.item_id).where(last_seen < cutoff).distinct()).all()
+        archived = items = 0
+        for item_id in item_ids:
+            latest_id = db.session.scalar(
+                select(PriceHistory.id)
+                .where(PriceHistory.item_id == item_id)
+                .order_by(PriceHistory.timestamp.desc())
+                .limit(1)
+            )
+            rows = db.session.execute(
+                select(PriceHistory.id, PriceHistory.timestamp, PriceHistory.price, PriceHistory.last_confirmed_at)
+                .where(PriceHistory.item_id == item_id, last_seen < cutoff, PriceHistory.id != latest_id)
+                .order_by(PriceHistory.timestamp)
+            ).all()
+            if not rows:
+                continue
 
-    def get_user_tracked_items(self, user_id: int):
-        """Get user's tracked items with full details, optionally refreshing stale data"""
-        user = db.session.get(User, user_id)
-        if not user:
-            raise NotFound(f"No user with id: {user_id}")
+            archive.append(item_id, [(row.timestamp, row.price, row.last_confirmed_at) for row in rows])
+            for ids in chunked([row.id for row in rows], 500):
+                db.session.execute(delete(PriceHistory).where(PriceHistory.id.in_(ids)))
+            self._record_archived_extremes([item_id], archive)
+            mark_stale(items=[item_id])
+            db.session.commit()
+            archived += len(rows)
+            items += 1
+        return archived, items
+
+    def backfill_archived_extremes(self, archive: HistoryArchive | None = None) -> int:
+        """Populate every item's archived_low / archived_high from its archive file.
+
+        Returns:
+            int: Number of items with archived history
+        """
+        archive = archive or get_history_archive(current_app)
+        item_ids = db.session.scalars(select(Item.id).order_by(Item.id)).all()
+        count = 0
+        for ids in chunked(item_ids, 500):
+            count += self._record_archived_extremes(ids, archive)
+        mark_stale(items=item_ids)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def _record_archived_extremes(item_ids: list[int], archive: HistoryArchive) -> int:
+        """Copy the lowest and highest archived price of each item onto it, returns how many have an archive"""
+        now = datetime.now(timezone.utc)
+        updates = []
+        for item_id in item_ids:
+            prices = archive.load(item_id)["price"]
+            low, high = (float(prices.min()), float(prices.max())) if len(prices) else (None, None)
+            updates.append({"id": item_id, "archived_low": low, "archived_high": high, "history_rewritten_at": now})
+        if updates:
+            db.session.execute(update(Item), updates)
+        return sum(values["archived_low"] is not None for values in updates)
+
+    def check_price_change_and_notify_all(
+        self,
+        shard: tuple[int, int] | None = None,
+        on_progress: Callable[[RefreshStats], None] | None = None,
+    ) -> RefreshStats:
+        """Refresh prices and queue alerts for every target price crossed.
+
+        Only the items whose price moved during the refresh are checked, so the
+        cost follows the number of changes rather than of subscriptions.
+        Alerts are written to the notification outbox in the same transaction
+        as the price updates and delivered by `flask dispatch-notifications`,
+        so this pass never waits on SMTP.
+        """
+        stats = self.update_all_tracked_items(shard=shard, on_progress=on_progress, commit=False)
+        self._queue_price_alerts(self._find_target_price_crossings(stats.changes))
+        db.session.commit()
+        return stats
 
-        result = []
-        for user_item in user.tracked_items:
-            price_change = self.calculate_price_change(user_item.item)
+    def _queue_price_alerts(self, crossings: list[tuple[UserItem, PriceChange]]):
+        """Queue one outbox row per crossing, due when the user's notification mode says.
 
-            result.append(
+        Rows of the same user that fall due together are sent as one email by
+        the dispatcher, so a pass only ever produces one message per user, and a
+        digest user gets one message per hour or day.
+        """
+        now = datetime.now(timezone.utc)
+        digest_hour = current_app.config.get("DIGEST_HOUR", 8)
+        # One alert per subscription per price change, however often the pass runs
+        queue_notifications(
+            [
                 {
-                    "item": user_item.item,
-                    "target_price": user_item.target_price,
-                    "current_price": user_item.item.current_price,
-                    "price_change": price_change,
-                    "notifications_enabled": user_item.notifications_enabled,
+                    "user_id": ui.user_id,
+                    "item_id": ui.item_id,
+                    "kind": "price_alert",
+                    "recipient": ui.user.email,
+                    "idempotency_key": f"price-alert:{ui.id}:{change.history.id}",
+                    "next_attempt_at": next_delivery(ui.user.notification_mode, now, digest_hour),
+                    "payload": {
+                        "item_id": ui.item_id,
+                        "name": ui.item.name,
+                        "url": ui.item.url,
+                        "currency": ui.item.currency,
+                        "previous_price": change.previous_price,
+                        "price": change.price,
+                        "target_price": ui.target_price,
+                    },
                 }
+                for ui, change in crossings
+            ]
+        )
+
+    def _find_target_price_crossings(self, changes: list[PriceChange]) -> list[tuple[UserItem, PriceChange]]:
+        """Return every notifiable UserItem whose target one of `changes` dropped to or below.
+
+        Only the subscriptions of the changed items are loaded, with users and
+        items eager-loaded through the same joins, one query per chunk of items.
+        A per-item sorted TargetIndex then finds the crossed targets of each
+        change with a bisect, and an unchanged item is never looked at.
+
+        Returns:
+            list[tuple[UserItem, PriceChange]]: Each crossed subscription with the change that crossed it
+        """
+        drops = [change for change in changes if change.price < change.previous_price]
+        if not drops:
+            return []
+
+        subscriptions = []
+        for item_ids in chunked(sorted({change.item_id for change in drops}), 500):
+            subscriptions += (
+                db.session.query(UserItem)
+                .join(UserItem.user)
+                .join(UserItem.item)
+                .options(contains_eager(UserItem.user), contains_eager(UserItem.item))
+                # Skip if notifications are globally disabled or just for this item
+                .filter(User.notifications_enabled.is_(True), UserItem.notifications_enabled.is_(True))
+                .filter(UserItem.item_id.in_(item_ids))
+                .all()
             )
 
-        return result
+        index = TargetIndex(subscriptions)
+        return [(ui, change) for change in drops for ui in index.crossed(change)]
+
+    def get_user_tracked_items(self, user_id: int):
+        """Get user's tracked items with full details"""
+        return self.get_user_dashboard(user_id)["items"]
+
+    def get_user_dashboard(
+        self,
+        user_id: int,
+        limit: int | None = None,
+        cursor: str | None = None,
+        sort: str = "added",
+        descending: bool = False,
+        with_stats: bool = False,
+    ) -> dict:
+        """Load a page of the user's tracked items in a single query.
+
+        Items are joined and eager-loaded with their UserItem rows, and the price
+        change comes from the item's denormalized columns. Pages are addressed by
+        an opaque keyset cursor over (sort column, UserItem.id), so deep pages cost
+        the same as the first one. `with_stats` adds each item's PriceStats,
+        computed for the whole page at once by `ptracker.analytics`.
+
+        Args:
+            user_id (int): Owner of the tracked items
+            limit (int | None, optional): Page size, all items when None. Defaults to None.
+            cursor (str | None, optional): `next_cursor` of the previous page. Defaults to None.
+            sort (str, optional): One of DASHBOARD_SORTS. Defaults to "added".
+            descending (bool, optional): Sort direction. Defaults to False.
+            with_stats (bool, optional): Add a "stats" entry to every item. Defaults to False.
+
+        Returns:
+            dict: {"items": [...], "next_cursor": str | None}
+        """
+        if sort not in DASHBOARD_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+
+        sort_column = DASHBOARD_SORTS[sort]
+        key = tuple_(sort_column, UserItem.id)
+
+        query = (
+            db.session.query(UserItem, sort_column)
+            .join(UserItem.item)
+            .options(contains_eager(UserItem.item))
+            .filter(UserItem.user_id == user_id)
+        )
+        if cursor:
+            after = tuple_(*self._decode_cursor(cursor))
+            query = query.filter(key < after if descending else key > after)
+        query = query.order_by(
+            *((sort_column.desc(), UserItem.id.desc()) if descending else (sort_column, UserItem.id))
+        )
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        rows = query.all()
+        if not rows and not cursor and not db.session.get(User, user_id):
+            raise NotFound(f"No user with id: {user_id}")
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last_user_item, last_value = rows[-1]
+            next_cursor = self._encode_cursor(last_value, last_user_item.id)
+
+        items = [
+            {
+                "item": user_item.item,
+                "target_price": user_item.target_price,
+                "current_price": user_item.item.current_price,
+                "price_change": self.calculate_price_change(user_item.item),
+                "notifications_enabled": user_item.notifications_enabled,
+            }
+            for user_item, _ in rows
+        ]
+        if with_stats:
+            stats = item_stats([entry["item"].id for entry in items])
+            for entry in items:
+                entry["stats"] = stats.get(entry["item"].id)
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    def get_dashboard_version(self, user_id: int) -> list[tuple]:
+        """What a user's dashboard depends on: one narrow row per tracked item, from a single query"""
+        rows = db.session.execute(
+            select(
+                UserItem.id,
+                UserItem.target_price,
+                UserItem.notifications_enabled,
+                Item.last_fetched,
+                Item.price_changed_at,
+                Item.history_rewritten_at,
+            )
+            .join(UserItem.item)
+            .where(UserItem.user_id == user_id)
+            .order_by(UserItem.id)
+        ).all()
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def _encode_cursor(value, user_item_id: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps([value, user_item_id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        try:
+            value, user_item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return value, int(user_item_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
 
     def get_user_item(self, user_id: int, item_id: int):
         user_item = db.session.query(UserItem).filter_by(user_id=user_id, item_id=item_id).first()
@@ -184,31 +918,69 @@ class PriceTrackerService:
             raise NotFound("Item not found in user's tracked list")
 
         user_item.target_price = target_price
+        mark_stale(users=[user_id])
         db.session.commit()
 
-    def update_all_tracked_items(self):
+    def update_all_tracked_items(
+        self,
+        shard: tuple[int, int] | None = None,
+        on_progress: Callable[[RefreshStats], None] | None = None,
+        commit: bool = True,
+    ) -> RefreshStats:
         """Utility method to update all tracked items.
-        In production, this would be run as a scheduled background job.
+        In production, this runs as a `refresh_items` job on `flask run-worker`.
+
+        Stale items are fetched concurrently by the refresh engine, in batches
+        sized for each vendor's bulk endpoint, while every database write happens
+        here in a single writer. A failed fetch only skips its own item.
+
+        Args:
+            shard (tuple[int, int] | None, optional): `(index, count)` to only refresh
+                items whose id % count == index, so several workers can split a run. Defaults to None.
+            on_progress (Callable | None, optional): Receives the running stats after each batch. Defaults to None.
+            commit (bool, optional): Commit the updates, or leave that to the caller. Defaults to True.
         """
-        # Can add performance improvement using joinedload
-        items = db.session.query(Item).join(UserItem).distinct().all()
+        items = db.session.query(Item).join(UserItem).filter(_in_shard(shard)).distinct().all()
+        stale = {item.id: item for item in items if item.is_stale(max_age_hours=24)}
+
+        tasks = [
+            RefreshTask(item_id=item.id, vendor=item.vendor, external_id=item.external_id, url=item.url)
+            for item in stale.values()
+        ]
+        engine = RefreshEngine(
+            concurrency=current_app.config.get("REFRESH_CONCURRENCY", 8),
+            vendor_limits=current_app.config.get("REFRESH_VENDOR_CONCURRENCY"),
+            batch_sizes={vendor: self._batch_size(vendor) for vendor in {task.vendor for task in tasks}},
+        )
+        stats = engine.run(
+            tasks,
+            fetch=self._fetch_task_snapshots,
+            apply=lambda task, snapshot: self._apply_in_savepoint(stale[task.item_id], snapshot),
+            on_progress=on_progress,
+        )
 
-        for item in items:
-            try:
-                self._update_item_price(item, commit=False)
-            except Exception as e:
-                print(f"Error updating item {item.id}: {e}")
-                db.session.rollback()
+        for item_id, error in stats.errors.items():
+            current_app.logger.warning("Error updating item %s: %s", item_id, error)
 
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        return stats
+
+    def update_user_notifications(self, user_id: int, enabled: bool | None, mode: str | None = None):
+        """Turn a user's alerts on/off and/or set their notification mode (immediate, hourly, daily)"""
+        if mode is not None and mode not in NOTIFICATION_MODES:
+            raise ValueError(f"Invalid notification mode: {mode}")
 
-    def update_user_notifications(self, user_id: int, enabled: bool):
         user = db.session.get(User, user_id)
         if not user:
             raise NotFound(f"No user with id: {user_id}")
 
-        user.notifications_enabled = enabled
+        if enabled is not None:
+            user.notifications_enabled = enabled
+        if mode is not None:
+            user.notification_mode = mode
         db.session.commit()
+        user_changed(user_id)
 
     def update_item_notifications(self, user_id: int, item_id: int, enabled: bool):
         user_item = db.session.query(UserItem).filter_by(user_id=user_id, item_id=item_id).first()
@@ -216,4 +988,5 @@ class PriceTrackerService:
             raise NotFound("Item not found in user's tracked list")
 
         user_item.notifications_enabled = enabled
+        mark_stale(users=[user_id])
         db.session.commit()
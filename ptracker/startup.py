@@ -0,0 +1,38 @@
+"""Boot-time profile of the app factory"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+from ptracker.metrics import metrics
+
+
+class StartupProfile:
+    """Wall time and number of newly imported modules of each phase of `create_app`.
+
+    Phases are always timed, as `startup.<phase>` timings in the metrics. With
+    STARTUP_PROFILE set the factory also prints the table once the app is built.
+    For a per-module breakdown of the imports, run with `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.phases: list[tuple[str, float, int]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        modules = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.phases.append((name, seconds, len(sys.modules) - modules))
+            metrics.observe(f"startup.{name}", seconds)
+
+    def report(self) -> str:
+        lines = [f"{'phase':<14}{'ms':>9}{'imports':>9}"]
+        for name, seconds, imports in self.phases:
+            lines.append(f"{name:<14}{seconds * 1000:>9.1f}{imports:>9}")
+        total = sum(seconds for _, seconds, _ in self.phases)
+        lines.append(f"{'total':<14}{total * 1000:>9.1f}{sum(imports for _, _, imports in self.phases):>9}")
+        return "\n".join(lines)
@@ -84,6 +84,16 @@ document.addEventListener("DOMContentLoaded", () => {
       });
     });
 
+  document
+    .getElementById("select-notification-mode")
+    ?.addEventListener("change", async (e) => {
+      await fetch("/api/user/notifications", {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ mode: e.target.value }),
+      });
+    });
+
   document.querySelectorAll("[data-item-toggle]").forEach((toggle) => {
     toggle.addEventListener("change", async (e) => {
       const itemId = e.target.dataset.itemId;
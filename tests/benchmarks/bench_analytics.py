@@ -0,0 +1,103 @@
+"""Benchmark the vectorized price analytics against a per-row Python loop.
+
+Seeds items with a price a day, then computes the dashboard statistics for
+batches of 10, 100 and 1000 items: once with `ptracker.analytics.item_stats`
+and once by loading each item's PriceHistory rows as ORM objects and looping
+over them in Python.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_analytics --sizes 10 100 1000 --days 365
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.analytics import item_stats
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory
+
+
+def naive_stats(item_ids: list[int], now: datetime) -> dict[int, dict]:
+    """The per-row baseline: one query per item, then plain Python over ORM rows"""
+    results = {}
+    for item_id in item_ids:
+        item = db.session.get(Item, item_id)
+        rows = PriceHistory.query.filter_by(item_id=item_id).order_by(PriceHistory.timestamp).all()
+        prices = [row.price for row in rows]
+        recent = {
+            days: [row.price for row in rows if row.timestamp >= now - timedelta(days=days)] for days in (7, 30, 90)
+        }
+        returns = [(b - a) / a for a, b in zip(recent[30], recent[30][1:]) if a]
+        results[item_id] = {
+            "avg_7d": statistics.mean(recent[7]) if recent[7] else None,
+            "avg_30d": statistics.mean(recent[30]) if recent[30] else None,
+            "min_30d": min(recent[30], default=None),
+            "max_30d": max(recent[30], default=None),
+            "min_90d": min(recent[90], default=None),
+            "max_90d": max(recent[90], default=None),
+            "volatility_30d": statistics.stdev(returns) * 100 if len(returns) > 1 else None,
+            "all_time_low": min(prices, default=None),
+            "is_all_time_low": bool(prices) and item.current_price <= min(prices),
+            "pct_off_high": (max(prices) - item.current_price) / max(prices) * 100 if prices else None,
+        }
+    return results
+
+
+def seed(items: int, days: int, now: datetime) -> list[int]:
+    start = len(db.session.query(Item.id).all())
+    new_items = [
+        Item(vendor="mock", external_id=str(start + i), url=f"https://mock.com/items/{start + i}", current_price=50.0)
+        for i in range(items)
+    ]
+    db.session.add_all(new_items)
+    db.session.flush()
+
+    rows = []
+    for item in new_items:
+        price = 50.0
+        for day in range(days, -1, -1):
+            price = max(1.0, price * random.uniform(0.97, 1.03))
+            rows.append({"item_id": item.id, "price": price, "timestamp": now - timedelta(days=day)})
+        item.current_price = price
+    db.session.execute(insert(PriceHistory), rows)
+    db.session.commit()
+    return [item.id for item in new_items]
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+        db.session.expunge_all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=365, help="days of history per item")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+
+        print(f"{'items':>6}{'per-row':>12}{'numpy':>12}{'speedup':>9}")
+        for size in args.sizes:
+            item_ids = seed(size, args.days, now)
+            naive_ms = timed(lambda: naive_stats(item_ids, now), args.repeat)
+            numpy_ms = timed(lambda: item_stats(item_ids, now=now), args.repeat)
+            print(f"{size:>6}{naive_ms:>10.2f}ms{numpy_ms:>10.2f}ms{naive_ms / numpy_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
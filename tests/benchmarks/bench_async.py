@@ -0,0 +1,174 @@
+"""Load test concurrent `POST /api/items/add` in the sync and async serving modes.
+
+Items are tracked from the eBay source, pointed at a local stub server that
+answers every item lookup after a fixed latency. The sync mode serves the
+requests with `--workers` threads, each one request at a time like a gunicorn
+sync worker, blocked on the eBay session while it waits. The async mode sends
+them all to one process of the ASGI app (`ptracker.asgi`), at most
+`--concurrency` in flight, which awaits the fetches with the source's async
+client on its event loop. Both modes share at most `--connections` connections
+to the stub (EBAY_POOL_SIZE). Reports throughput and p50/p99 latency.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_async --requests 200 --latency 0.2 --workers 4 --connections 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from werkzeug.security import generate_password_hash
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.asgi import AsyncApp
+from ptracker.datasources import DataSourceFactory, EbayDataSource
+from ptracker.extensions import db
+from ptracker.models import User
+from tests.benchmarks.bench_ebay_http import StubEbayHandler
+
+EMAIL, PASSWORD = "loadtest@example.com", "loadtest"
+
+
+class SlowStubEbayHandler(StubEbayHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def build_app(base_url: str, connections: int):
+    class LoadTestConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_async.db')}"
+
+    app = create_app(LoadTestConfig)
+    DataSourceFactory.register("ebay", EbayDataSource("key", "secret", pool_size=connections, base_url=base_url))
+    with app.app_context():
+        db.session.add(User(username="loadtest", email=EMAIL, password_hash=generate_password_hash(PASSWORD)))
+        db.session.commit()
+    return app
+
+
+def login(client):
+    client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    return client
+
+
+def summary(latencies: list[float], elapsed: float) -> dict:
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {"rps": len(latencies) / elapsed, "p50": percentiles[49] * 1000, "p99": percentiles[98] * 1000}
+
+
+def run_sync(app, requests: int, workers: int) -> dict:
+    local = threading.local()
+
+    def track(i: int) -> float:
+        if not hasattr(local, "client"):
+            local.client = login(app.test_client())
+        started = time.perf_counter()
+        res = local.client.post("/api/items/add", json={"url": f"https://www.ebay.com/itm/{i}", "target_price": 50})
+        assert res.status_code == 201, res.status_code
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(track, range(requests)))
+    return summary(latencies, time.perf_counter() - started)
+
+
+async def asgi_post(app, path: str, body: dict, cookie: str) -> int:
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"cookie", cookie.encode()),
+        ],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+def run_async(app, requests: int, concurrency: int) -> dict:
+    asgi_app = AsyncApp(app)
+    cookie = f"session={login(app.test_client()).get_cookie('session').value}"
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def track(i: int) -> float:
+            async with slots:
+                started = time.perf_counter()
+                body = {"url": f"https://www.ebay.com/itm/{i}", "target_price": 50}
+                status = await asgi_post(asgi_app, "/api/items/add", body, cookie)
+                assert status == 201, status
+                return time.perf_counter() - started
+
+        return await asyncio.gather(*(track(i) for i in range(requests)))
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return summary(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub takes per item lookup")
+    parser.add_argument("--workers", type=int, default=4, help="sync workers")
+    parser.add_argument("--concurrency", type=int, default=100, help="async requests in flight")
+    parser.add_argument("--connections", type=int, default=20, help="eBay connection pool size")
+    args = parser.parse_args()
+
+    SlowStubEbayHandler.latency = args.latency
+    server = StubServer(("127.0.0.1", 0), SlowStubEbayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{'mode':<8}{'req/s':>9}{'p50':>11}{'p99':>11}   ({args.requests} requests, {args.latency}s fetches)")
+    for mode, run, limit in (("sync", run_sync, args.workers), ("async", run_async, args.concurrency)):
+        app = build_app(base_url, args.connections)
+        result = run(app, args.requests, limit)
+        with app.app_context():
+            db.engine.dispose()
+        print(f"{mode:<8}{result['rps']:>9.1f}{result['p50']:>9.1f}ms{result['p99']:>9.1f}ms")
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark target price crossing detection as the number of price changes grows.
+
+Seeds a fixed set of items and subscriptions, then compares the previous
+notify pass (re-evaluating every subscription against its item's latest two
+history rows) with the event-driven one that only loads the subscriptions of
+the items whose price moved and bisects their sorted targets.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_crossings --items 2000 --subscribers 10 --changes 0 10 100 1000
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy.orm import contains_eager
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory, User, UserItem
+from ptracker.price_tracking.crossings import PriceChange
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def legacy_crossings() -> list:
+    """The full-scan implementation, kept here as the baseline"""
+    previous_price = (
+        db.session.query(PriceHistory.price)
+        .filter(PriceHistory.item_id == Item.id)
+        .order_by(PriceHistory.timestamp.desc())
+        .offset(1)
+        .limit(1)
+        .correlate(Item)
+        .scalar_subquery()
+    )
+    rows = (
+        db.session.query(UserItem, previous_price)
+        .join(UserItem.user)
+        .join(UserItem.item)
+        .options(contains_eager(UserItem.user), contains_eager(UserItem.item))
+        .filter(User.notifications_enabled.is_(True), UserItem.notifications_enabled.is_(True))
+        .filter(Item.current_price.isnot(None))
+        .all()
+    )
+    return [
+        ui
+        for ui, prev_price in rows
+        if prev_price is not None and prev_price > ui.target_price and ui.item.current_price <= ui.target_price
+    ]
+
+
+def seed(items: int, subscribers: int):
+    users = [User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash="x") for i in range(subscribers)]
+    db.session.add_all(users)
+    service = PriceTrackerService()
+    for i in range(items):
+        item = Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}")
+        db.session.add(item)
+        db.session.flush()
+        service._record_price(item, 100.0)
+        service._record_price(item, 100.0)
+        for user in users:
+            db.session.add(UserItem(user_id=user.id, item_id=item.id, target_price=random.uniform(50, 100)))
+    db.session.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+        db.session.expunge_all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--subscribers", type=int, default=10, help="subscriptions per item")
+    parser.add_argument("--changes", type=int, nargs="+", default=[0, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        seed(args.items, args.subscribers)
+        service = PriceTrackerService()
+        legacy_ms = timed(legacy_crossings, args.repeat)
+
+        print(f"{args.items * args.subscribers:,} subscriptions, full scan {legacy_ms:.2f}ms")
+        print(f"{'changes':>8}{'events':>12}{'speedup':>9}")
+        for count in args.changes:
+            changes = [
+                PriceChange(item_id=item_id, previous_price=100.0, price=random.uniform(40, 100))
+                for item_id in random.sample(range(1, args.items + 1), min(count, args.items))
+            ]
+            events_ms = timed(lambda: service._find_target_price_crossings(changes), args.repeat)
+            print(f"{count:>8}{events_ms:>10.2f}ms{legacy_ms / max(events_ms, 1e-6):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark the dashboard read path for users tracking 10, 100 and 1000 items.
+
+Compares the single-query loader behind get_user_tracked_items with the
+previous implementation (lazy-loaded relationships plus one price-change
+query per item), reporting latency and statement count.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_dashboard --sizes 10 100 1000
+"""
+
+import argparse
+import time
+
+from sqlalchemy import event
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory, User, UserItem
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def legacy_tracked_items(user_id: int):
+    """The pre-loader implementation, kept here as the baseline"""
+    user = db.session.get(User, user_id)
+    result = []
+    for user_item in user.tracked_items:
+        prev = (
+            PriceHistory.query.filter_by(item_id=user_item.item.id)
+            .order_by(PriceHistory.timestamp.desc())
+            .offset(1)
+            .first()
+        )
+        change = round((user_item.item.current_price - prev.price) / prev.price * 100, 2) if prev else 0.0
+        result.append({"item": user_item.item, "target_price": user_item.target_price, "price_change": change})
+    return result
+
+
+def seed(size: int) -> int:
+    user = User(username=f"bench{size}", email=f"bench{size}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+
+    service = PriceTrackerService()
+    for i in range(size):
+        item = Item(vendor="mock", external_id=f"{size}-{i}", url=f"https://mock.com/items/{size}-{i}", name=str(i))
+        db.session.add(item)
+        db.session.flush()
+        service._record_price(item, 100.0)
+        service._record_price(item, 90.0)
+        db.session.add(UserItem(user_id=user.id, item_id=item.id, target_price=50.0))
+    db.session.commit()
+    return user.id
+
+
+def measure(fn, user_id: int, repeat: int) -> tuple[float, int]:
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(user_id)
+        db.session.expunge_all()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    event.remove(db.engine, "before_cursor_execute", count)
+    return elapsed, statements // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        service = PriceTrackerService()
+
+        print(f"{'items':>6}{'legacy':>12}{'queries':>9}{'loader':>12}{'queries':>9}{'speedup':>9}")
+        for size in args.sizes:
+            user_id = seed(size)
+            legacy_ms, legacy_queries = measure(legacy_tracked_items, user_id, args.repeat)
+            loader_ms, loader_queries = measure(service.get_user_tracked_items, user_id, args.repeat)
+            print(
+                f"{size:>6}{legacy_ms:>10.2f}ms{legacy_queries:>9}{loader_ms:>10.2f}ms{loader_queries:>9}"
+                f"{legacy_ms / loader_ms:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Micro-benchmark per-fetch latency of EbayDataSource against a local stub server.
+
+Compares a fresh connection per request (what module-level ``requests.get``
+did) with the pooled keep-alive session. The stub speaks plain HTTP, so the
+saved TLS handshake against the real API is not even included here.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_ebay_http --requests 500 --threads 8
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from ptracker.datasources import EbayDataSource
+
+
+class StubEbayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubEbayHandler.lock:
+            StubEbayHandler.connections += 1
+
+    def _send_json(self, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send_json({"access_token": "stub-token", "expires_in": 7200})
+
+    def do_GET(self):
+        legacy_id = unquote(self.path).split("|")[1]
+        self._send_json(
+            {
+                "legacyItemId": legacy_id,
+                "title": f"Stub item {legacy_id}",
+                "price": {"value": "19.99", "currency": "USD"},
+                "itemWebUrl": f"https://www.ebay.com/itm/{legacy_id}",
+                "estimatedAvailabilities": [
+                    {"estimatedAvailabilityStatus": "IN_STOCK", "estimatedRemainingQuantity": 1}
+                ],
+            }
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def measure(base_url: str, requests: int, threads: int, keep_alive: bool) -> tuple[list[float], int]:
+    source = EbayDataSource("key", "secret", pool_size=threads, keep_alive=keep_alive, base_url=base_url)
+    source._get_token()
+    StubEbayHandler.connections = 0
+
+    def fetch(i: int) -> float:
+        started = time.perf_counter()
+        source.fetch_product(str(i))
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(fetch, range(requests)))
+
+    source.close()
+    return latencies, StubEbayHandler.connections
+
+
+def report(label: str, latencies: list[float], connections: int):
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1000
+    mean = statistics.mean(latencies) * 1000
+    print(f"  {label:<12} mean={mean:6.2f}ms  p50={p50:6.2f}ms  p99={p99:6.2f}ms  connections={connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), StubEbayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{args.requests} fetches over {args.threads} threads")
+    report("no pooling", *measure(base_url, args.requests, args.threads, keep_alive=False))
+    report("pooled", *measure(base_url, args.requests, args.threads, keep_alive=True))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Load test `GET /api/items` under each database pooling mode (DB_POOL).
+
+Seeds a user tracking a few items, then has concurrent clients (threads, each
+with its own logged in test client) request the dashboard API and reports
+p50/p99 latency, throughput, the connections opened and the pool checkout wait.
+The response and user caches are off so every request reaches the database.
+
+Point it at a local Postgres (or a PgBouncer in front of one) for numbers that
+mean something; the default is a SQLite file stand-in. The database must be
+disposable, the tables are created and seeded if they're missing.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_pool --clients 8 --requests 200
+    python -m tests.benchmarks.bench_pool --db-uri postgresql://localhost/ptracker_bench --modes queue null
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import Item, User, UserItem
+from ptracker.pooling import POOL_MODES
+from ptracker.price_tracking.service import PriceTrackerService
+
+EMAIL, PASSWORD = "loadtest@example.com", "loadtest"
+
+
+def build_app(db_uri: str, mode: str, clients: int):
+    class LoadTestConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = db_uri
+        DB_POOL = mode
+        DB_POOL_SIZE = clients
+        CACHE_TTL = 0
+        USER_CACHE_TTL = 0
+
+    return create_app(LoadTestConfig)
+
+
+def seed(items: int):
+    if db.session.query(User.id).filter_by(email=EMAIL).first():
+        return
+    user = User(username="loadtest", email=EMAIL, password_hash=generate_password_hash(PASSWORD))
+    db.session.add(user)
+    db.session.flush()
+
+    service = PriceTrackerService()
+    for i in range(items):
+        item = Item(vendor="mock", external_id=f"load-{i}", url=f"https://mock.com/items/load-{i}", name=str(i))
+        db.session.add(item)
+        db.session.flush()
+        service._record_price(item, 100.0)
+        service._record_price(item, 90.0)
+        db.session.add(UserItem(user_id=user.id, item_id=item.id, target_price=50.0))
+    db.session.commit()
+
+
+def run_client(app, requests: int, start: threading.Barrier, latencies: list[float]):
+    client = app.test_client()
+    client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    start.wait()
+    for _ in range(requests):
+        started = time.perf_counter()
+        res = client.get("/api/items")
+        latencies.append(time.perf_counter() - started)
+        assert res.status_code == 200, res.status_code
+
+
+def load_test(app, clients: int, requests: int) -> dict:
+    latencies = []
+    start = threading.Barrier(clients + 1)
+    threads = [threading.Thread(target=run_client, args=(app, requests, start, latencies)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    metrics.reset()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    pool = metrics.snapshot("db.pool.")
+    wait = pool["timings"].get("db.pool.checkout_wait", {"avg": 0.0, "max": 0.0})
+    return {
+        "p50": percentiles[49] * 1000,
+        "p99": percentiles[98] * 1000,
+        "rps": len(latencies) / elapsed,
+        "connects": int(pool["counters"].get("db.pool.connects", 0)),
+        "wait_avg": wait["avg"] * 1000,
+        "wait_max": wait["max"] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-uri", help="database to run against (default: a temporary SQLite file)")
+    parser.add_argument("--modes", nargs="+", choices=POOL_MODES, default=list(POOL_MODES))
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients, also the queue pool size")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--items", type=int, default=20, help="items tracked by the load test user")
+    args = parser.parse_args()
+
+    db_uri = args.db_uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_pool.db')}"
+
+    print(
+        f"{'mode':<10}{'p50':>10}{'p99':>10}{'req/s':>9}{'connects':>10}{'wait avg':>11}{'wait max':>11}"
+        f"   ({args.clients} clients x {args.requests} requests)"
+    )
+    for mode in args.modes:
+        app = build_app(db_uri, mode, args.clients)
+        with app.app_context():
+            db.create_all()
+            seed(args.items)
+            db.session.remove()
+        result = load_test(app, args.clients, args.requests)
+        with app.app_context():
+            db.engine.dispose()
+        print(
+            f"{mode:<10}{result['p50']:>8.2f}ms{result['p99']:>8.2f}ms{result['rps']:>9.0f}{result['connects']:>10}"
+            f"{result['wait_avg']:>9.3f}ms{result['wait_max']:>9.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
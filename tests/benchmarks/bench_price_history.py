@@ -0,0 +1,118 @@
+"""Benchmark PriceHistory read paths with and without the (item_id, timestamp) index.
+
+Seeds a large history table into a scratch SQLite database and times the
+service methods that read it, first without the history indexes and then
+with them.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_price_history --rows 2000000 --items 2000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory, User, UserItem
+from ptracker.price_tracking.service import PriceTrackerService
+
+INDEXES = ["idx_price_history_item_time", "brin_price_history_timestamp"]
+
+
+def seed(rows: int, items: int, tracked: int):
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.add_all(
+        [
+            Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}", current_price=50.0)
+            for i in range(items)
+        ]
+    )
+    db.session.flush()
+    db.session.add_all([UserItem(user_id=user.id, item_id=i + 1, target_price=45.0) for i in range(tracked)])
+    db.session.commit()
+
+    # One row per item per day, inserted day by day like the refresh job does
+    start = datetime(2020, 1, 1)
+    batch = []
+    for n in range(rows):
+        day, item_id = divmod(n, items)
+        batch.append(
+            {"item_id": item_id + 1, "price": random.uniform(40, 60), "timestamp": start + timedelta(days=day)}
+        )
+        if len(batch) == 50_000:
+            db.session.execute(insert(PriceHistory), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(insert(PriceHistory), batch)
+    db.session.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+        db.session.expire_all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def measure(items: int, repeat: int) -> dict[str, float]:
+    service = PriceTrackerService()
+    item_ids = random.sample(range(1, items + 1), repeat)
+    picks = iter(item_ids * 3)
+
+    return {
+        "get_item": timed(lambda: service.get_item(next(picks)), repeat),
+        "calculate_price_change": timed(
+            lambda: service.calculate_price_change(db.session.get(Item, next(picks))), repeat
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--tracked", type=int, default=200, help="items with a subscriber")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        started = time.perf_counter()
+        seed(args.rows, args.items, args.tracked)
+        print(f"Seeded {args.rows:,} history rows for {args.items:,} items in {time.perf_counter() - started:.1f}s")
+
+        for name in INDEXES:
+            db.session.execute(text(f"DROP INDEX {name}"))
+        db.session.commit()
+        without = measure(args.items, args.repeat)
+
+        for index in PriceHistory.__table__.indexes:
+            index.create(db.engine)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        with_index = measure(args.items, args.repeat)
+
+        print(f"{'query':<26}{'no index':>12}{'indexed':>12}{'speedup':>10}")
+        for name, before in without.items():
+            after = with_index[name]
+            print(f"{name:<26}{before:>10.2f}ms{after:>10.2f}ms{before / after:>9.1f}x")
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark the concurrent refresh engine against a serial refresh.
+
+Uses a latency-injecting MockDataSource so the numbers reflect time spent
+waiting on the vendor API rather than on SQLite.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_refresh --items 500 --latency 0.05
+"""
+
+import argparse
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.datasources import DataSourceFactory, MockDataSource
+from ptracker.extensions import db
+from ptracker.models import Item, User, UserItem
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def seed(count: int):
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+
+    items = [Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}") for i in range(count)]
+    db.session.add_all(items)
+    db.session.flush()
+    db.session.add_all([UserItem(user_id=user.id, item_id=item.id, target_price=50.0) for item in items])
+    db.session.commit()
+
+
+def run(app, concurrency: int) -> float:
+    app.config["REFRESH_CONCURRENCY"] = concurrency
+    app.config["REFRESH_VENDOR_CONCURRENCY"] = {}
+
+    # Make every item stale again
+    db.session.query(Item).update({Item.last_fetched: None})
+    db.session.commit()
+
+    stats = PriceTrackerService().update_all_tracked_items()
+    assert stats.failed == 0, stats.errors
+    return stats.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per mock fetch")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        DataSourceFactory.register("mock", MockDataSource(latency=args.latency))
+        seed(args.items)
+
+        print(f"{args.items} items, {args.latency * 1000:.0f}ms per fetch")
+        baseline = None
+        for concurrency in args.concurrency:
+            elapsed = run(app, concurrency)
+            baseline = baseline or elapsed
+            print(
+                f"  concurrency={concurrency:<3} {elapsed:8.2f}s  "
+                f"{args.items / elapsed:8.1f} items/s  {baseline / elapsed:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
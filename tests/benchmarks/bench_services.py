@@ -0,0 +1,71 @@
+"""Benchmark the per-request cost of service setup on routes that use no service.
+
+Compares the lazy service registry with the previous `before_request` hook,
+which imported and built AuthService, PriceTrackerService and a JobQueue for
+every request, on a bare route, a static file and an anonymous page.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_services --requests 2000 --rounds 5
+"""
+
+import argparse
+import time
+
+from flask import current_app, g
+
+from config import TestingConfig
+from ptracker import create_app
+
+
+def legacy_setup_services():
+    """The previous hook, kept here as the baseline"""
+    from ptracker.auth.service import AuthService
+    from ptracker.price_tracking.service import PriceTrackerService
+    from ptracker.jobs import get_job_queue
+
+    g.auth_service = AuthService()
+    g.price_service = PriceTrackerService()
+    g.job_queue = get_job_queue(current_app)
+
+
+def build_app(legacy: bool):
+    app = create_app(TestingConfig)
+    if legacy:
+        app.before_request(legacy_setup_services)
+    app.add_url_rule("/bench/ping", "bench_ping", lambda: "ok")
+    return app
+
+
+def measure(app, path: str, requests: int) -> float:
+    client = app.test_client()
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def best_of(apps: dict, path: str, requests: int, rounds: int) -> list[float]:
+    """Fastest round of each app, alternating between them so drift affects both alike"""
+    timings = {name: [] for name in apps}
+    for _ in range(rounds):
+        for name, app in apps.items():
+            timings[name].append(measure(app, path, requests))
+    return [min(values) for values in timings.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    apps = {"hook": build_app(legacy=True), "lazy": build_app(legacy=False)}
+
+    print(f"{'route':<24}{'hook':>12}{'lazy':>12}{'saved':>12}")
+    for path in ["/bench/ping", "/static/resets.css", "/auth/forgot-password"]:
+        hook_us, lazy_us = best_of(apps, path, args.requests, args.rounds)
+        print(f"{path:<24}{hook_us:>10.1f}us{lazy_us:>10.1f}us{hook_us - lazy_us:>10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import pytest
+from flask import g, request_finished, request_started
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 
 from ptracker import create_app
@@ -19,6 +21,57 @@ def app():
         db.engine.dispose()
 
 
+class QueryCounter:
+    """Counts SQL statements executed against an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def count_queries(app):
+    """Usage: `with count_queries() as counter: ...` then check `counter.count`"""
+    return lambda: QueryCounter(db.engine)
+
+
+@pytest.fixture
+def request_queries(app):
+    """Number of queries of every request made while active, in order.
+
+    The test's app context outlives requests, so each request starts here from an
+    empty identity map and no loaded user, as it does when served.
+    """
+    counts = []
+    counter = QueryCounter(db.engine)
+
+    def started(sender, **extra):
+        db.session.expunge_all()
+        g.pop("_login_user", None)
+        counter.count = 0
+        counter.__enter__()
+
+    def finished(sender, response, **extra):
+        counter.__exit__()
+        counts.append(counter.count)
+
+    request_started.connect(started, app)
+    request_finished.connect(finished, app)
+    yield counts
+    request_started.disconnect(started, app)
+    request_finished.disconnect(finished, app)
+
+
 @pytest.fixture
 def client(app):
     with app.test_client() as client:
@@ -68,6 +121,20 @@ def auth_client_demo(client):
     return login_client(client, user.email, "demo123")
 
 
+@pytest.fixture
+def auth_client_admin(client):
+    user = User(
+        username="admin_user",
+        email="admin@example.com",
+        role="admin",
+        password_hash=generate_password_hash("admin123"),
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    return login_client(client, user.email, "admin123")
+
+
 @pytest.fixture
 def item_no_history(app):
     item = Item(vendor="mock", external_id="123", url="https://mock.com/items/123", current_price=100.0)
@@ -83,6 +150,7 @@ def item_no_history(app):
 
 @pytest.fixture
 def item_with_history(item_no_history):
+    item_no_history.previous_price = item_no_history.current_price
     item_no_history.current_price = 90
     db.session.flush()
 
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+import requests
+
+from ptracker.datasources import (
+    DataSource,
+    DataSourceError,
+    EbayDataSource,
+    MockDataSource,
+    ProductNotFoundError,
+    RateLimitError,
+)
+
+
+def _ebay_item(legacy_id, price="10.00"):
+    return {
+        "legacyItemId": legacy_id,
+        "title": f"Item {legacy_id}",
+        "price": {"value": price, "currency": "USD"},
+        "itemWebUrl": f"https://www.ebay.com/itm/{legacy_id}",
+        "estimatedAvailabilities": [{"estimatedAvailabilityStatus": "IN_STOCK", "estimatedRemainingQuantity": 3}],
+    }
+
+
+@pytest.fixture
+def ebay(mocker):
+    source = EbayDataSource(api_key="key", api_secret="secret")
+    mocker.patch.object(source, "_get_token", return_value="token")
+    return source
+
+
+def _response(mocker, status_code=200, json=None, text=""):
+    response = mocker.MagicMock(status_code=status_code, text=text)
+    response.json.return_value = json or {}
+    return response
+
+
+class SingleItemSource(MockDataSource):
+    """Data source without a bulk endpoint or an async client"""
+
+    fetch_products = DataSource.fetch_products
+    fetch_product_async = DataSource.fetch_product_async
+
+    def fetch_product(self, identifier):
+        if identifier == "missing":
+            raise ProductNotFoundError("gone")
+        return super().fetch_product(identifier)
+
+
+def test_default_fetch_products_falls_back_to_fetch_product():
+    results = SingleItemSource().fetch_products(["1", "missing", "2"])
+
+    assert results["1"].external_id == "1"
+    assert results["2"].external_id == "2"
+    assert isinstance(results["missing"], ProductNotFoundError)
+
+
+def test_default_fetch_product_async_runs_fetch_product_on_a_thread(mocker):
+    source = SingleItemSource()
+    fetch = source.fetch_product
+    threads = []
+    mocker.patch.object(
+        source, "fetch_product", side_effect=lambda i: threads.append(threading.get_ident()) or fetch(i)
+    )
+
+    snapshot = asyncio.run(source.fetch_from_url_async("https://mock.com/items/7"))
+
+    assert snapshot.external_id == "7"
+    assert len(threads) == 1 and threads[0] != threading.get_ident()
+    with pytest.raises(ProductNotFoundError):
+        asyncio.run(source.fetch_product_async("missing"))
+
+
+def test_ebay_fetch_products_chunks_requests(ebay, mocker):
+    identifiers = [str(i) for i in range(45)]
+
+    def request(method, url, timeout, headers, params):
+        rest_ids = params["item_ids"].split(",")
+        items = [_ebay_item(rest_id.split("|")[1]) for rest_id in rest_ids]
+        return _response(mocker, json={"items": items})
+
+    get_mock = mocker.patch.object(ebay._session, "request", side_effect=request)
+
+    results = ebay.fetch_products(identifiers)
+
+    assert get_mock.call_count == 3
+    assert [len(c.kwargs["params"]["item_ids"].split(",")) for c in get_mock.call_args_list] == [20, 20, 5]
+    assert set(results) == set(identifiers)
+    assert all(results[i].external_id == i for i in identifiers)
+
+
+def test_ebay_fetch_products_marks_missing_items(ebay, mocker):
+    mocker.patch.object(
+        ebay._session,
+        "request",
+        return_value=_response(mocker, json={"items": [_ebay_item("1")], "warnings": [{"errorId": 11001}]}),
+    )
+
+    results = ebay.fetch_products(["1", "2"])
+
+    assert results["1"].price == 10.0
+    assert isinstance(results["2"], ProductNotFoundError)
+
+
+@pytest.mark.parametrize(
+    "status_code, error",
+    [(429, RateLimitError), (500, DataSourceError)],
+    ids=["rate_limited", "server_error"],
+)
+def test_ebay_fetch_products_fails_whole_chunk(ebay, mocker, status_code, error):
+    mocker.patch.object(ebay._session, "request", return_value=_response(mocker, status_code))
+
+    results = ebay.fetch_products(["1", "2"])
+
+    assert all(isinstance(results[i], error) for i in ["1", "2"])
+
+
+def test_ebay_requests_use_pooled_session_with_timeouts(mocker):
+    source = EbayDataSource(api_key="key", api_secret="secret", connect_timeout=1.5, read_timeout=4.0)
+    token = _response(mocker, json={"access_token": "token", "expires_in": 7200})
+    request_mock = mocker.patch.object(
+        source._session, "request", side_effect=[token, _response(mocker, json=_ebay_item("1"))]
+    )
+    module_get = mocker.patch("ptracker.datasources.ebay.requests.get")
+
+    snapshot = source.fetch_product("1")
+
+    assert snapshot.external_id == "1"
+    assert request_mock.call_count == 2
+    assert all(c.kwargs["timeout"] == (1.5, 4.0) for c in request_mock.call_args_list)
+    module_get.assert_not_called()
+
+
+def test_ebay_wraps_transport_errors(ebay, mocker):
+    mocker.patch.object(ebay._session, "request", side_effect=requests.Timeout("read timed out"))
+
+    with pytest.raises(DataSourceError, match="read timed out"):
+        ebay.fetch_product("1")
+
+
+def test_ebay_token_is_fetched_once_across_threads(mocker):
+    source = EbayDataSource(api_key="key", api_secret="secret")
+    token = _response(mocker, json={"access_token": "token", "expires_in": 7200})
+    request_mock = mocker.patch.object(source._session, "request", return_value=token)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tokens = list(pool.map(lambda _: source._get_token(), range(16)))
+
+    assert set(tokens) == {"token"}
+    assert request_mock.call_count == 1
+
+
+def test_ebay_fetch_product_async_uses_the_async_client(mocker):
+    source = EbayDataSource(api_key="key", api_secret="secret", connect_timeout=1.5, read_timeout=4.0)
+    mocker.patch.object(source._session, "request", side_effect=AssertionError("blocking request"))
+    in_flight = 5
+
+    async def run():
+        arrived = asyncio.Barrier(in_flight)
+
+        async def request(method, url, **kwargs):
+            if method == "POST":
+                return httpx.Response(200, json={"access_token": "token", "expires_in": 7200})
+            # Every fetch waits until all are in flight, which only happens if none blocks the loop
+            await asyncio.wait_for(arrived.wait(), timeout=5)
+            return httpx.Response(200, json=_ebay_item(url.split("|")[1]))
+
+        mocker.patch.object(httpx.AsyncClient, "request", side_effect=request)
+        snapshots = await asyncio.gather(*(source.fetch_product_async(str(i)) for i in range(in_flight)))
+        client, _ = await source._client()
+        return snapshots, client
+
+    snapshots, client = asyncio.run(run())
+
+    assert [snapshot.external_id for snapshot in snapshots] == [str(i) for i in range(in_flight)]
+    calls = httpx.AsyncClient.request.call_args_list
+    # The token is fetched once for all of them
+    assert [c.args[0] for c in calls].count("POST") == 1
+    assert all(c.kwargs["headers"]["Authorization"] == "Bearer token" for c in calls if c.args[0] == "GET")
+    assert client.timeout == httpx.Timeout(4.0, connect=1.5)
+
+
+def test_ebay_async_clients_are_closed_with_their_event_loop():
+    source = EbayDataSource(api_key="key", api_secret="secret")
+
+    async def client():
+        client, _ = await source._client()
+        assert (await source._client())[0] is client
+        return client
+
+    first, second = asyncio.run(client()), asyncio.run(client())
+
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+def test_ebay_fetch_product_async_errors_match_fetch_product(ebay, mocker):
+    mocker.patch.object(ebay, "_get_token_async", return_value="token")
+    responses = [httpx.Response(404), httpx.Response(429, headers={"Retry-After": "5"}), httpx.ConnectTimeout("slow")]
+    mocker.patch.object(httpx.AsyncClient, "request", side_effect=responses)
+
+    with pytest.raises(ProductNotFoundError):
+        asyncio.run(ebay.fetch_product_async("1"))
+    with pytest.raises(RateLimitError) as excinfo:
+        asyncio.run(ebay.fetch_product_async("1"))
+    assert excinfo.value.retry_after == 5.0
+    with pytest.raises(DataSourceError, match="slow"):
+        asyncio.run(ebay.fetch_product_async("1"))
@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+
+from ptracker.datasources import (
+    EbayDataSource,
+    MockDataSource,
+    QuotaExceededError,
+    RateLimitError,
+    RequestScheduler,
+    ScheduledDataSource,
+    TokenBucket,
+)
+from ptracker.metrics import metrics
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the scheduler sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _scheduler(clock, **kwargs):
+    kwargs.setdefault("qps", 2)
+    return RequestScheduler("mock", clock=clock, sleep=clock.sleep, async_sleep=clock.async_sleep, **kwargs)
+
+
+def test_token_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_scheduler_paces_requests_to_qps(clock):
+    scheduler = _scheduler(clock, qps=4, burst=1)
+
+    for _ in range(9):
+        scheduler.call(lambda: None)
+
+    # One request per 250ms once the single-token burst is spent
+    assert clock.now == pytest.approx(2.0)
+    assert metrics.snapshot()["counters"]["datasource.mock.requests"] == 9
+
+
+def test_scheduler_honours_retry_after(clock):
+    scheduler = _scheduler(clock, qps=100)
+    responses = iter([RateLimitError("slow down", retry_after=7), "ok"])
+
+    def fetch():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert scheduler.call(fetch) == "ok"
+    assert clock.now == pytest.approx(7.0)
+    counters = metrics.snapshot()["counters"]
+    assert counters["datasource.mock.throttled"] == 1
+    assert counters["datasource.mock.retries"] == 1
+
+
+def test_scheduler_backs_off_exponentially_with_jitter(clock):
+    scheduler = _scheduler(clock, qps=1000, max_retries=3, backoff_base=1.0)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        raise RateLimitError("slow down")
+
+    with pytest.raises(RateLimitError):
+        scheduler.call(fetch)
+
+    assert len(calls) == 4
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    for attempt, gap in enumerate(gaps):
+        cap = 2**attempt
+        assert cap / 2 <= gap <= cap + 0.01
+
+
+def test_backoff_is_capped(clock):
+    scheduler = _scheduler(clock, backoff_base=1.0, backoff_max=5.0)
+
+    assert all(2.5 <= scheduler.backoff(10) <= 5.0 for _ in range(20))
+
+
+def test_retry_after_pauses_other_requests_to_the_vendor(clock):
+    scheduler = _scheduler(clock, qps=100)
+    scheduler._pause(30)
+
+    scheduler.call(lambda: None)
+
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_daily_quota_stops_requests_and_is_reported(clock):
+    scheduler = _scheduler(clock, qps=100, daily_quota=2)
+    calls = []
+
+    scheduler.call(calls.append, 1)
+    scheduler.call(calls.append, 2)
+    with pytest.raises(QuotaExceededError):
+        scheduler.call(calls.append, 3)
+
+    assert calls == [1, 2]
+    snapshot = metrics.snapshot("datasource.mock")
+    assert snapshot["gauges"]["datasource.mock.quota_used"] == 2
+    assert snapshot["gauges"]["datasource.mock.quota_remaining"] == 0
+    assert snapshot["counters"]["datasource.mock.quota_rejected"] == 1
+    assert snapshot["timings"]["datasource.mock.wait_seconds"]["count"] == 2
+
+
+def test_scheduled_source_retries_throttled_batches(clock, mocker):
+    source = MockDataSource()
+    scheduled = ScheduledDataSource(source, _scheduler(clock, qps=100))
+    throttled = {"1": RateLimitError("slow down", retry_after=2), "2": RateLimitError("slow down", retry_after=2)}
+    spy = mocker.patch.object(
+        source,
+        "fetch_products",
+        side_effect=[throttled, {"1": source.fetch_product("1"), "2": source.fetch_product("2")}],
+    )
+
+    results = scheduled.fetch_products(["1", "2"])
+
+    assert spy.call_count == 2
+    assert results["1"].external_id == "1"
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_scheduled_source_awaits_its_slot_for_async_fetches(clock, mocker):
+    source = MockDataSource()
+    blocking_sleep = mocker.Mock(side_effect=AssertionError("blocked the event loop"))
+    scheduler = RequestScheduler("mock", qps=100, clock=clock, sleep=blocking_sleep, async_sleep=clock.async_sleep)
+    scheduled = ScheduledDataSource(source, scheduler)
+    fetch = mocker.patch.object(
+        source,
+        "fetch_product_async",
+        side_effect=[RateLimitError("slow down", retry_after=3), source._build_snapshot("1")],
+    )
+
+    snapshot = asyncio.run(scheduled.fetch_product_async("1"))
+
+    assert snapshot.external_id == "1" and fetch.call_count == 2
+    assert clock.sleeps == [pytest.approx(3.0)]
+    assert metrics.snapshot()["counters"]["datasource.mock.retries"] == 1
+
+
+def test_scheduled_source_reports_exhausted_quota_per_identifier(clock):
+    scheduled = ScheduledDataSource(MockDataSource(), _scheduler(clock, qps=100, daily_quota=0))
+
+    results = scheduled.fetch_products(["1", "2"])
+
+    assert all(isinstance(result, QuotaExceededError) for result in results.values())
+
+
+def test_ebay_rate_limit_carries_retry_after(mocker):
+    source = EbayDataSource(api_key="key", api_secret="secret")
+    mocker.patch.object(source, "_get_token", return_value="token")
+    response = mocker.MagicMock(status_code=429, headers={"Retry-After": "12"})
+    mocker.patch.object(source, "_request", return_value=response)
+
+    with pytest.raises(RateLimitError) as excinfo:
+        source.fetch_product("123")
+
+    assert excinfo.value.retry_after == 12.0
+
+
+def test_init_datasources_schedules_configured_vendors(app):
+    from ptracker.datasources import DataSourceFactory, init_datasources
+
+    limits = app.config["DATASOURCE_RATE_LIMITS"]
+    app.config["DATASOURCE_RATE_LIMITS"] = {"mock": {"qps": 3, "daily_quota": 10}}
+    init_datasources(app)
+    try:
+        source = DataSourceFactory.get("mock")
+        assert isinstance(source, ScheduledDataSource)
+        assert source.scheduler.daily_quota == 10
+        assert source.fetch_product("1").external_id == "1"
+    finally:
+        app.config["DATASOURCE_RATE_LIMITS"] = limits
+        init_datasources(app)
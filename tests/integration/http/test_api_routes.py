@@ -1,4 +1,12 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from werkzeug.http import http_date
+
+from ptracker.extensions import db
+from ptracker.jobs import JobQueue
+from ptracker.models import Item, Job, PriceHistory
+from ptracker.price_tracking.service import PriceTrackerService
 
 
 class TestRegisterAPI:
@@ -156,10 +164,156 @@ class TestGetItemAPI:
         assert data["success"] is True
         assert data["data"]["id"] == item_id
 
+    def test_get_item_bounds_price_history(self, auth_client, item_no_history):
+        for price in [95.0, 90.0, 85.0]:
+            db.session.add(PriceHistory(item_id=item_no_history.id, price=price))
+        db.session.commit()
+
+        res = auth_client.get(f"/api/items/{item_no_history.id}?limit=2")
+        assert res.status_code == 200
+        history = res.get_json()["data"]["price_history"]
+        assert [point["price"] for point in history] == [85.0, 90.0]
+
+    def test_get_item_returns_daily_buckets(self, auth_client, item_no_history):
+        db.session.add(PriceHistory(item_id=item_no_history.id, price=80.0))
+        db.session.commit()
+
+        res = auth_client.get(f"/api/items/{item_no_history.id}?resolution=daily")
+        assert res.status_code == 200
+        [bucket] = res.get_json()["data"]["price_history"]
+        assert bucket["open"] == 100.0
+        assert bucket["close"] == bucket["price"] == 80.0
+        assert bucket["count"] == 2
+
     def test_get_item_requires_authentication(self, client):
         res = client.get("/api/items/1")
         assert res.status_code == 302
 
+    def test_get_item_not_modified(self, auth_client, item_no_history, count_queries):
+        item_no_history.last_fetched = datetime(2026, 6, 1, 12, 30, 15)
+        db.session.commit()
+        first = auth_client.get(f"/api/items/{item_no_history.id}")
+        assert first.headers["Last-Modified"] == "Mon, 01 Jun 2026 12:30:15 GMT"
+
+        with count_queries() as counter:
+            res = auth_client.get(f"/api/items/{item_no_history.id}", headers={"If-None-Match": first.headers["ETag"]})
+        assert res.status_code == 304
+        assert res.data == b"" and res.headers["ETag"] == first.headers["ETag"]
+        # Only the version check ran, nothing was loaded or serialized
+        assert counter.count == 1
+
+        res = auth_client.get(
+            f"/api/items/{item_no_history.id}", headers={"If-Modified-Since": first.headers["Last-Modified"]}
+        )
+        assert res.status_code == 304
+
+    def test_get_item_modified_after_fetch(self, auth_client, item_no_history):
+        item_no_history.last_fetched = datetime(2026, 6, 1, 12)
+        db.session.commit()
+        first = auth_client.get(f"/api/items/{item_no_history.id}")
+
+        db.session.get(Item, item_no_history.id).last_fetched = datetime(2026, 6, 2, 12)
+        db.session.commit()
+
+        res = auth_client.get(f"/api/items/{item_no_history.id}", headers={"If-None-Match": first.headers["ETag"]})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != first.headers["ETag"]
+        res = auth_client.get(
+            f"/api/items/{item_no_history.id}",
+            headers={
+                "If-Modified-Since": http_date(datetime(2026, 6, 1, 12, tzinfo=timezone.utc) + timedelta(hours=1))
+            },
+        )
+        assert res.status_code == 200
+
+    def test_get_item_modified_after_history_rewrite(self, auth_client, item_no_history):
+        item_no_history.last_fetched = datetime(2026, 6, 1, 12)
+        db.session.commit()
+        url = f"/api/items/{item_no_history.id}?resolution=daily"
+        first = auth_client.get(url)
+
+        PriceTrackerService().rebuild_daily_stats()
+
+        res = auth_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert res.status_code == 200
+        assert res.headers["ETag"] != first.headers["ETag"]
+        res = auth_client.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+        assert res.status_code == 200
+
+    def test_get_unknown_item_is_not_found(self, auth_client):
+        res = auth_client.get("/api/items/999", headers={"If-None-Match": '"anything"'})
+        assert res.status_code == 404
+
+
+class TestGetItemsAPI:
+    def _track(self, client, count, start=0):
+        for i in range(start, start + count):
+            client.post("/api/items/add", json={"url": f"https://mock.com/items/{i}", "target_price": 50.0})
+
+    def test_get_items_returns_all_tracked_items(self, auth_client):
+        self._track(auth_client, 3)
+
+        res = auth_client.get("/api/items")
+        assert res.status_code == 200
+        data = res.get_json()
+        assert len(data["data"]) == 3
+        assert data["next_cursor"] is None
+
+    def test_get_items_query_count_is_constant(self, auth_client, request_queries):
+        self._track(auth_client, 3)
+        small = auth_client.get("/api/items")
+        self._track(auth_client, 17, start=3)
+        large = auth_client.get("/api/items")
+
+        assert len(small.get_json()["data"]) == 3 and len(large.get_json()["data"]) == 20
+        # The list leaves out the price history, which would be loaded item by item
+        assert "price_history" not in large.get_json()["data"][0]["item"]
+        assert request_queries[3] == request_queries[-1]
+
+    def test_get_items_includes_price_stats(self, auth_client):
+        self._track(auth_client, 1)
+
+        (entry,) = auth_client.get("/api/items").get_json()["data"]
+
+        stats = entry["stats"]
+        assert stats["avg_30d"] == stats["all_time_low"] == entry["current_price"]
+        assert stats["is_all_time_low"] is True
+        assert stats["pct_off_high"] == 0.0
+
+    def test_get_items_paginates_with_cursor(self, auth_client):
+        self._track(auth_client, 5)
+
+        first = auth_client.get("/api/items?limit=3").get_json()
+        second = auth_client.get(f"/api/items?limit=3&cursor={first['next_cursor']}").get_json()
+
+        assert len(first["data"]) == 3
+        assert len(second["data"]) == 2
+        assert second["next_cursor"] is None
+        ids = [entry["item"]["id"] for entry in first["data"] + second["data"]]
+        assert len(set(ids)) == 5
+
+    def test_get_items_not_modified_until_tracking_changes(self, auth_client, auth_user):
+        self._track(auth_client, 2)
+        etag = auth_client.get("/api/items").headers["ETag"]
+
+        res = auth_client.get("/api/items", headers={"If-None-Match": etag})
+        assert res.status_code == 304
+
+        item_id = auth_client.get("/api/items").get_json()["data"][0]["item"]["id"]
+        auth_client.patch(f"/api/items/{item_id}/notifications", json={"enabled": False})
+
+        res = auth_client.get("/api/items", headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.get_json()["data"][0]["notifications_enabled"] is False
+
+    def test_get_items_rejects_unknown_sort(self, auth_client):
+        res = auth_client.get("/api/items?sort=popularity")
+        assert res.status_code == 422
+
+    def test_get_items_requires_authentication(self, client):
+        res = client.get("/api/items")
+        assert res.status_code == 302
+
 
 class TestUntrackItemAPI:
     def test_untrack_item_removes_item(self, auth_client):
@@ -187,6 +341,19 @@ class TestUpdateNotificationsAPI:
         )
         assert res.status_code == 200
 
+    def test_update_user_notification_mode(self, auth_client, auth_user):
+        res = auth_client.patch("/api/user/notifications", json={"mode": "hourly"})
+        assert res.status_code == 200
+        assert auth_user.notification_mode == "hourly"
+        assert auth_user.notifications_enabled is True
+
+        res = auth_client.get("/api/user")
+        assert res.json["data"]["notification_mode"] == "hourly"
+
+    def test_update_user_notification_mode_invalid(self, auth_client):
+        res = auth_client.patch("/api/user/notifications", json={"mode": "weekly"})
+        assert res.status_code == 400
+
     def test_update_item_notifications(self, auth_client):
         # First track an item
         res = auth_client.post(
@@ -204,6 +371,60 @@ class TestUpdateNotificationsAPI:
 
 
 class TestUpdateAllItemsAPI:
-    def test_update_all_items_endpoint(self, client):
-        res = client.get("/api/update-items")
+    def test_update_all_items_endpoint(self, auth_client):
+        res = auth_client.get("/api/update-items")
+        assert res.status_code == 202
+        job_id = res.get_json()["job_id"]
+
+        status = auth_client.get(f"/api/jobs/{job_id}")
+        assert status.status_code == 200
+        assert status.get_json()["status"] == "queued"
+        assert status.get_json()["kind"] == "refresh_items"
+
+    def test_update_all_items_reuses_unfinished_job(self, auth_client):
+        first = auth_client.get("/api/update-items").get_json()["job_id"]
+        second = auth_client.get("/api/update-items").get_json()["job_id"]
+        assert first == second
+
+    def test_unknown_job(self, auth_client):
+        res = auth_client.get("/api/jobs/999")
+        assert res.status_code == 404
+
+    def test_job_routes_require_login(self, client):
+        job = JobQueue().enqueue("refresh_items")
+
+        assert client.get("/api/update-items").status_code == 302
+        assert client.get(f"/api/jobs/{job.id}").status_code == 302
+        assert Job.query.count() == 1
+
+    def test_jobs_queued_by_others_are_not_found(self, auth_client):
+        job = JobQueue().enqueue("refresh_items")
+
+        res = auth_client.get(f"/api/jobs/{job.id}")
+        assert res.status_code == 404
+
+    def test_admin_sees_every_job(self, auth_client_admin):
+        job = JobQueue().enqueue("refresh_items")
+
+        res = auth_client_admin.get(f"/api/jobs/{job.id}")
         assert res.status_code == 200
+        assert res.get_json()["id"] == job.id
+
+
+class TestMetricsAPI:
+    def test_metrics_endpoint_reports_scheduler_usage(self, auth_client_admin):
+        from ptracker.metrics import metrics
+
+        metrics.gauge("datasource.ebay.quota_used", 42)
+        res = auth_client_admin.get("/api/metrics")
+        assert res.status_code == 200
+        assert res.get_json()["gauges"]["datasource.ebay.quota_used"] == 42
+        metrics.reset()
+
+    def test_metrics_require_login(self, client):
+        res = client.get("/api/metrics")
+        assert res.status_code == 302
+
+    def test_metrics_are_admin_only(self, auth_client):
+        res = auth_client.get("/api/metrics")
+        assert res.status_code == 403
@@ -0,0 +1,66 @@
+from sqlalchemy import inspect
+
+from config import TestingConfig
+from ptracker import create_app, create_worker_app
+from ptracker.extensions import db
+
+
+class NoAutoCreateConfig(TestingConfig):
+    AUTO_CREATE_TABLES = False
+
+
+def test_worker_app_leaves_out_the_web_layer():
+    app = create_worker_app(TestingConfig)
+
+    assert app.blueprints == {}
+    assert "flask-smorest" not in app.extensions
+    assert [rule.endpoint for rule in app.url_map.iter_rules()] == ["static"]
+    assert {"init-db", "run-worker", "dispatch-notifications"} <= set(app.cli.commands)
+
+    with app.app_context():
+        assert app.extensions["services"].get("job_queue") is not None
+
+
+def test_boot_does_not_touch_the_database(tmp_path):
+    class UnreachableConfig(NoAutoCreateConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'missing' / 'app.db'}"
+
+    create_app(UnreachableConfig)
+
+
+def test_init_db_creates_the_tables(tmp_path):
+    class FileConfig(NoAutoCreateConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    app = create_worker_app(FileConfig)
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+
+        result = app.test_cli_runner().invoke(args=["init-db"])
+
+        assert "Database initialized!" in result.output
+        assert {"user", "item", "user_item"} <= set(inspect(db.engine).get_table_names())
+        db.engine.dispose()
+
+
+def test_startup_profile_times_every_phase(capsys):
+    class ProfiledConfig(TestingConfig):
+        STARTUP_PROFILE = True
+
+    app = create_app(ProfiledConfig)
+
+    phases = [name for name, _, _ in app.extensions["startup_profile"].phases]
+    assert phases == [
+        "config",
+        "extensions",
+        "datasources",
+        "cache",
+        "services",
+        "web",
+        "errors",
+        "cli",
+        "create_tables",
+    ]
+    report = capsys.readouterr().err
+    assert report.splitlines()[0].split() == ["phase", "ms", "imports"]
+    assert "total" in report
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from config import TestingConfig
+from ptracker.asgi import create_asgi_app
+from ptracker.datasources import MockDataSource, ProductNotFoundError
+from ptracker.extensions import db
+from ptracker.models import User, UserItem
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    """ASGI app on a file database, as requests run on their own threads and connections"""
+
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    asgi_app = create_asgi_app(FileConfig)
+    with asgi_app.flask_app.app_context():
+        db.session.add(
+            User(username="testuser", email="test@example.com", password_hash=generate_password_hash("password123"))
+        )
+        db.session.commit()
+    yield asgi_app
+    with asgi_app.flask_app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def session_cookie(asgi_app):
+    client = asgi_app.flask_app.test_client()
+    client.post("/auth/login", json={"email": "test@example.com", "password": "password123"})
+    return f"session={client.get_cookie('session').value}"
+
+
+async def call(app, method: str, path: str, body: dict | None = None, cookie: str | None = None):
+    """Run one request through the ASGI app, returning its status and JSON body (None if not JSON)"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [
+        (b"host", b"localhost"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode()),
+    ]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = sent[0]
+    content = b"".join(message.get("body", b"") for message in sent[1:])
+    is_json = (b"content-type", b"application/json") in start["headers"]
+    return start["status"], json.loads(content) if is_json else None
+
+
+def track(app, cookie, external_id, target_price=50.0):
+    body = {"url": f"https://mock.com/items/{external_id}", "target_price": target_price}
+    return call(app, "POST", "/api/items/add", body, cookie)
+
+
+def test_requests_are_served_by_the_flask_app(asgi_app, session_cookie):
+    status, body = asyncio.run(call(asgi_app, "GET", "/api/items", cookie=session_cookie))
+
+    assert status == 200 and body["data"] == []
+    assert asyncio.run(call(asgi_app, "GET", "/api/items"))[0] == 302
+
+
+def test_track_item_is_fetched_asynchronously(asgi_app, session_cookie, mocker):
+    mocker.patch.object(MockDataSource, "fetch_product", side_effect=AssertionError("fetched on a thread"))
+    fetch = mocker.spy(MockDataSource, "fetch_product_async")
+
+    status, body = asyncio.run(track(asgi_app, session_cookie, "42"))
+
+    assert status == 201
+    assert body["data"]["external_id"] == "42" and body["data"]["current_price"] == 99.99
+    assert fetch.call_count == 1
+    with asgi_app.flask_app.app_context():
+        assert UserItem.query.count() == 1
+
+
+def test_prefetch_errors_are_answered_like_wsgi(asgi_app, session_cookie, mocker):
+    mocker.patch.object(MockDataSource, "fetch_product_async", side_effect=ProductNotFoundError("gone"))
+
+    status, body = asyncio.run(track(asgi_app, session_cookie, "42"))
+
+    assert (status, body["error"]) == (404, "Product not found")
+
+
+def test_anonymous_track_requests_are_not_fetched(asgi_app, mocker):
+    fetch = mocker.spy(MockDataSource, "fetch_product_async")
+
+    status, _ = asyncio.run(track(asgi_app, None, "42"))
+
+    assert status == 302
+    assert fetch.call_count == 0
+
+
+def test_fetches_do_not_wait_for_each_other(asgi_app, session_cookie, mocker):
+    """Every fetch waits until all are in flight, which only happens if none holds up the others"""
+    in_flight = 5
+
+    async def run():
+        arrived = asyncio.Barrier(in_flight)
+
+        async def fetch(source, identifier):
+            await asyncio.wait_for(arrived.wait(), timeout=5)
+            return source._build_snapshot(identifier)
+
+        mocker.patch.object(MockDataSource, "fetch_product_async", fetch, autospec=False)
+        return await asyncio.gather(*(track(asgi_app, session_cookie, i) for i in range(in_flight)))
+
+    responses = asyncio.run(run())
+
+    assert [status for status, _ in responses] == [201] * in_flight
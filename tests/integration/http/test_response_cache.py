@@ -0,0 +1,204 @@
+from datetime import datetime, timezone
+
+import pytest
+import redis
+
+from ptracker.cache import LRUBackend, ResponseCache, init_cache, mark_stale
+from ptracker.datasources import ProductSnapshot
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import Item
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+class FakeRedis:
+    """Stores values as bytes like a redis-py client, ignoring expiry"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None):
+        self.data[name] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, *names):
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+
+class BrokenRedis(FakeRedis):
+    def get(self, name):
+        raise ConnectionError("redis is down")
+
+
+@pytest.fixture
+def cache(app):
+    app.extensions["response_cache"] = ResponseCache(FakeRedis(), ttl=60)
+    metrics.reset()
+    yield app.extensions["response_cache"]
+    metrics.reset()
+
+
+def _counters():
+    return metrics.snapshot("cache.")["counters"]
+
+
+def _track(client, *external_ids):
+    item_ids = []
+    for i in external_ids:
+        res = client.post("/api/items/add", json={"url": f"https://mock.com/items/{i}", "target_price": 50.0})
+        item_ids.append(res.get_json()["data"]["id"])
+    return item_ids
+
+
+def test_dashboard_is_served_from_cache(cache, auth_client, count_queries):
+    _track(auth_client, 1, 2)
+    first = auth_client.get("/api/items").get_json()
+
+    with count_queries() as counter:
+        second = auth_client.get("/api/items").get_json()
+
+    assert second == first and len(second["data"]) == 2
+    # Just the ETag check
+    assert counter.count == 1
+    assert _counters() == {"cache.user.misses": 1, "cache.user.hits": 1, "cache.invalidations": 2}
+
+
+def test_item_views_are_cached_per_query(cache, auth_client):
+    (item_id,) = _track(auth_client, 1)
+
+    for _ in range(2):
+        auth_client.get(f"/api/items/{item_id}?limit=2")
+        auth_client.get(f"/api/items/{item_id}?resolution=daily")
+
+    assert _counters()["cache.item.misses"] == 2
+    assert _counters()["cache.item.hits"] == 2
+
+
+@pytest.mark.parametrize(
+    "write, check",
+    [
+        (
+            lambda client, user_id, item_id: client.patch(
+                f"/api/items/{item_id}/notifications", json={"enabled": False}
+            ),
+            lambda entries: entries[0]["notifications_enabled"] is False,
+        ),
+        (
+            lambda client, user_id, item_id: PriceTrackerService().update_item_target_price(user_id, item_id, 20.0),
+            lambda entries: entries[0]["target_price"] == 20.0,
+        ),
+        (
+            lambda client, user_id, item_id: client.delete(f"/api/items/{item_id}"),
+            lambda entries: entries == [],
+        ),
+        (
+            lambda client, user_id, item_id: _track(client, 2),
+            lambda entries: len(entries) == 2,
+        ),
+    ],
+    ids=["item_notifications", "target_price", "untrack", "track"],
+)
+def test_writes_invalidate_the_users_dashboard(cache, auth_client, auth_user, write, check):
+    (item_id,) = _track(auth_client, 1)
+    auth_client.get("/api/items")
+
+    write(auth_client, auth_user.id, item_id)
+
+    assert check(auth_client.get("/api/items").get_json()["data"])
+
+
+def test_price_refresh_invalidates_item_and_trackers(cache, auth_client, auth_user, mocker):
+    (item_id,) = _track(auth_client, 1)
+    auth_client.get("/api/items")
+    auth_client.get(f"/api/items/{item_id}")
+
+    mocker.patch.object(
+        PriceTrackerService,
+        "_fetch_live_snapshot",
+        return_value=ProductSnapshot(
+            vendor="mock",
+            external_id="1",
+            name="Refreshed",
+            price=12.5,
+            currency="USD",
+            in_stock=True,
+            url="https://mock.com/items/1",
+            timestamp=datetime.now(timezone.utc),
+        ),
+    )
+    db.session.get(Item, item_id).last_fetched = None
+    # Only the item is marked stale, its trackers' dashboards follow
+    PriceTrackerService().check_price_and_update(item_id)
+
+    (entry,) = auth_client.get("/api/items").get_json()["data"]
+    assert entry["current_price"] == 12.5
+    assert auth_client.get(f"/api/items/{item_id}").get_json()["data"]["name"] == "Refreshed"
+
+
+def test_rolled_back_writes_keep_the_cache(cache, auth_client, auth_user):
+    _track(auth_client, 1)
+    auth_client.get("/api/items")
+
+    mark_stale(users=[auth_user.id])
+    db.session.rollback()
+    auth_client.get("/api/items")
+
+    assert _counters()["cache.user.hits"] == 1
+
+
+def test_home_page_is_cached(cache, auth_client):
+    _track(auth_client, 1)
+
+    pages = [auth_client.get("/home").data for _ in range(2)]
+
+    assert pages[0] == pages[1]
+    assert _counters()["cache.user.hits"] == 1
+
+
+def test_home_page_query_count_is_constant(auth_client, request_queries):
+    # Uncached (CACHE_TTL=0), so every request renders the page
+    _track(auth_client, *range(3))
+    auth_client.get("/home")
+    _track(auth_client, *range(3, 20))
+    page = auth_client.get("/home")
+
+    assert page.status_code == 200
+    assert request_queries[3] == request_queries[-1]
+
+
+def test_backend_errors_fall_back_to_uncached(app, auth_client):
+    app.extensions["response_cache"] = ResponseCache(BrokenRedis(), ttl=60)
+    metrics.reset()
+
+    res = auth_client.get("/api/items")
+
+    assert res.status_code == 200
+    assert _counters()["cache.errors"] == 1
+    metrics.reset()
+
+
+def test_cache_url_selects_a_redis_backend(app):
+    app.config["CACHE_URL"] = "redis://localhost:6379/0"
+    init_cache(app)
+
+    assert isinstance(app.extensions["response_cache"].backend, redis.Redis)
+
+
+def test_lru_backend_expires_and_evicts():
+    now = [0.0]
+    backend = LRUBackend(max_entries=2, clock=lambda: now[0])
+
+    backend.set("a", b"1", ex=10)
+    backend.set("b", b"2")
+    backend.get("a")
+    backend.set("c", b"3")
+    # "b" was the least recently used
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (b"1", None, b"3")
+
+    now[0] = 10.0
+    assert backend.get("a") is None
+    assert backend.delete("a", "c") == 1
+    assert len(backend) == 0
@@ -0,0 +1,33 @@
+from flask import g
+
+from ptracker.auth.service import AuthService
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def test_services_are_built_on_first_use(app, client):
+    registry = app.extensions["services"]
+
+    client.get("/auth/login")
+    client.get("/static/resets.css")
+    assert registry._instances == {}
+
+    assert isinstance(g.price_service, PriceTrackerService)
+    assert list(registry._instances) == ["price_service"]
+
+
+def test_services_are_shared_by_requests(app, auth_client):
+    registry = app.extensions["services"]
+    auth_client.get("/api/items")
+    auth_client.get("/home")
+
+    with app.test_request_context():
+        assert isinstance(g.auth_service, AuthService)
+        assert g.price_service is registry.get("price_service")
+    assert registry.get("job_queue") is registry.get("job_queue")
+
+
+def test_unknown_names_are_not_services(app):
+    assert g.get("price_service_typo") is None
+    assert not hasattr(g, "price_service_typo")
+    g.price_service = "overridden"
+    assert g.price_service == "overridden"
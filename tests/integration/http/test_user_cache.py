@@ -0,0 +1,46 @@
+from ptracker.auth.service import AuthService
+from ptracker.auth.user_cache import UserCache, get_user_cache
+
+
+def test_cached_user_saves_a_query_per_request(app, auth_client, request_queries):
+    # The first request loads the user and caches it for the second
+    for _ in range(2):
+        auth_client.get("/api/items")
+    app.extensions["user_cache"] = UserCache(ttl=0)
+    auth_client.get("/api/items")
+
+    cached, uncached = request_queries[-2:]
+    assert cached == uncached - 1
+    # The dashboard's own lookup of the user is answered by the identity map either way
+    assert cached == 2
+
+
+def test_own_changes_rotate_the_session_stamp(app, auth_client, auth_user, request_queries):
+    user_id = auth_user.id
+    cache = get_user_cache()
+    auth_client.get("/api/user")
+    stale = cache._entries.get(user_id)
+
+    auth_client.patch("/api/user/notifications", json={"mode": "daily"})
+    # Another process would still hold the old entry
+    cache._entries.set(user_id, stale, ex=30)
+
+    assert auth_client.get("/api/user").get_json()["data"]["notification_mode"] == "daily"
+
+
+def test_deleted_user_is_not_loaded_from_cache(auth_client, auth_user, request_queries):
+    user_id = auth_user.id
+    auth_client.get("/api/user")
+
+    auth_client.delete(f"/api/user/{user_id}")
+
+    assert auth_client.get("/api/user").status_code == 401
+
+
+def test_change_password_drops_the_cached_user(auth_client, auth_user, request_queries):
+    auth_client.get("/api/user")
+    assert get_user_cache()._entries.get(auth_user.id) is not None
+
+    AuthService().change_password(auth_user.id, "new-password")
+
+    assert get_user_cache()._entries.get(auth_user.id) is None
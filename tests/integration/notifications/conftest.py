@@ -0,0 +1,91 @@
+import socketserver
+import threading
+
+import pytest
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        session_messages = 0
+
+        self.reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-stub\r\n250 AUTH PLAIN\r\n")
+            elif command == "AUTH":
+                with server.lock:
+                    server.logins += 1
+                self.reply("535 bad credentials" if server.reject_login else "235 ok")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                body = []
+                while (data := self.rfile.readline().decode()) != ".\r\n":
+                    body.append(data)
+                with server.lock:
+                    server.messages.append("".join(body))
+                self.reply("250 queued")
+                session_messages += 1
+                if server.drop_after and session_messages >= server.drop_after:
+                    # Hang up without a goodbye, like a server closing an idle or busy session
+                    return
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.drop_after = None
+        self.reject_login = False
+
+
+@pytest.fixture
+def smtp_server():
+    server = StubSMTPServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def email_service(smtp_server, monkeypatch):
+    """EmailService pointed at the stub server"""
+    from ptracker.notifications import EmailService
+
+    host, port = smtp_server.server_address
+    monkeypatch.setenv("APP_EMAIL", "alerts@example.com")
+    monkeypatch.setenv("APP_PASSWORD", "secret")
+    monkeypatch.setenv("SMTP_SERVER", host)
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_SSL", "false")
+    service = EmailService()
+    yield service
+    pool = EmailService._pools.pop(service._key, None)
+    if pool:
+        pool.close()
@@ -0,0 +1,62 @@
+import smtplib
+
+import pytest
+
+from ptracker.notifications import EmailService, SMTPConnectionPool
+
+
+def _pool(server, **kwargs):
+    host, port = server.server_address
+    return SMTPConnectionPool(host, port, "user", "secret", use_ssl=False, **kwargs)
+
+
+def test_pool_sends_many_messages_per_session(smtp_server):
+    pool = _pool(smtp_server, size=1)
+
+    for i in range(20):
+        pool.send("alerts@example.com", [f"user{i}@example.com"], "Subject: hi\r\n\r\nbody")
+    pool.close()
+
+    assert len(smtp_server.messages) == 20
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+
+def test_pool_recycles_sessions_after_message_cap(smtp_server):
+    pool = _pool(smtp_server, size=1, max_messages_per_connection=5)
+
+    for _ in range(12):
+        pool.send("alerts@example.com", ["user@example.com"], "Subject: hi\r\n\r\nbody")
+
+    assert smtp_server.connections == 3
+
+
+def test_pool_reconnects_when_server_drops_session(smtp_server):
+    smtp_server.drop_after = 3
+    pool = _pool(smtp_server, size=1)
+
+    for _ in range(7):
+        pool.send("alerts@example.com", ["user@example.com"], "Subject: hi\r\n\r\nbody")
+
+    assert len(smtp_server.messages) == 7
+    assert smtp_server.connections == 3
+
+
+def test_pool_stops_retrying_logins_after_auth_failure(smtp_server):
+    smtp_server.reject_login = True
+    pool = _pool(smtp_server)
+
+    for _ in range(3):
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            pool.send("alerts@example.com", ["user@example.com"], "Subject: hi\r\n\r\nbody")
+
+    assert smtp_server.logins == 1
+
+
+def test_email_services_share_one_pool(email_service, smtp_server):
+    for _ in range(5):
+        EmailService().deliver("user@example.com")
+
+    assert len(smtp_server.messages) == 5
+    assert "Price Alert" in smtp_server.messages[0]
+    assert smtp_server.logins == 1
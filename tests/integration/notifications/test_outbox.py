@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.models import NotificationOutbox, User
+from ptracker.outbox import OutboxDispatcher, next_delivery, queue_notifications
+
+
+def _queue(user, count=1, prefix="alert", next_attempt_at=None):
+    queue_notifications(
+        [
+            {
+                "user_id": user.id,
+                "recipient": user.email,
+                "idempotency_key": f"{prefix}:{i}",
+                "payload": {"item_id": i, "name": f"Item {i}", "price": 45.0, "target_price": 50.0},
+                **({"next_attempt_at": next_attempt_at} if next_attempt_at else {}),
+            }
+            for i in range(count)
+        ]
+    )
+    db.session.commit()
+
+
+def _users(count):
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x") for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_queue_notifications_skips_duplicate_keys(app, auth_user):
+    _queue(auth_user, 3)
+    _queue(auth_user, 5)
+
+    assert db.session.query(NotificationOutbox).count() == 5
+
+
+def test_dispatcher_delivers_and_records_metrics(app, email_service, smtp_server):
+    for user in _users(10):
+        _queue(user, prefix=f"alert:{user.id}")
+
+    handled = OutboxDispatcher(email_service, concurrency=2, batch_size=4).drain()
+
+    assert handled == 10
+    assert len(smtp_server.messages) == 10
+    assert smtp_server.connections <= 2
+    assert "Message-ID: <alert:1:0@price-tracker>" in "".join(smtp_server.messages)
+    assert {row.status for row in db.session.query(NotificationOutbox)} == {"sent"}
+
+    snapshot = metrics.snapshot("notifications.outbox")
+    assert snapshot["counters"]["notifications.outbox.sent"] == 10
+    assert snapshot["counters"]["notifications.outbox.emails"] == 10
+    assert snapshot["timings"]["notifications.outbox.latency_seconds"]["count"] == 10
+
+
+def test_dispatcher_coalesces_a_users_alerts_into_one_email(app, auth_user, email_service, smtp_server):
+    _queue(auth_user, 30)
+
+    assert OutboxDispatcher(email_service, batch_size=5).drain() == 30
+
+    (message,) = smtp_server.messages
+    assert "Subject: Price Alert: 30 of your tracked items dropped below your target" in message
+    assert "Item 0" in message and "Item 29" in message
+    assert {row.status for row in db.session.query(NotificationOutbox)} == {"sent"}
+
+
+def test_digest_alerts_wait_for_the_delivery_boundary(app, auth_user, mocker):
+    email_service = mocker.Mock()
+    dispatcher = OutboxDispatcher(email_service)
+    _queue(auth_user, 3, next_attempt_at=datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1))
+
+    assert dispatcher.drain() == 0
+
+    db.session.query(NotificationOutbox).update({"next_attempt_at": datetime(2000, 1, 1)})
+    db.session.commit()
+    assert dispatcher.drain() == 3
+    assert email_service.deliver.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "mode, now, expected",
+    [
+        ("immediate", datetime(2024, 5, 1, 10, 30), datetime(2024, 5, 1, 10, 30)),
+        ("hourly", datetime(2024, 5, 1, 10, 30), datetime(2024, 5, 1, 11, 0)),
+        ("hourly", datetime(2024, 5, 1, 23, 59), datetime(2024, 5, 2, 0, 0)),
+        ("daily", datetime(2024, 5, 1, 6, 0), datetime(2024, 5, 1, 8, 0)),
+        ("daily", datetime(2024, 5, 1, 8, 0), datetime(2024, 5, 2, 8, 0)),
+    ],
+)
+def test_next_delivery(mode, now, expected):
+    assert next_delivery(mode, now.replace(tzinfo=timezone.utc), digest_hour=8) == expected
+
+
+def test_failed_delivery_is_retried_then_dead_lettered(app, auth_user, mocker):
+    email_service = mocker.Mock()
+    email_service.deliver.side_effect = OSError("smtp down")
+    dispatcher = OutboxDispatcher(email_service, max_attempts=2, retry_delay=60)
+    _queue(auth_user)
+    row = db.session.query(NotificationOutbox).one()
+
+    assert dispatcher.drain() == 1
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert row.last_error == "smtp down"
+    # Not due again until the retry delay has passed
+    assert dispatcher.drain() == 0
+
+    row.next_attempt_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.commit()
+    assert dispatcher.drain() == 1
+    assert row.status == "dead"
+    assert metrics.snapshot()["counters"]["notifications.outbox.dead"] == 1
+
+    assert dispatcher.retry_dead() == 1
+    email_service.deliver.side_effect = None
+    assert dispatcher.drain() == 1
+    assert row.status == "sent"
+
+
+def test_claimed_rows_are_not_claimed_twice(app, auth_user, mocker):
+    _queue(auth_user, 3)
+    first = OutboxDispatcher(mocker.Mock())
+    second = OutboxDispatcher(mocker.Mock())
+
+    assert len(first.claim_batch()) == 3
+    assert second.claim_batch() == []
+
+
+def test_expired_claim_is_reclaimed(app, auth_user, mocker):
+    _queue(auth_user)
+    dispatcher = OutboxDispatcher(mocker.Mock(), lease_seconds=60)
+    (row,) = dispatcher.claim_batch()
+
+    # The dispatcher that claimed it died before recording the outcome
+    row.lease_expires_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+    db.session.commit()
+
+    assert dispatcher.drain() == 1
+    assert row.status == "sent"
+    assert row.attempts == 2
+
+
+def test_dispatch_notifications_command(app, auth_user, mocker):
+    deliver = mocker.patch("ptracker.notifications.EmailService.deliver")
+    _queue(auth_user, 2)
+
+    result = app.test_cli_runner().invoke(args=["dispatch-notifications", "--burst"])
+
+    assert "Dispatched 2 notifications" in result.output
+    assert deliver.call_count == 1
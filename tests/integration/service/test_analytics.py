@@ -0,0 +1,94 @@
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from ptracker.analytics import item_stats
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory
+
+NOW = datetime(2026, 6, 1, 12)
+
+
+def _item_with_prices(prices, external_id="1", step=timedelta(days=1), confirmed=None):
+    """An item priced `prices` on consecutive days up to NOW, oldest first"""
+    item = Item(vendor="mock", external_id=external_id, url=f"https://mock.com/items/{external_id}")
+    db.session.add(item)
+    db.session.flush()
+    start = NOW - step * (len(prices) - 1)
+    db.session.add_all(
+        [
+            PriceHistory(
+                item_id=item.id,
+                price=price,
+                timestamp=start + step * i,
+                last_confirmed_at=(confirmed or {}).get(i),
+            )
+            for i, price in enumerate(prices)
+        ]
+    )
+    item.current_price = prices[-1]
+    db.session.commit()
+    return item
+
+
+def test_item_stats_match_plain_python(app):
+    prices = [100.0 + (day % 7) * 3 - day * 0.5 for day in range(120)]
+    item = _item_with_prices(prices)
+
+    stats = item_stats([item.id], now=NOW)[item.id]
+
+    last_30, last_90 = prices[-31:], prices[-91:]
+    returns = [(b - a) / a for a, b in zip(last_30, last_30[1:])]
+    assert stats.avg_7d == round(statistics.mean(prices[-8:]), 2)
+    assert stats.avg_30d == round(statistics.mean(last_30), 2)
+    assert (stats.min_30d, stats.max_30d) == (min(last_30), max(last_30))
+    assert (stats.min_90d, stats.max_90d) == (min(last_90), max(last_90))
+    assert stats.volatility_30d == round(statistics.stdev(returns) * 100, 2)
+    assert (stats.all_time_low, stats.all_time_high) == (min(prices), max(prices))
+    assert stats.pct_off_high == round((max(prices) - prices[-1]) / max(prices) * 100, 2)
+
+
+def test_item_stats_flags_all_time_low(app):
+    falling = _item_with_prices([50.0, 40.0, 30.0], external_id="falling")
+    recovered = _item_with_prices([50.0, 30.0, 40.0], external_id="recovered")
+
+    stats = item_stats([falling.id, recovered.id], now=NOW)
+
+    assert stats[falling.id].is_all_time_low is True
+    assert stats[recovered.id].is_all_time_low is False
+    assert stats[recovered.id].pct_off_high == 20.0
+
+
+def test_item_stats_weighs_change_only_ranges_by_days_held(app):
+    # 100 held for ten days (one row confirmed nine days later), then 45 for a day
+    item = _item_with_prices([100.0, 45.0], step=timedelta(days=10), confirmed={0: NOW - timedelta(days=1)})
+
+    stats = item_stats([item.id], now=NOW)[item.id]
+
+    assert stats.avg_30d == round((100.0 * 10 + 45.0) / 11, 2)
+    assert (stats.min_30d, stats.max_30d) == (45.0, 100.0)
+
+
+def test_item_stats_without_history(app):
+    item = _item_with_prices([20.0])
+    db.session.query(PriceHistory).delete()
+    db.session.commit()
+
+    stats = item_stats([item.id], now=NOW)[item.id]
+
+    assert stats.avg_30d is None and stats.volatility_30d is None
+    assert stats.all_time_low == stats.all_time_high == 20.0
+    assert item_stats([]) == {}
+
+
+@pytest.mark.parametrize("count", [3, 60])
+def test_item_stats_batch_query_count_is_constant(app, count_queries, count):
+    item_ids = [_item_with_prices([10.0, 9.0, 11.0], external_id=str(i)).id for i in range(count)]
+
+    with count_queries() as counter:
+        stats = item_stats(item_ids, now=NOW)
+
+    assert len(stats) == count
+    # One query for the windowed history, one for current price and all-time extremes
+    assert counter.count == 2
@@ -0,0 +1,147 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from ptracker.extensions import db
+from ptracker.models import ItemDailyStats, PriceHistory
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+@pytest.fixture
+def item_with_year(item_no_history):
+    """Four prices a day for the last 365 days, without any rollup rows"""
+    db.session.query(PriceHistory).delete()
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    db.session.add_all(
+        [
+            PriceHistory(
+                item_id=item_no_history.id,
+                price=float(days_ago * 10 + hour),
+                timestamp=today - timedelta(days=days_ago, hours=-hour * 6),
+            )
+            for days_ago in range(365)
+            for hour in range(4)
+        ]
+    )
+    db.session.commit()
+    return item_no_history
+
+
+def test_record_price_maintains_daily_rollup(app, item_no_history, mocker):
+    service = PriceTrackerService()
+    times = iter(datetime(2026, 6, 1, hour, tzinfo=timezone.utc) for hour in (1, 5, 9, 13))
+    mocker.patch("ptracker.price_tracking.service.datetime", wraps=datetime, now=lambda tz=None: next(times))
+
+    for price in (80.0, 120.0, 60.0, 90.0):
+        service._record_price(item_no_history, price)
+    db.session.commit()
+
+    row = db.session.get(ItemDailyStats, (item_no_history.id, date(2026, 6, 1)))
+    assert (row.open, row.high, row.low, row.close, row.count) == (80.0, 120.0, 60.0, 90.0, 4)
+
+
+def test_change_only_confirmations_still_roll_up(app, item_no_history):
+    app.config["HISTORY_CHANGE_ONLY"] = True
+    service = PriceTrackerService()
+
+    service._record_price(item_no_history, 100.0)
+    service._record_price(item_no_history, 100.0)
+    db.session.commit()
+
+    assert PriceHistory.query.count() == 1
+    # Both only confirm the fixture's row: the day's prices are rolled up, but only recorded rows count
+    row = ItemDailyStats.query.one()
+    assert (row.close, row.count) == (100.0, 0)
+
+
+@pytest.mark.parametrize("change_only", [False, True], ids=["full", "change_only"])
+def test_rebuilt_rollup_matches_the_live_one(app, item_no_history, mocker, change_only):
+    app.config["HISTORY_CHANGE_ONLY"] = change_only
+    db.session.query(PriceHistory).delete()
+    service = PriceTrackerService()
+    prices = [100.0, 100.0, 100.0, 100.0, 90.0, 90.0, 90.0, 90.0, 90.0, 80.0, 80.0, 100.0]
+    times = iter(datetime(2026, 6, 1 + i // 3, 1 + i % 3 * 8, tzinfo=timezone.utc) for i in range(len(prices)))
+    mocker.patch("ptracker.price_tracking.service.datetime", wraps=datetime, now=lambda tz=None: next(times))
+
+    for price in prices:
+        service._record_price(item_no_history, price)
+    db.session.commit()
+
+    def rollup():
+        rows = ItemDailyStats.query.order_by(ItemDailyStats.day).all()
+        return [(row.day.day, row.open, row.high, row.low, row.close, row.count) for row in rows]
+
+    live = rollup()
+    mocker.stopall()
+    service.rebuild_daily_stats()
+
+    assert rollup() == live
+    assert [count for *_, count in live] == ([1, 1, 0, 2] if change_only else [3, 3, 3, 3])
+
+
+def test_rebuild_daily_stats_command(app, item_with_year):
+    result = app.test_cli_runner().invoke(args=["rebuild-daily-stats"])
+
+    assert "Rebuilt 365 daily stats rows for 1 items" in result.output
+    oldest = ItemDailyStats.query.order_by(ItemDailyStats.day).first()
+    assert (oldest.open, oldest.high, oldest.low, oldest.close, oldest.count) == (3640.0, 3643.0, 3640.0, 3643.0, 4)
+
+    # Rebuilding replaces the rows rather than adding to them
+    result = app.test_cli_runner().invoke(args=["rebuild-daily-stats"])
+    assert "Rebuilt 365 daily stats rows for 1 items" in result.output
+    assert ItemDailyStats.query.count() == 365
+
+
+@pytest.mark.parametrize("resolution", ["daily", "weekly"])
+def test_long_range_buckets_match_raw_history(app, item_with_year, resolution):
+    service = PriceTrackerService()
+    # The rollup serves whole days, so start the range on one
+    since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=200)
+    from_raw = service.get_price_history(item_with_year.id, since=since, resolution=resolution)
+
+    service.rebuild_daily_stats()
+    from_rollup = service.get_price_history(item_with_year.id, since=since, resolution=resolution)
+
+    assert from_rollup == from_raw
+
+
+def test_long_range_reads_skip_raw_history(app, item_with_year, count_queries):
+    item_id = item_with_year.id
+    service = PriceTrackerService()
+    service.rebuild_daily_stats()
+    db.session.query(PriceHistory).delete()
+    db.session.commit()
+
+    with count_queries() as counter:
+        buckets = service.get_price_history(item_id, resolution="weekly")
+
+    # The rollup rows, and a check for history older than them
+    assert counter.count == 2
+    assert sum(bucket["count"] for bucket in buckets) == 365 * 4
+
+
+@pytest.mark.parametrize("resolution", ["daily", "weekly"])
+def test_history_older_than_the_rollup_is_read_raw(app, item_with_year, resolution):
+    """Before the first rebuild the rollup only holds the prices recorded since the upgrade"""
+    service = PriceTrackerService()
+    since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=200)
+    from_raw = service.get_price_history(item_with_year.id, since=since, resolution=resolution)
+
+    service._record_price(item_with_year, 1.0)
+    db.session.commit()
+    buckets = service.get_price_history(item_with_year.id, since=since, resolution=resolution)
+
+    assert ItemDailyStats.query.count() == 1
+    assert buckets[1:] == from_raw[1:] and len(buckets) == len(from_raw)
+
+
+def test_short_range_reads_raw_history(app, item_with_year):
+    service = PriceTrackerService()
+    service.rebuild_daily_stats()
+    db.session.query(ItemDailyStats).update({"high": 0.0})
+    db.session.commit()
+
+    since = datetime.now(timezone.utc) - timedelta(days=3)
+    buckets = service.get_price_history(item_with_year.id, since=since, resolution="daily")
+
+    assert buckets and all(bucket["high"] > 0 for bucket in buckets)
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import exc, text
+
+from config import TestingConfig
+from ptracker import create_app
+from ptracker.extensions import db
+from ptracker.metrics import metrics
+from ptracker.pooling import MeteredNullPool, MeteredQueuePool, engine_options
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    """Builds an app on a file database with the given pooling settings"""
+    apps = []
+
+    def build(**settings):
+        config = type("PooledConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/app.db"})
+        for key, value in settings.items():
+            setattr(config, key, value)
+        apps.append(create_app(config))
+        # Leave out creating the tables
+        metrics.reset()
+        return apps[-1]
+
+    yield build
+    metrics.reset()
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+def _pool_metrics():
+    return metrics.snapshot("db.pool.")
+
+
+def test_engine_options_per_mode():
+    assert engine_options({}) == {}
+
+    queue = engine_options({"DB_POOL": "queue", "DB_POOL_SIZE": 3, "DB_MAX_OVERFLOW": 2, "DB_POOL_RECYCLE": 60})
+    assert queue["poolclass"] is MeteredQueuePool
+    assert [queue[key] for key in ("pool_size", "max_overflow", "pool_recycle", "pool_pre_ping")] == [3, 2, 60, True]
+
+    assert engine_options({"DB_POOL": "null"}) == {"poolclass": MeteredNullPool}
+    assert engine_options({"DB_POOL": "pgbouncer", "SQLALCHEMY_DATABASE_URI": "postgresql://u@pgbouncer/db"}) == {
+        "poolclass": MeteredNullPool
+    }
+    psycopg = engine_options({"DB_POOL": "pgbouncer", "SQLALCHEMY_DATABASE_URI": "postgresql+psycopg://u@pgbouncer/db"})
+    assert psycopg["connect_args"] == {"prepare_threshold": None}
+
+    with pytest.raises(ValueError, match="DB_POOL"):
+        engine_options({"DB_POOL": "session"})
+
+
+def test_explicit_engine_options_take_precedence(pooled_app):
+    app = pooled_app(DB_POOL="queue", SQLALCHEMY_ENGINE_OPTIONS={"pool_size": 1})
+
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_size"] == 1
+    with app.app_context():
+        assert isinstance(db.engine.pool, MeteredQueuePool)
+        assert db.engine.pool.size() == 1
+
+
+def test_queue_pool_reuses_connections_and_reports_usage(pooled_app):
+    app = pooled_app(DB_POOL="queue", DB_POOL_SIZE=2, DB_MAX_OVERFLOW=2)
+
+    with app.app_context():
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _pool_metrics()["gauges"] == {"db.pool.checked_out": 1, "db.pool.utilization": 0.25}
+        for _ in range(3):
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+    snapshot = _pool_metrics()
+    # All on the connection opened to create the tables
+    assert "db.pool.connects" not in snapshot["counters"]
+    assert snapshot["timings"]["db.pool.checkout_wait"]["count"] == 4
+    assert snapshot["gauges"]["db.pool.checked_out"] == 0
+
+
+def test_exhausted_queue_pool_counts_timeouts(pooled_app):
+    app = pooled_app(DB_POOL="queue", DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=0.05)
+
+    with app.app_context(), db.engine.connect():
+        assert _pool_metrics()["gauges"]["db.pool.utilization"] == 1.0
+        with pytest.raises(exc.TimeoutError):
+            db.engine.connect()
+
+    assert _pool_metrics()["counters"]["db.pool.timeouts"] == 1
+
+
+def test_null_pool_opens_a_connection_per_checkout(pooled_app):
+    app = pooled_app(DB_POOL="null")
+
+    with app.app_context():
+        for _ in range(3):
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+    assert _pool_metrics()["counters"]["db.pool.connects"] == 3
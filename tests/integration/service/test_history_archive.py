@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ptracker.analytics import item_stats
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory
+from ptracker.price_tracking.archive import HistoryArchive
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+@pytest.fixture
+def archive_dir(app, tmp_path):
+    app.config["HISTORY_ARCHIVE_DIR"] = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def item_with_old_history(item_no_history):
+    """A price a day for the last 300 days, priced at how many days ago it was"""
+    db.session.query(PriceHistory).delete()
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=12, minute=0, second=0, microsecond=0)
+    db.session.add_all(
+        [
+            PriceHistory(item_id=item_no_history.id, price=float(days_ago), timestamp=today - timedelta(days=days_ago))
+            for days_ago in range(300)
+        ]
+    )
+    db.session.commit()
+    return item_no_history
+
+
+def test_archive_history_command_moves_old_rows(app, archive_dir, item_with_old_history):
+    item_id = item_with_old_history.id
+    before = PriceTrackerService().get_price_history(item_id)
+
+    result = app.test_cli_runner().invoke(args=["archive-history", "--older-than", "180d"])
+
+    assert "Archived 120 price history rows for 1 items" in result.output
+    assert PriceHistory.query.filter_by(item_id=item_id).count() == 180
+    assert (archive_dir / f"{item_id}.npy").exists()
+    db.session.expire_all()
+    assert db.session.get(Item, item_id).history_rewritten_at is not None
+
+    after = PriceTrackerService().get_price_history(item_id)
+    assert [(p.timestamp, p.price) for p in after] == [(p.timestamp, p.price) for p in before]
+
+    # Nothing left to move
+    result = app.test_cli_runner().invoke(args=["archive-history", "--older-than", "180d"])
+    assert "Archived 0 price history rows for 0 items" in result.output
+
+
+def test_archive_history_keeps_latest_row(app, archive_dir, item_no_history):
+    PriceHistory.query.update({"timestamp": datetime(2020, 1, 1)})
+    db.session.commit()
+
+    assert PriceTrackerService().archive_history(timedelta(days=30)) == (0, 0)
+    assert PriceHistory.query.count() == 1
+
+
+def test_history_reads_span_table_and_archive(app, archive_dir, item_with_old_history):
+    service = PriceTrackerService()
+    service.archive_history(timedelta(days=180))
+    item_id = item_with_old_history.id
+    today = datetime.now(timezone.utc)
+
+    # Entirely archived range
+    history = service.get_price_history(item_id, since=today - timedelta(days=250), until=today - timedelta(days=240))
+    assert [p.price for p in history] == [float(days) for days in range(240, 250)]
+
+    # Newest `limit` points straddling both tiers
+    history = service.get_price_history(item_id, since=today - timedelta(days=185, hours=1), limit=10)
+    assert [p.price for p in history] == [float(days) for days in range(10)]
+
+    weekly = service.get_price_history(item_id, resolution="weekly")
+    assert sum(bucket["count"] for bucket in weekly) == 300
+
+
+def test_archive_history_rejects_bad_duration(app):
+    result = app.test_cli_runner().invoke(args=["archive-history", "--older-than", "soon"])
+
+    assert result.exit_code != 0
+    assert "is not a duration" in result.output
+
+
+def test_history_archive_append_merges_repeated_rows(tmp_path):
+    archive = HistoryArchive(str(tmp_path))
+    day = datetime(2024, 1, 1)
+
+    archive.append(1, [(day, 10.0, None), (day + timedelta(days=1), 11.0, None)])
+    rows = [(day + timedelta(days=1), 12.0, day + timedelta(days=3)), (day - timedelta(days=1), 9.0, None)]
+    assert archive.append(1, rows) == 3
+
+    assert [(p.price, p.last_confirmed_at) for p in archive.read(1)] == [
+        (12.0, day + timedelta(days=3)),
+        (10.0, None),
+        (9.0, None),
+    ]
+    # A record confirmed into the range still counts
+    assert [p.price for p in archive.read(1, since=day + timedelta(days=2))] == [12.0]
+    assert archive.read(2) == []
+
+
+def test_all_time_extremes_count_archived_prices_without_reading_the_archive(
+    app, archive_dir, item_with_old_history, mocker
+):
+    item_id = item_with_old_history.id
+    PriceTrackerService().archive_history(timedelta(days=180))
+    assert (item_with_old_history.archived_low, item_with_old_history.archived_high) == (180.0, 299.0)
+
+    load = mocker.spy(HistoryArchive, "load")
+    stats = item_stats([item_id])[item_id]
+
+    assert (stats.all_time_low, stats.all_time_high) == (0.0, 299.0)
+    assert load.call_count == 0
+
+
+def test_backfill_archived_extremes_command(app, archive_dir, item_with_old_history):
+    item = item_with_old_history
+    PriceTrackerService().archive_history(timedelta(days=180))
+    db.session.query(Item).update({"archived_low": None, "archived_high": None})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["backfill-archived-extremes"])
+
+    assert "Backfilled archived extremes for 1 items" in result.output
+    db.session.refresh(item)
+    assert (item.archived_low, item.archived_high) == (180.0, 299.0)
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from werkzeug.exceptions import NotFound
+
+from ptracker.extensions import db
+from ptracker.jobs import HANDLERS, JobQueue, Worker
+from ptracker.models import Item, Job, NotificationOutbox, User, UserItem
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def _expire_lease(job):
+    job.lease_expires_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+    db.session.commit()
+
+
+def _track(user_id, count):
+    items = [
+        Item(vendor="mock", external_id=f"job{i}", url=f"https://mock.com/items/job{i}", current_price=150.0)
+        for i in range(count)
+    ]
+    db.session.add_all(items)
+    db.session.flush()
+    db.session.add_all([UserItem(user_id=user_id, item_id=item.id, target_price=100.0) for item in items])
+    db.session.commit()
+    return items
+
+
+def test_lease_runs_each_job_once(app):
+    queue = JobQueue()
+    job = queue.enqueue("refresh_items")
+
+    leased = queue.lease("worker-1")
+
+    assert leased.id == job.id
+    assert leased.status == "running"
+    assert leased.attempts == 1
+    assert leased.leased_by == "worker-1"
+    assert queue.lease("worker-2") is None
+
+
+def test_lease_only_offers_known_kinds(app):
+    queue = JobQueue()
+    queue.enqueue("something_else")
+
+    assert queue.lease("worker-1", kinds=["refresh_items"]) is None
+
+
+def test_expired_lease_is_released_to_another_worker(app):
+    queue = JobQueue()
+    job = queue.enqueue("refresh_items")
+    queue.lease("worker-1")
+    _expire_lease(job)
+
+    leased = queue.lease("worker-2")
+
+    assert leased.id == job.id
+    assert leased.leased_by == "worker-2"
+    assert leased.attempts == 2
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(app):
+    queue = JobQueue()
+    job = queue.enqueue("refresh_items", max_attempts=1)
+    queue.lease("worker-1")
+    _expire_lease(job)
+
+    assert queue.lease("worker-2") is None
+    assert job.status == "failed"
+    assert job.error == "Lease expired"
+
+
+def test_failed_job_is_retried_later(app):
+    queue = JobQueue(retry_delay=30)
+    job = queue.enqueue("refresh_items", max_attempts=2)
+    queue.lease("worker-1")
+
+    queue.fail(job, RuntimeError("boom"))
+
+    assert job.status == "queued"
+    assert job.error == "boom"
+    assert job.run_after > datetime.now(timezone.utc).replace(tzinfo=None)
+    assert queue.lease("worker-1") is None
+
+    job.run_after = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.commit()
+    queue.lease("worker-1")
+    queue.fail(job, RuntimeError("boom again"))
+    assert job.status == "failed"
+
+
+def test_progress_extends_lease(app):
+    queue = JobQueue(lease_seconds=60)
+    job = queue.enqueue("refresh_items")
+    queue.lease("worker-1")
+    _expire_lease(job)
+
+    queue.report_progress(job, 5, 10)
+
+    assert (job.progress, job.total) == (5, 10)
+    assert queue.lease("worker-2") is None
+
+
+def test_sharded_job_reports_combined_status(app):
+    queue = JobQueue()
+    group = queue.enqueue("refresh_items", shards=2)
+
+    first = queue.lease("worker-1")
+    second = queue.lease("worker-2")
+    assert {first.payload["shard"], second.payload["shard"]} == {0, 1}
+    assert queue.lease("worker-3") is None
+
+    queue.report_progress(first, 3, 3)
+    queue.complete(first, {"updated": 3})
+    status = queue.get_status(group.id)
+    assert status["status"] == "running"
+    assert status["progress"] == 3
+    assert [shard["status"] for shard in status["shards"]] == ["done", "running"]
+
+    second.max_attempts = 1
+    queue.fail(second, "boom")
+    assert queue.get_status(group.id)["status"] == "failed"
+    assert group.status == "failed"
+
+
+def test_deduplicated_job_is_found_by_everyone_who_requested_it(app, auth_user):
+    other = User(username="other", email="other@example.com", password_hash="x")
+    stranger = User(username="stranger", email="stranger@example.com", password_hash="x")
+    db.session.add_all([other, stranger])
+    db.session.commit()
+    queue = JobQueue()
+
+    job = queue.enqueue("refresh_items", shards=2, dedupe=True, requested_by=auth_user.id)
+    again = queue.enqueue("refresh_items", shards=2, dedupe=True, requested_by=other.id)
+    queue.enqueue("refresh_items", shards=2, dedupe=True, requested_by=other.id)
+
+    assert again.id == job.id
+    assert queue.get_status(job.id, requested_by=auth_user.id)["id"] == job.id
+    assert queue.get_status(job.id, requested_by=other.id)["id"] == job.id
+    with pytest.raises(NotFound):
+        queue.get_status(job.id, requested_by=stranger.id)
+    with pytest.raises(NotFound):
+        queue.get_status(job.children[0].id, requested_by=auth_user.id)
+
+
+def test_enqueue_rejects_zero_shards(app):
+    with pytest.raises(ValueError):
+        JobQueue().enqueue("refresh_items", shards=0)
+
+
+def test_worker_refreshes_only_its_shard(app, auth_user):
+    items = _track(auth_user.id, 4)
+    queue = JobQueue()
+    queue.enqueue("refresh_items", shards=2)
+    worker = Worker(queue, HANDLERS, worker_id="worker-1")
+
+    assert worker.run_once()
+
+    shard_job = db.session.query(Job).filter(Job.leased_by.is_(None), Job.status == "done").one()
+    shard = shard_job.payload["shard"]
+    refreshed = {item.id for item in items if item.last_fetched is not None}
+    assert refreshed == {item.id for item in items if item.id % 2 == shard}
+    assert shard_job.result == {"total": 2, "updated": 2, "failed": 0}
+    assert (shard_job.progress, shard_job.total) == (2, 2)
+
+
+def test_refresh_that_dies_before_queueing_alerts_is_retried_whole(app, auth_user, mocker):
+    items = _track(auth_user.id, 3)
+    queue = JobQueue(retry_delay=0)
+    job = queue.enqueue("refresh_items")
+    worker = Worker(queue, HANDLERS, worker_id="worker-1", progress_interval=0)
+    progress = mocker.spy(queue, "report_progress")
+    mocker.patch.object(PriceTrackerService, "_queue_price_alerts", side_effect=RuntimeError("killed"))
+
+    assert worker.run_once()
+
+    assert progress.call_count >= 1
+    assert job.status == "queued"
+    # Nothing of the pass was kept, so the retry finds every item still stale
+    assert all(item.last_fetched is None and item.current_price == 150.0 for item in items)
+    assert NotificationOutbox.query.count() == 0
+
+    mocker.stopall()
+    assert worker.run_once()
+
+    assert job.status == "done"
+    assert job.result == {"total": 3, "updated": 3, "failed": 0}
+    assert NotificationOutbox.query.count() == 3
+
+
+def test_worker_requeues_failed_job(app, mocker):
+    queue = JobQueue()
+    job = queue.enqueue("refresh_items")
+    worker = Worker(queue, {"refresh_items": mocker.Mock(side_effect=RuntimeError("boom"))})
+
+    assert worker.run_once()
+
+    assert job.status == "queued"
+    assert job.error == "boom"
+
+
+def test_run_worker_command_drains_queue(app, auth_user):
+    _track(auth_user.id, 2)
+    job = JobQueue().enqueue("refresh_items")
+
+    result = app.test_cli_runner().invoke(args=["run-worker", "--burst", "--worker-id", "test"])
+
+    assert "Worker test stopped after 1 jobs" in result.output
+    assert job.status == "done"
@@ -1,8 +1,11 @@
 import pytest
-from datetime import datetime, timezone
+from werkzeug.exceptions import NotFound
+from datetime import datetime, timedelta, timezone
+from ptracker.datasources import MockDataSource
 from ptracker.datasources.base import ProductSnapshot
+from ptracker.price_tracking.refresh import RefreshStats
 from ptracker.price_tracking.service import PriceTrackerService
-from ptracker.models import Item, PriceHistory, UserItem
+from ptracker.models import Item, ItemDailyStats, NotificationOutbox, PriceHistory, User, UserItem
 from ptracker.extensions import db
 
 
@@ -131,6 +134,28 @@ def test_check_price_and_update_success(item_no_history, mocker):
     assert PriceHistory.query.filter_by(item_id=item_no_history.id).count() == 2
 
 
+def test_check_price_and_update_queues_alerts(item_no_history, auth_user, mocker):
+    db.session.add(UserItem(user_id=auth_user.id, item_id=item_no_history.id, target_price=95.0))
+    db.session.commit()
+    mocker.patch.object(
+        PriceTrackerService,
+        "_fetch_live_snapshot",
+        return_value=ProductSnapshot(
+            vendor=item_no_history.vendor,
+            external_id=item_no_history.external_id,
+            name=item_no_history.name,
+            price=item_no_history.current_price - 10,
+            currency=item_no_history.currency,
+            in_stock=item_no_history.in_stock,
+            url=item_no_history.url,
+        ),
+    )
+
+    PriceTrackerService().check_price_and_update(item_no_history.id)
+
+    assert db.session.query(NotificationOutbox).one().item_id == item_no_history.id
+
+
 def test_calculate_price_change(item_with_history):
     # Item has price history of 100 -> 90, so change should be -10%
     service = PriceTrackerService()
@@ -144,79 +169,459 @@ def test_calculate_price_change_no_previous_price(item_no_history):
     assert change_pct == 0.0  # No previous price to compare to
 
 
-def test_check_price_change_and_notify_all_sends_email(app, auth_user, mocker):
-    service = PriceTrackerService()
+def _seed_price_drops(service, user_id, count, start=0, old_price=55.0, new_price=45.0, target_price=50.0):
+    """Tracked items whose price just moved from `old_price` to `new_price`, returns the change events"""
+    items = [
+        Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}") for i in range(start, start + count)
+    ]
+    db.session.add_all(items)
+    db.session.flush()
+    changes = []
+    for item in items:
+        db.session.add(UserItem(user_id=user_id, item_id=item.id, target_price=target_price))
+        service._record_price(item, old_price)
+        changes.append(service._record_price(item, new_price))
+    db.session.flush()
+    return changes
 
-    mocker.patch.object(service, "update_all_tracked_items")
 
-    send_email_mock = mocker.patch("ptracker.price_tracking.service.EmailService.send_email")
+def _refresh_with(service, mocker, changes):
+    """Make the refresh step of the notify pass report `changes`"""
+    mocker.patch.object(
+        service, "update_all_tracked_items", return_value=RefreshStats(changes=[c for c in changes if c])
+    )
 
-    # Create item and add to DB
-    item = Item(vendor="mock", external_id="123", url="https://mock.com/items/123", current_price=49.99)
-    db.session.add(item)
-    db.session.flush()
 
-    user_item = UserItem(user_id=auth_user.id, item_id=item.id, target_price=50.0)
-    db.session.add(user_item)
-    db.session.flush()
+def test_check_price_change_and_notify_all_queues_email(app, auth_user, mocker):
+    service = PriceTrackerService()
+    changes = _seed_price_drops(service, auth_user.id, 1, new_price=49.99)
+    _refresh_with(service, mocker, changes)
 
-    # Simulate price drop by adding prev price above target
-    prev_history = PriceHistory(item_id=item.id, price=55.0)
-    db.session.add(prev_history)
-    db.session.flush()
+    service.check_price_change_and_notify_all()
 
-    latest_history = PriceHistory(item_id=item.id, price=item.current_price)
-    db.session.add(latest_history)
-    db.session.commit()
+    alert = db.session.query(NotificationOutbox).one()
+    assert alert.recipient == auth_user.email
+    assert alert.status == "pending"
+    assert alert.payload["previous_price"] == 55.0
+    assert alert.payload["price"] == 49.99
 
+    # The same price change never queues a second alert
     service.check_price_change_and_notify_all()
-    send_email_mock.assert_called_once_with(auth_user.email)
+    assert db.session.query(NotificationOutbox).count() == 1
 
 
 @pytest.mark.parametrize(
-    "user_notifications, item_notifications, price_change, current_price",
+    "user_notifications, item_notifications, old_price, new_price",
     [
-        (False, True, -5.0, 49.99),
-        (True, False, -5.0, 49.99),
-        (True, True, 5.0, 49.99),
-        (True, True, -5.0, 150.00),
+        (False, True, 55.0, 49.99),
+        (True, False, 55.0, 49.99),
+        (True, True, 45.0, 49.99),
+        (True, True, 200.0, 150.0),
+        (True, True, 48.0, 45.0),
+        (True, True, 45.0, 45.0),
     ],
     ids=[
         "user_notifications_disabled",
         "item_notifications_disabled",
         "price_increased",
         "price_dropped_above_target",
+        "already_below_target",
+        "price_unchanged",
     ],
 )
 def test_check_price_change_and_notify_all_fails(
-    app, auth_user, mocker, user_notifications, item_notifications, price_change, current_price
+    app, auth_user, mocker, user_notifications, item_notifications, old_price, new_price
 ):
     service = PriceTrackerService()
+    auth_user.notifications_enabled = user_notifications
+    changes = _seed_price_drops(service, auth_user.id, 1, old_price=old_price, new_price=new_price)
+    db.session.query(UserItem).update({"notifications_enabled": item_notifications})
+    _refresh_with(service, mocker, changes)
 
-    mocker.patch.object(service, "update_all_tracked_items")
-    # Simulate price drop
-    mocker.patch.object(service, "calculate_price_change", return_value=price_change)
+    service.check_price_change_and_notify_all()
+    assert db.session.query(NotificationOutbox).count() == 0
 
-    send_email_mock = mocker.patch("ptracker.price_tracking.service.EmailService.send_email")
 
-    auth_user.notifications_enabled = user_notifications
+def test_record_price_emits_change_only_when_price_moves(item_no_history):
+    service = PriceTrackerService()
+    item_no_history.current_price = None
 
-    item = Item(
-        vendor="mock",
-        external_id="123",
-        url="https://mock.com/items/123",
-        current_price=current_price,
-    )
-    db.session.add(item)
+    assert service._record_price(item_no_history, 100.0) is None
+    assert service._record_price(item_no_history, 100.0) is None
+
+    change = service._record_price(item_no_history, 90.0)
+    assert (change.item_id, change.previous_price, change.price) == (item_no_history.id, 100.0, 90.0)
+
+
+def test_check_price_change_and_notify_all_only_checks_changed_items(app, auth_user, mocker):
+    service = PriceTrackerService()
+    _seed_price_drops(service, auth_user.id, 5)
+    changes = _seed_price_drops(service, auth_user.id, 1, start=5)
+    _refresh_with(service, mocker, changes)
+
+    service.check_price_change_and_notify_all()
+
+    (alert,) = db.session.query(NotificationOutbox).all()
+    assert alert.item_id == changes[0].item_id
+
+
+def test_check_price_change_and_notify_all_alerts_every_crossed_target(app, auth_user, mocker):
+    service = PriceTrackerService()
+    (change,) = _seed_price_drops(service, auth_user.id, 1, old_price=100.0, new_price=60.0)
+    item = db.session.get(Item, change.item_id)
+    for i, target in enumerate([100.0, 80.0, 60.0, 59.99]):
+        user = User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserItem(user_id=user.id, item_id=item.id, target_price=target))
+    _refresh_with(service, mocker, [change])
+
+    service.check_price_change_and_notify_all()
+
+    # The seeded subscription (50) and 59.99 stay above the new price, 100 was never crossed from above
+    alerted = sorted(alert.payload["target_price"] for alert in db.session.query(NotificationOutbox))
+    assert alerted == [60.0, 80.0]
+
+
+def test_check_price_change_and_notify_all_query_count_is_constant(app, auth_user, mocker, count_queries):
+    service = PriceTrackerService()
+
+    _refresh_with(service, mocker, [])
+    with count_queries() as unchanged:
+        service.check_price_change_and_notify_all()
+    assert unchanged.count == 0
+
+    _refresh_with(service, mocker, _seed_price_drops(service, auth_user.id, 3))
+    with count_queries() as small:
+        service.check_price_change_and_notify_all()
+    assert db.session.query(NotificationOutbox).count() == 3
+
+    _refresh_with(service, mocker, _seed_price_drops(service, auth_user.id, 30, start=3))
+    with count_queries() as large:
+        service.check_price_change_and_notify_all()
+    assert db.session.query(NotificationOutbox).count() == 33
+
+    # One query for the changed items' subscriptions, one insert for the outbox
+    assert small.count == large.count == 2
+
+
+@pytest.mark.parametrize("mode, due_now", [("immediate", True), ("hourly", False), ("daily", False)])
+def test_check_price_change_and_notify_all_respects_notification_mode(app, auth_user, mocker, mode, due_now):
+    service = PriceTrackerService()
+    auth_user.notification_mode = mode
+    _refresh_with(service, mocker, _seed_price_drops(service, auth_user.id, 3))
+
+    service.check_price_change_and_notify_all()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    due = [row.next_attempt_at <= now for row in db.session.query(NotificationOutbox)]
+    assert due == [due_now] * 3
+
+
+def test_item_that_fails_to_apply_leaves_no_writes_behind(app, auth_user, mocker):
+    service = PriceTrackerService()
+    broken, *others = _track_items(auth_user.id, [150.0, 150.0, 150.0], prefix="apply")
+    record_price = service._record_price
+
+    def fail_after_writing(item, price):
+        change = record_price(item, price)
+        if item.id == broken.id:
+            db.session.flush()
+            raise RuntimeError("apply failed")
+        return change
+
+    mocker.patch.object(service, "_record_price", side_effect=fail_after_writing)
+
+    stats = service.check_price_change_and_notify_all()
+
+    assert (stats.updated, stats.failed) == (2, 1)
+    assert isinstance(stats.errors[broken.id], RuntimeError)
+    db.session.expire_all()
+    assert (broken.current_price, broken.last_fetched) == (150.0, None)
+    assert PriceHistory.query.filter_by(item_id=broken.id).count() == 0
+    assert ItemDailyStats.query.filter_by(item_id=broken.id).count() == 0
+    assert all(item.current_price == 99.99 and item.last_fetched for item in others)
+    assert NotificationOutbox.query.count() == 0
+
+
+def test_update_user_notifications_mode(app, auth_user):
+    service = PriceTrackerService()
+
+    service.update_user_notifications(auth_user.id, None, "daily")
+    assert auth_user.notification_mode == "daily"
+    assert auth_user.notifications_enabled is True
+
+    with pytest.raises(ValueError):
+        service.update_user_notifications(auth_user.id, None, "weekly")
+
+
+def test_track_item_initializes_price_change_columns(app):
+    item = PriceTrackerService().track_item("https://mock.com/items/123", 1, 700)
+
+    assert item.current_price == 99.99
+    assert item.previous_price is None
+    assert item.price_change_pct == 0.0
+    assert item.price_changed_at is not None
+
+
+def test__update_item_price_maintains_price_change_columns(item_no_history, mocker):
+    service = PriceTrackerService()
+    snapshot = MockDataSource()._build_snapshot(item_no_history.external_id)
+    snapshot.price = 80.0
+    mocker.patch.object(PriceTrackerService, "_fetch_live_snapshot", return_value=snapshot)
+
+    service._update_item_price(item_no_history)
+
+    assert item_no_history.previous_price == 100.0
+    assert item_no_history.current_price == 80.0
+    assert item_no_history.price_change_pct == -20.0
+    assert item_no_history.price_changed_at is not None
+
+
+def test_calculate_price_change_does_not_query(item_with_history, count_queries):
+    service = PriceTrackerService()
+    db.session.refresh(item_with_history)
+    with count_queries() as counter:
+        change_pct = service.calculate_price_change(item_with_history)
+
+    assert change_pct == -10.0
+    assert counter.count == 0
+
+
+def test_backfill_price_changes_command(app, item_no_history):
+    # History written without going through the service
+    db.session.add(PriceHistory(item_id=item_no_history.id, price=125.0))
+    item_no_history.current_price = 125.0
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["backfill-price-changes"])
+
+    assert "Backfilled price changes for 1 items" in result.output
+    assert item_no_history.previous_price == 100.0
+    assert item_no_history.price_change_pct == 25.0
+    assert item_no_history.price_changed_at is not None
+
+
+def _track_items(user_id, prices, prefix=""):
+    items = [
+        Item(
+            vendor="mock",
+            external_id=f"{prefix}{i}",
+            url=f"https://mock.com/items/{prefix}{i}",
+            name=f"Item {i}",
+            current_price=price,
+        )
+        for i, price in enumerate(prices)
+    ]
+    db.session.add_all(items)
     db.session.flush()
-    user_item = UserItem(
-        user_id=auth_user.id,
-        item_id=item.id,
-        target_price=50.0,
-        notifications_enabled=item_notifications,
+    db.session.add_all([UserItem(user_id=user_id, item_id=item.id, target_price=1.0) for item in items])
+    db.session.commit()
+    return items
+
+
+@pytest.mark.parametrize(
+    "sort, descending, expected",
+    [
+        ("added", False, [50.0, 20.0, 40.0, 10.0, 30.0]),
+        ("price", False, [10.0, 20.0, 30.0, 40.0, 50.0]),
+        ("price", True, [50.0, 40.0, 30.0, 20.0, 10.0]),
+    ],
+    ids=["added", "price_asc", "price_desc"],
+)
+def test_get_user_dashboard_keyset_pagination(app, auth_user, sort, descending, expected):
+    service = PriceTrackerService()
+    _track_items(auth_user.id, [50.0, 20.0, 40.0, 10.0, 30.0])
+
+    prices, cursor = [], None
+    for _ in range(3):
+        page = service.get_user_dashboard(auth_user.id, limit=2, cursor=cursor, sort=sort, descending=descending)
+        prices += [entry["current_price"] for entry in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert prices == expected
+    assert cursor is None
+
+
+def test_get_user_dashboard_rejects_invalid_cursor(app, auth_user):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        PriceTrackerService().get_user_dashboard(auth_user.id, limit=2, cursor="not-a-cursor")
+
+
+def test_get_user_tracked_items_unknown_user(app):
+    with pytest.raises(NotFound):
+        PriceTrackerService().get_user_tracked_items(999)
+
+
+@pytest.fixture
+def item_with_daily_history(item_no_history):
+    """Two prices a day for 10 days, starting on Monday 2026-01-05"""
+    db.session.query(PriceHistory).delete()
+    start = datetime(2026, 1, 5)
+    for day in range(10):
+        for hour, price in [(8, 100.0 + day), (20, 90.0 + day)]:
+            db.session.add(
+                PriceHistory(item_id=item_no_history.id, price=price, timestamp=start + timedelta(days=day, hours=hour))
+            )
+    db.session.commit()
+    return item_no_history
+
+
+def test_get_price_history_raw_range_and_limit(item_with_daily_history):
+    service = PriceTrackerService()
+
+    history = service.get_price_history(
+        item_with_daily_history.id,
+        since=datetime(2026, 1, 7, tzinfo=timezone.utc),
+        until=datetime(2026, 1, 9, 23, 59, tzinfo=timezone.utc),
+        limit=4,
+    )
+
+    assert [h.price for h in history] == [94.0, 104.0, 93.0, 103.0]
+
+
+def test_item_version_has_the_limited_history_window(item_with_daily_history):
+    service = PriceTrackerService()
+
+    def since(until, resolution="daily"):
+        _, _, _, window = service.get_item_version(
+            item_with_daily_history.id, until=until, limit=3, resolution=resolution
+        )
+        return window[0]
+
+    # The newest 3 buckets, which only change when the next bucket begins
+    assert since(datetime(2026, 1, 14, 1)) == since(datetime(2026, 1, 14, 23)) == datetime(2026, 1, 12)
+    assert since(datetime(2026, 1, 15, 1)) == datetime(2026, 1, 13)
+    # Weeks start on Monday, the 12th
+    assert since(datetime(2026, 1, 14), "weekly") == datetime(2025, 12, 29)
+    assert service.get_item_version(item_with_daily_history.id)[-1] == (None, None)
+
+
+def test_get_price_history_daily_buckets(item_with_daily_history):
+    history = PriceTrackerService().get_price_history(
+        item_with_daily_history.id, until=datetime(2026, 1, 14, 23, 59), limit=3, resolution="daily"
     )
-    db.session.add(user_item)
+
+    assert [b["timestamp"] for b in history] == [datetime(2026, 1, d) for d in (14, 13, 12)]
+    assert history[0] == {
+        "timestamp": datetime(2026, 1, 14),
+        "open": 109.0,
+        "high": 109.0,
+        "low": 99.0,
+        "close": 99.0,
+        "price": 99.0,
+        "count": 2,
+    }
+
+
+def test_get_price_history_weekly_buckets(item_with_daily_history):
+    history = PriceTrackerService().get_price_history(item_with_daily_history.id, resolution="weekly")
+
+    assert [(b["timestamp"], b["count"], b["low"], b["high"]) for b in history] == [
+        (datetime(2026, 1, 12), 6, 97.0, 109.0),
+        (datetime(2026, 1, 5), 14, 90.0, 106.0),
+    ]
+
+
+def test_change_only_history_confirms_repeated_prices(app, item_no_history):
+    app.config["HISTORY_CHANGE_ONLY"] = True
+    service = PriceTrackerService()
+
+    for price in (100.0, 100.0, 100.0):
+        assert service._record_price(item_no_history, price) is None
+    assert service._record_price(item_no_history, 90.0) is not None
     db.session.commit()
 
-    service.check_price_change_and_notify_all()
-    send_email_mock.assert_not_called()
+    rows = PriceHistory.query.filter_by(item_id=item_no_history.id).order_by(PriceHistory.timestamp).all()
+    assert [(row.price, row.last_confirmed_at is not None) for row in rows] == [(100.0, True), (90.0, False)]
+    assert item_no_history.previous_price == 100.0
+    assert service.calculate_price_change(item_no_history) == -10.0
+
+
+@pytest.fixture
+def item_with_change_only_history(item_no_history):
+    """100 from Monday 2026-01-05 through Thursday, then 90 from Friday through Sunday"""
+    db.session.query(PriceHistory).delete()
+    start = datetime(2026, 1, 5, 8)
+    db.session.add_all(
+        [
+            PriceHistory(
+                item_id=item_no_history.id, price=100.0, timestamp=start, last_confirmed_at=start + timedelta(days=3)
+            ),
+            PriceHistory(
+                item_id=item_no_history.id,
+                price=90.0,
+                timestamp=start + timedelta(days=4),
+                last_confirmed_at=start + timedelta(days=6),
+            ),
+        ]
+    )
+    db.session.commit()
+    return item_no_history
+
+
+def test_get_price_history_rebuilds_daily_series_from_ranges(item_with_change_only_history):
+    service = PriceTrackerService()
+    item_id = item_with_change_only_history.id
+
+    history = service.get_price_history(item_id)
+    assert [(h.timestamp.day, h.price) for h in history] == [
+        (11, 90.0),
+        (10, 90.0),
+        (9, 90.0),
+        (8, 100.0),
+        (7, 100.0),
+        (6, 100.0),
+        (5, 100.0),
+    ]
+
+    history = service.get_price_history(item_id, since=datetime(2026, 1, 7), until=datetime(2026, 1, 9, 12), limit=2)
+    assert [(h.timestamp.day, h.price) for h in history] == [(9, 90.0), (8, 100.0)]
+
+    (week,) = service.get_price_history(item_id, resolution="weekly")
+    # The points filling the ranges aren't counted, only the two recorded rows
+    assert (week["count"], week["open"], week["close"]) == (2, 100.0, 90.0)
+
+
+def test_compact_price_history_command_collapses_repeated_prices(app, item_no_history):
+    db.session.query(PriceHistory).delete()
+    start = datetime(2026, 1, 5, 8)
+    prices = [100.0, 100.0, 100.0, 90.0, 100.0, 100.0]
+    db.session.add_all(
+        [
+            PriceHistory(item_id=item_no_history.id, price=price, timestamp=start + timedelta(days=day))
+            for day, price in enumerate(prices)
+        ]
+    )
+    db.session.commit()
+    before = PriceTrackerService().get_price_history(item_no_history.id)
+
+    result = app.test_cli_runner().invoke(args=["compact-price-history"])
+    assert result.exit_code == 1 and "HISTORY_CHANGE_ONLY" in result.output
+    assert PriceHistory.query.count() == 6
+
+    app.config["HISTORY_CHANGE_ONLY"] = True
+    result = app.test_cli_runner().invoke(args=["compact-price-history"])
+
+    assert "Removed 3 repeated price history rows for 1 items" in result.output
+    rows = PriceHistory.query.order_by(PriceHistory.timestamp).all()
+    assert [(row.price, row.last_confirmed_at) for row in rows] == [
+        (100.0, start + timedelta(days=2)),
+        (90.0, None),
+        (100.0, start + timedelta(days=5)),
+    ]
+    after = PriceTrackerService().get_price_history(item_no_history.id)
+    assert [(p.timestamp, p.price) for p in after] == [(p.timestamp, p.price) for p in before]
+
+
+def test_backfill_price_changes_reads_confirmed_rows(app, item_with_change_only_history):
+    item_with_change_only_history.current_price = 90.0
+    db.session.commit()
+
+    PriceTrackerService().backfill_price_changes()
+
+    assert item_with_change_only_history.previous_price == 90.0
+    assert item_with_change_only_history.price_change_pct == 0.0
+    assert item_with_change_only_history.price_changed_at == datetime(2026, 1, 11, 8)
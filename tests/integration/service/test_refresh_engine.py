@@ -0,0 +1,172 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from ptracker.datasources import DataSourceFactory, MockDataSource, ProductNotFoundError
+from ptracker.extensions import db
+from ptracker.models import Item, PriceHistory, UserItem
+from ptracker.price_tracking.refresh import RefreshEngine, RefreshTask
+from ptracker.price_tracking.service import PriceTrackerService
+
+
+def _tasks(count, vendor="mock"):
+    return [
+        RefreshTask(item_id=i, vendor=vendor, external_id=str(i), url=f"https://mock.com/items/{i}")
+        for i in range(count)
+    ]
+
+
+def _fetch_with(source):
+    def fetch(batch):
+        results = source.fetch_products([task.external_id for task in batch])
+        return {task.item_id: results[task.external_id] for task in batch}
+
+    return fetch
+
+
+def test_engine_fetches_concurrently():
+    # Every fetch waits until all of them are in flight, which only happens if they overlap
+    arrived = threading.Barrier(10, timeout=5)
+    applied = []
+
+    def fetch(batch):
+        arrived.wait()
+        return _fetch_with(MockDataSource())(batch)
+
+    engine = RefreshEngine(concurrency=10)
+    stats = engine.run(
+        _tasks(10),
+        fetch=fetch,
+        apply=lambda task, snapshot: applied.append((task.item_id, threading.get_ident())),
+    )
+
+    assert stats.total == stats.updated == 10
+    assert stats.failed == 0
+    # Every write happens on the calling thread
+    assert {thread_id for _, thread_id in applied} == {threading.get_ident()}
+
+
+def test_engine_respects_vendor_limit():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fetch(batch):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return _fetch_with(MockDataSource())(batch)
+
+    engine = RefreshEngine(concurrency=8, vendor_limits={"mock": 2})
+    stats = engine.run(_tasks(10), fetch=fetch, apply=lambda task, snapshot: None)
+
+    assert stats.updated == 10
+    assert peak <= 2
+
+
+def test_engine_batches_per_vendor():
+    batches = []
+
+    def fetch(batch):
+        batches.append([task.item_id for task in batch])
+        return _fetch_with(MockDataSource())(batch)
+
+    stats = RefreshEngine(batch_sizes={"mock": 4}).run(_tasks(10), fetch=fetch, apply=lambda task, snapshot: None)
+
+    assert stats.updated == 10
+    assert sorted(len(batch) for batch in batches) == [2, 4, 4]
+
+
+def test_engine_isolates_item_errors():
+    def fetch(batch):
+        results = _fetch_with(MockDataSource())(batch)
+        results[3] = ProductNotFoundError("gone")
+        return results
+
+    applied = []
+    stats = RefreshEngine(concurrency=4).run(
+        _tasks(5), fetch=fetch, apply=lambda task, snapshot: applied.append(task.item_id)
+    )
+
+    assert sorted(applied) == [0, 1, 2, 4]
+    assert stats.failed == 1
+    assert isinstance(stats.errors[3], ProductNotFoundError)
+
+
+def test_update_all_tracked_items_refreshes_only_stale_items(app, auth_user, mocker):
+    stale = Item(vendor="mock", external_id="1", url="https://mock.com/items/1", current_price=10.0)
+    fresh = Item(
+        vendor="mock",
+        external_id="2",
+        url="https://mock.com/items/2",
+        current_price=10.0,
+        last_fetched=datetime.now(timezone.utc),
+    )
+    db.session.add_all([stale, fresh])
+    db.session.flush()
+    db.session.add_all(
+        [
+            UserItem(user_id=auth_user.id, item_id=stale.id, target_price=5.0),
+            UserItem(user_id=auth_user.id, item_id=fresh.id, target_price=5.0),
+        ]
+    )
+    db.session.commit()
+
+    fetch_spy = mocker.spy(DataSourceFactory.get("mock"), "fetch_products")
+
+    stats = PriceTrackerService().update_all_tracked_items()
+
+    fetch_spy.assert_called_once_with([stale.external_id])
+    assert stats.updated == 1
+    assert stale.current_price == 99.99
+    assert stale.last_fetched is not None
+    assert fresh.current_price == 10.0
+    assert PriceHistory.query.filter_by(item_id=stale.id).count() == 1
+    assert PriceHistory.query.filter_by(item_id=fresh.id).count() == 0
+
+
+def test_update_all_tracked_items_continues_after_failure(app, auth_user, mocker):
+    items = [Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}") for i in range(3)]
+    db.session.add_all(items)
+    db.session.flush()
+    db.session.add_all([UserItem(user_id=auth_user.id, item_id=item.id, target_price=5.0) for item in items])
+    db.session.commit()
+
+    source = DataSourceFactory.get("mock")
+    original = source.fetch_products
+
+    def flaky_fetch(identifiers):
+        results = original(identifiers)
+        results["1"] = ProductNotFoundError("gone")
+        return results
+
+    mocker.patch.object(source, "fetch_products", side_effect=flaky_fetch)
+
+    stats = PriceTrackerService().update_all_tracked_items()
+
+    assert stats.updated == 2
+    assert stats.failed == 1
+    assert items[1].last_fetched is None
+    assert items[0].last_fetched is not None and items[2].last_fetched is not None
+
+
+def test_update_all_tracked_items_uses_one_request_per_batch(app, auth_user, mocker):
+    items = [Item(vendor="mock", external_id=str(i), url=f"https://mock.com/items/{i}") for i in range(45)]
+    db.session.add_all(items)
+    db.session.flush()
+    db.session.add_all([UserItem(user_id=auth_user.id, item_id=item.id, target_price=5.0) for item in items])
+    db.session.commit()
+
+    source = DataSourceFactory.get("mock")
+    batch_spy = mocker.spy(source, "fetch_products")
+    single_spy = mocker.spy(source, "fetch_product")
+
+    stats = PriceTrackerService().update_all_tracked_items()
+
+    assert stats.updated == 45
+    assert batch_spy.call_count == 3  # 20 + 20 + 5
+    single_spy.assert_not_called()